@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+武將資料查詢引擎
+
+以 parse_table 的 structured array 為基礎，預先建立索引:
+  - 勢力 / 城市 / B7 (身份・水軍 bitfield) → 武將索引陣列
+  - 各能力值欄位的排序 (argsort)，範圍查詢以 np.searchsorted 取得
+
+條件可串接，全部以布林遮罩交集完成，不需重新解析 CSV。
+
+API:
+    index = CharacterIndex.from_rom(rom)
+    q = index.query().where(faction=3).navy().between("military", 80).order_by("troops", descending=True)
+    for idx in q.indices(): ...
+
+使用方法:
+    python character_query.py <rom_file.nes> [options]
+    python character_query.py <rom_file.nes> search <文字> [--limit N]   (姓名搜尋，見 name_search.py)
+
+選項:
+    --faction N       - 勢力 (可重複，取聯集)
+    --city N          - 城市 (可重複，取聯集)
+    --navy / --no-navy       - 只取水軍 / 非水軍
+    --leader / --no-leader   - 只取統領 / 一般
+    --min FIELD=V     - 欄位下限 (含)，例: --min military=80
+    --max FIELD=V     - 欄位上限 (含)
+    --sort FIELD      - 排序欄位 (加 --desc 遞減)
+    --limit N         - 最多輸出 N 筆
+    --csv FILE        - 以 export_csv 格式輸出結果
+
+範例:
+    python character_query.py "Sangokushi (Japan).nes" --faction 3 --navy --min military=80 --sort troops --desc
+    python character_query.py "Sangokushi (Japan).nes" search ﾘｭｳﾋﾞ
+"""
+
+import sys
+import os
+
+import numpy as np
+
+from sangokushi_extract_v2 import (
+    EXT_CSV_PATH,
+    STAT_FIELDS,
+    build_characters,
+    export_csv,
+    get_leader,
+    get_navy,
+    load_ext_char_info_from_csv,
+    parse_table,
+)
+
+# 建立等值索引的欄位
+INDEXED_FIELDS = ("faction", "city", "b7_raw")
+# B7 的所有組合值 (bit0 = 水軍, bit1 = 統領)
+B7_VALUES = (0, 1, 2, 3)
+
+
+def build_value_index(column):
+    """欄位值 → 武將索引陣列 (以穩定排序一次分組)"""
+    order = np.argsort(column, kind="stable")
+    values, starts = np.unique(column[order], return_index=True)
+    groups = np.split(order, starts[1:])
+    return {int(v): g for v, g in zip(values, groups)}
+
+
+class CharacterIndex:
+    """武將資料表與預建索引"""
+
+    def __init__(self, table, rom=None, ext_lookup=None):
+        self.table = table
+        self.rom = rom
+        self.ext_lookup = ext_lookup
+        self.count = len(table)
+        self.columns = {name: table[name] for name in STAT_FIELDS}
+        self.value_index = {name: build_value_index(self.columns[name])
+                            for name in INDEXED_FIELDS}
+        self._sorted = {}
+        self._characters = None
+
+    @classmethod
+    def from_rom(cls, rom, ext_lookup=None):
+        return cls(parse_table(rom), rom, ext_lookup)
+
+    def sorted_column(self, field):
+        """回傳 (order, sorted_values)，第一次使用時建立"""
+        if field not in self._sorted:
+            order = np.argsort(self.columns[field], kind="stable")
+            self._sorted[field] = (order, self.columns[field][order])
+        return self._sorted[field]
+
+    def equal_mask(self, field, values):
+        """欄位等於任一值的遮罩；索引欄位直接查表"""
+        mask = np.zeros(self.count, dtype=bool)
+        for v in values:
+            if field in self.value_index:
+                mask[self.value_index[field].get(int(v), [])] = True
+            else:
+                mask |= self.columns[field] == v
+        return mask
+
+    def range_mask(self, field, lo=None, hi=None):
+        """lo <= 欄位 <= hi 的遮罩 (searchsorted 於排序欄位)"""
+        order, values = self.sorted_column(field)
+        start = 0 if lo is None else np.searchsorted(values, lo, side="left")
+        stop = len(values) if hi is None else np.searchsorted(values, hi, side="right")
+        mask = np.zeros(self.count, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def b7_mask(self, predicate):
+        """依 B7 組合值篩選 (predicate(b7) → bool)"""
+        return self.equal_mask("b7_raw", [v for v in B7_VALUES if predicate(v)])
+
+    def query(self):
+        return Query(self)
+
+    def character(self, idx):
+        """Character 記錄 (第一次使用時建立全部記錄，EXT 姓名含近似比對)"""
+        if self._characters is None:
+            self._characters = build_characters(self.rom, self.table, self.ext_lookup)
+        return self._characters[int(idx)]
+
+
+class Query:
+    """可串接的查詢；每個條件回傳 self"""
+
+    def __init__(self, index):
+        self.index = index
+        self.mask = np.ones(index.count, dtype=bool)
+        self._order = None
+        self._limit = None
+
+    def _and(self, mask):
+        self.mask &= mask
+        return self
+
+    def where(self, **conditions):
+        """等值條件；值可為單一數字或多個值 (取聯集)"""
+        for field, value in conditions.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            self._and(self.index.equal_mask(field, values))
+        return self
+
+    def between(self, field, lo=None, hi=None):
+        return self._and(self.index.range_mask(field, lo, hi))
+
+    def navy(self, flag=True):
+        return self._and(self.index.b7_mask(lambda b7: bool(get_navy(b7)) == flag))
+
+    def leader(self, flag=True):
+        return self._and(self.index.b7_mask(lambda b7: bool(get_leader(b7)) == flag))
+
+    def order_by(self, field, descending=False):
+        self._order = (field, descending)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def indices(self):
+        """符合條件的武將索引陣列 (依排序與筆數限制)"""
+        if self._order is None:
+            result = np.flatnonzero(self.mask)
+        else:
+            field, descending = self._order
+            if descending:
+                # 遞減；同值時仍依武將索引遞增
+                column = self.index.columns[field].astype(np.int64)
+                order = np.lexsort((np.arange(len(column)), -column))
+            else:
+                order, _ = self.index.sorted_column(field)
+            result = order[self.mask[order]]
+        if self._limit is not None:
+            result = result[:self._limit]
+        return result
+
+    def count(self):
+        return int(self.mask.sum())
+
+    def characters(self):
+        return [self.index.character(i) for i in self.indices()]
+
+
+def print_characters(characters):
+    print(f"{'序號':>4} {'漢字':<4} {'EXT姓名':<6} {'年齡':>4} {'體':>3} {'智':>3} {'武':>3} "
+          f"{'魅':>3} {'運':>3} {'忠':>3} {'水軍':<2} {'身份':<2} {'兵士':>6} {'城':>3} {'勢':>3}")
+    for c in characters:
+        print(f"{c.index:>4} {c.rom_kanji:<4} {c.ext_name:<6} {c.age:>4} {c.body:>3} "
+              f"{c.intelligence:>3} {c.military:>3} {c.charisma:>3} {c.luck:>3} {c.loyalty:>3} "
+              f"{'●' if c.navy else '':<2} {c.role:<2} {c.troops:>6} {c.city:>3} {c.faction:>3}")
+
+
+def search_main(rom, ext_lookup, args):
+    """search 子命令: 姓名 n-gram 搜尋"""
+    from name_search import DEFAULT_LIMIT, NameSearchIndex
+
+    if not args:
+        print("錯誤: search 需要搜尋文字")
+        sys.exit(1)
+    limit = DEFAULT_LIMIT
+    if "--limit" in args:
+        i = args.index("--limit")
+        limit = int(args[i + 1])
+        del args[i:i + 2]
+    query = " ".join(args)
+
+    hits = NameSearchIndex.from_rom(rom, ext_lookup).search(query, limit=limit)
+    index = CharacterIndex.from_rom(rom, ext_lookup)
+    print(f"{'分數':>5}  {'欄位':<9} {'符合文字':<8} 武將")
+    for hit in hits:
+        label = ""
+        if hit.index < index.count:
+            c = index.character(hit.index)
+            label = f"#{c.index} {c.rom_kanji} {c.ext_name} (勢力 {c.faction}, 城市 {c.city})"
+        print(f"{hit.score:>5.2f}  {hit.field:<9} {hit.text:<8} {label}")
+    print(f"\n共 {len(hits)} 筆")
+
+
+def _parse_bound(text):
+    field, _, value = text.partition("=")
+    if field not in STAT_FIELDS or not value:
+        raise SystemExit(f"錯誤: 無效的條件 '{text}' (欄位: {', '.join(STAT_FIELDS)})")
+    return field, int(value)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = sys.argv[1]
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+
+    # 外部 CSV (同目錄下) 僅用於顯示 EXT 姓名
+    ext_csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), EXT_CSV_PATH)
+    ext_lookup = load_ext_char_info_from_csv(ext_csv_path)
+    if len(sys.argv) > 2 and sys.argv[2] == "search":
+        search_main(rom, ext_lookup, sys.argv[3:])
+        return
+
+    index = CharacterIndex.from_rom(rom, ext_lookup)
+    query = index.query()
+    factions, cities = [], []
+    csv_path = None
+
+    args = sys.argv[2:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = args[i + 1] if i + 1 < len(args) else None
+        if arg == "--faction" and value is not None:
+            factions.append(int(value))
+            i += 2
+        elif arg == "--city" and value is not None:
+            cities.append(int(value))
+            i += 2
+        elif arg in ("--navy", "--no-navy"):
+            query.navy(arg == "--navy")
+            i += 1
+        elif arg in ("--leader", "--no-leader"):
+            query.leader(arg == "--leader")
+            i += 1
+        elif arg == "--min" and value is not None:
+            field, bound = _parse_bound(value)
+            query.between(field, lo=bound)
+            i += 2
+        elif arg == "--max" and value is not None:
+            field, bound = _parse_bound(value)
+            query.between(field, hi=bound)
+            i += 2
+        elif arg == "--sort" and value is not None:
+            if value not in STAT_FIELDS:
+                raise SystemExit(f"錯誤: 無效的排序欄位 '{value}'")
+            query.order_by(value, "--desc" in args)
+            i += 2
+        elif arg == "--limit" and value is not None:
+            query.limit(int(value))
+            i += 2
+        elif arg == "--csv" and value is not None:
+            csv_path = value
+            i += 2
+        else:
+            i += 1
+
+    if factions:
+        query.where(faction=factions)
+    if cities:
+        query.where(city=cities)
+
+    characters = query.characters()
+    if csv_path:
+        export_csv(characters, csv_path)
+    else:
+        print_characters(characters)
+        print(f"\n共 {len(characters)} 筆")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+欄式 (columnar) 匯出
+
+多 ROM 分析用的型別化資料，取代 UTF-8-SIG CSV:
+
+  <dir>/<column>.npy   每欄一個 .npy (固定型別；字串為定長 Unicode)，
+                       讀取時 np.load(..., mmap_mode="r") 只映射需要的欄
+  <dir>/table.feather  Arrow IPC (需 pyarrow，可選)
+  <dir>/table.parquet  Parquet (需 pyarrow，可選)
+  <name>.npz           頭像 / 字型等多維陣列
+
+用法:
+    write_columns("out/characters", {"military": table["military"], ...})
+    military = load_column("out/characters", "military")   # memmap
+"""
+
+import os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as parquet
+except ImportError:
+    pa = None
+
+
+def write_columns(output_dir, columns, arrow=True):
+    """
+    將 {欄名: 一維陣列} 寫入目錄
+
+    參數:
+        output_dir: 輸出目錄
+        columns: dict, 各欄長度需相同
+        arrow: True 且已安裝 pyarrow 時額外寫出 Feather 與 Parquet
+
+    回傳: 寫出的檔案路徑列表
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"欄位長度不一致: {lengths}")
+
+    paths = []
+    for name, values in columns.items():
+        path = os.path.join(output_dir, f"{name}.npy")
+        # structured array 的欄位為 strided view，寫出前轉為連續陣列
+        np.save(path, np.ascontiguousarray(values))
+        paths.append(path)
+
+    if arrow and pa is not None:
+        table = pa.table({name: np.asarray(values) for name, values in columns.items()})
+        for path, writer in ((os.path.join(output_dir, "table.feather"), feather.write_feather),
+                             (os.path.join(output_dir, "table.parquet"), parquet.write_table)):
+            writer(table, path)
+            paths.append(path)
+    return paths
+
+
+def load_column(output_dir, name, mmap=True):
+    """讀取單一欄位 (預設 memory-mapped，不載入其他欄)"""
+    return np.load(os.path.join(output_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+
+def load_columns(output_dir, names=None, mmap=True):
+    """讀取多個欄位；names=None 時讀取目錄下所有 .npy"""
+    if names is None:
+        names = sorted(n[:-4] for n in os.listdir(output_dir) if n.endswith(".npy"))
+    return {name: load_column(output_dir, name, mmap) for name in names}
+
+
+def write_tensors(path, **arrays):
+    """多維陣列寫入 NPZ (未壓縮，np.load 後可逐一取用)"""
+    np.savez(path, **arrays)
+    return path
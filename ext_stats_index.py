@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部 CSV「光榮三國志系列武將登場統計 - 能力表」索引 (快取)
+
+CSV 涵蓋整個系列，每個作品 (S01, S02, ...) 各有一組能力值欄位。
+第一次讀取時建立索引並存成 <CSV>.index.pkl，之後以 CSV 的 mtime 與大小
+判斷是否失效，啟動時不再解析 CSV。
+
+索引內容:
+  rows                 每列的 (姓名, 假名)
+  stats[title]         {列號: 能力值 tuple}
+  by_stats[title]      {能力值 tuple: [列號, ...]}
+  by_name              {姓名: [列號, ...]}
+
+欄位對應:
+  - 欄 0: 姓名
+  - 欄 5: 假名
+  - TITLE_STAT_COLUMNS: 已確認的作品能力值欄 (S01 = 欄 8-12 身體/知力/武力/魅力/運勢)
+  - 其他作品依表頭 "Sxx" 前綴自動分組
+"""
+
+import csv
+import os
+import pickle
+import re
+import warnings
+
+NAME_COLUMN = 0
+KANA_COLUMN = 5
+TITLE_STAT_COLUMNS = {
+    "S01": (8, 9, 10, 11, 12),   # FC 三國志: 身體/知力/武力/魅力/運勢
+}
+TITLE_HEADER_PATTERN = re.compile(r"^\s*(S\d{2})")
+
+# 索引格式變更時遞增
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index.pkl"
+
+
+def detect_title_columns(header):
+    """依表頭前綴分組各作品的欄位；TITLE_STAT_COLUMNS 已列出的作品優先"""
+    titles = dict(TITLE_STAT_COLUMNS)
+    detected = {}
+    for col, cell in enumerate(header):
+        m = TITLE_HEADER_PATTERN.match(cell)
+        if m and m.group(1) not in titles:
+            detected.setdefault(m.group(1), []).append(col)
+    titles.update({title: tuple(cols) for title, cols in detected.items()})
+    return titles
+
+
+class ExtStatsIndex:
+    """外部能力表索引 (可 pickle)"""
+
+    def __init__(self, title_columns):
+        self.title_columns = title_columns
+        self.rows = []
+        self.stats = {title: {} for title in title_columns}
+        self.by_stats = {title: {} for title in title_columns}
+        self.by_name = {}
+
+    def add_row(self, row):
+        row_id = len(self.rows)
+        name = row[NAME_COLUMN] if len(row) > NAME_COLUMN else ""
+        kana = row[KANA_COLUMN] if len(row) > KANA_COLUMN else ""
+        self.rows.append((name, kana))
+        self.by_name.setdefault(name, []).append(row_id)
+        for title, cols in self.title_columns.items():
+            if len(row) <= max(cols) or not row[cols[0]]:
+                continue  # 此列無該作品資料
+            try:
+                key = tuple(int(row[c]) for c in cols)
+            except ValueError:
+                continue  # 能力值欄位為空或非數字
+            self.stats[title][row_id] = key
+            self.by_stats[title].setdefault(key, []).append(row_id)
+
+    def titles(self):
+        return list(self.title_columns)
+
+    def duplicates(self, title):
+        """能力值組合重複的列: {tuple: [列號, ...]}"""
+        return {k: ids for k, ids in self.by_stats[title].items() if len(ids) > 1}
+
+    def lookup(self, title, stats):
+        """能力值 tuple → [(姓名, 假名), ...]"""
+        return [self.rows[i] for i in self.by_stats[title].get(tuple(stats), [])]
+
+    def stats_for(self, name, title):
+        """姓名 → 該作品的能力值 tuple 列表"""
+        return [self.stats[title][i] for i in self.by_name.get(name, []) if i in self.stats[title]]
+
+    def exact_lookup(self, title="S01"):
+        """{能力值 tuple: (姓名, 假名)}；重複組合採用第一筆"""
+        return {key: self.rows[ids[0]] for key, ids in self.by_stats[title].items()}
+
+
+def build_ext_index(csv_path):
+    with open(csv_path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        index = ExtStatsIndex(detect_title_columns(header))
+        for row in reader:
+            index.add_row(row)
+    return index
+
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_ext_index(csv_path, cache_path=None, rebuild=False):
+    """
+    讀取索引；快取不存在、版本不符或 CSV 已變更 (mtime/大小) 時重建並寫回
+    """
+    cache_path = cache_path or csv_path + INDEX_SUFFIX
+    signature = _source_signature(csv_path)
+
+    if not rebuild and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == INDEX_VERSION and cached.get("source") == signature:
+                return cached["index"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError,
+                ImportError, TypeError):
+            pass
+
+    index = build_ext_index(csv_path)
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump({"version": INDEX_VERSION, "source": signature, "index": index},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        warnings.warn(f"無法寫入外部 CSV 索引快取 '{cache_path}': {e}", stacklevel=2)
+    return index
+
+
+def warn_duplicates(index, title="S01", limit=5):
+    """將重複能力值組合彙整為一則警告"""
+    dups = index.duplicates(title)
+    if not dups:
+        return
+    examples = "; ".join(
+        f"{key}: " + " / ".join(f"'{index.rows[i][0]}'" for i in ids)
+        for key, ids in list(dups.items())[:limit])
+    more = f" 等 {len(dups)} 組" if len(dups) > limit else ""
+    warnings.warn(f"{title} 重複能力值組合 (採用第一筆): {examples}{more}", stacklevel=3)
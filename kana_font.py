@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FC 三國志 假名字體解碼與字串繪製
+
+Bank 8 的片假名字體 (檔案偏移 0x22CA0，8×8、2bpp 含陰影) 依五十音順序排列:
+  ア イ ウ エ オ … ワ ヲ ン (46 個清音) + ゛ ゜ + ー
+
+ROM 字串為半角片假名 (Shift-JIS 0xA6-0xDF，見 decode_halfwidth_kana)。
+KanaFont 建立「半角假名碼 → 字體 tile」查表陣列並快取解碼後的 tile:
+  - 小寫假名 (ｧ ｬ ｯ …) 使用對應的大寫 tile
+  - 濁點/半濁點 (ﾞ ﾟ) 畫在前一字的上一列 (兩列排版)；inline=True 時改為佔一格
+
+render_batch 將多個字串排成 tile 索引矩陣，一次以陣列索引取出 tile 組成圖形。
+
+使用方法:
+    python kana_font.py <rom_file.nes> [options]
+
+選項:
+    --text TEXT     - 繪製指定的半角/全角片假名字串 (可重複)
+    --inline        - 濁點/半濁點佔一格 (預設畫在上一列)
+    --scale N       - 放大倍率 (預設 2)
+    --output FILE   - 輸出圖片 (預設 kana_names.png；未指定 --text 時繪製全部 ROM 姓名)
+    --font FILE     - 另外輸出字體表
+
+範例:
+    python kana_font.py "Sangokushi (Japan).nes" --font kana_font.png
+    python kana_font.py "Sangokushi (Japan).nes" --text ﾘｭｳﾋﾞ --text ｿｳｿｳ --output test.png
+"""
+
+import os
+import sys
+import unicodedata
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    print("需要安裝 Pillow: pip3 install Pillow")
+    sys.exit(1)
+
+from nes_tiles import TILE_BYTES_2BPP, decode_2bpp
+from sangokushi_extract_v2 import NAME_TABLE_ADDR, NAME_RECORD_SIZE, NAME_DATA_SIZE
+
+# ─── 常數 ────────────────────────────────────────────────────
+
+KANA_FONT_ADDR = 0x22CA0
+KANA_FONT_ORDER = (
+    "アイウエオカキクケコサシスセソタチツテトナニヌネノ"
+    "ハヒフヘホマミムメモヤユヨラリルレロワヲン"
+    "゛゜ー"
+)
+TILE_SIZE = 8
+
+# 小寫 → 大寫 (字體沒有小寫假名)
+SMALL_KANA = str.maketrans("ァィゥェォャュョッ", "アイウエオヤユヨツ")
+# NFKC 後的結合用濁點 → 字體中的濁點
+COMBINING_MARKS = {"゙": "゛", "゚": "゜"}
+MARKS = set(COMBINING_MARKS.values())
+
+# 灰階 (0: 背景, 1-2: 陰影, 3: 文字)
+PALETTE = [
+    (255, 255, 255),
+    (170, 170, 170),
+    (85, 85, 85),
+    (0, 0, 0),
+]
+
+
+def kana_font_index(ch):
+    """單一字元 (半角或全角) → 字體 tile 索引；沒有對應時回傳 -1"""
+    ch = unicodedata.normalize("NFKC", ch)
+    ch = COMBINING_MARKS.get(ch, ch).translate(SMALL_KANA)
+    return KANA_FONT_ORDER.find(ch) if len(ch) == 1 else -1
+
+
+def build_code_map():
+    """半角假名碼 (0x00-0xFF) → 字體 tile 索引 (-1 = 無)"""
+    code_map = np.full(256, -1, dtype=np.int16)
+    for code in range(0xA6, 0xE0):
+        code_map[code] = kana_font_index(bytes([code]).decode("cp932"))
+    return code_map
+
+
+CODE_MAP = build_code_map()
+MARK_CODES = {code for code in range(256) if 0 <= CODE_MAP[code] < len(KANA_FONT_ORDER)
+              and KANA_FONT_ORDER[CODE_MAP[code]] in MARKS}
+
+
+def _build_halfwidth_codes():
+    """全角片假名 / 結合用濁點 / 半角字元 → 半角假名碼"""
+    codes = {}
+    for code in range(0xA6, 0xE0):
+        ch = bytes([code]).decode("cp932")
+        codes.setdefault(unicodedata.normalize("NFKC", ch), code)
+        codes.setdefault(ch, code)
+    return codes
+
+
+_HALFWIDTH_CODES = _build_halfwidth_codes()
+
+
+def encode_text(text):
+    """Unicode 片假名 (全角或半角) → 半角假名碼，無法編碼的字元略過"""
+    # NFD 將 ビ 分解為 ヒ + 結合用濁點，對應半角的 ﾋﾞ
+    return bytes(_HALFWIDTH_CODES[ch] for ch in unicodedata.normalize("NFD", text)
+                 if ch in _HALFWIDTH_CODES)
+
+
+class KanaFont:
+    """假名字體: 一次解碼全部 tile 並快取 (最後一格為空白 tile)"""
+
+    def __init__(self, rom, offset=KANA_FONT_ADDR, count=len(KANA_FONT_ORDER)):
+        tiles = decode_2bpp(rom[offset:offset + count * TILE_BYTES_2BPP], count)
+        self.tiles = np.concatenate([tiles, np.zeros((1, TILE_SIZE, TILE_SIZE), np.uint8)])
+        self.blank = count
+        self.code_map = np.where(CODE_MAP >= 0, CODE_MAP, self.blank).astype(np.int16)
+        self._rgb = {}
+
+    def layout(self, data, inline=False):
+        """
+        ROM 字串 (bytes，遇 0x00 結束) → tile 索引 (2, 欄數)
+
+        第 0 列為濁點/半濁點，第 1 列為本文；inline=True 時只有一列。
+        """
+        end = data.find(0) if isinstance(data, (bytes, bytearray)) else -1
+        codes = bytes(data[:end] if end >= 0 else data)
+        if inline:
+            return self.code_map[np.frombuffer(codes, dtype=np.uint8)][None, :]
+        top, body = [], []
+        for code in codes:
+            if code in MARK_CODES and body:
+                top[-1] = self.code_map[code]
+            else:
+                top.append(self.blank)
+                body.append(self.code_map[code])
+        return np.array([top, body], dtype=np.int16).reshape(2, len(body))
+
+    def render(self, data, inline=False):
+        """ROM 字串 → 像素陣列 (rows × 8, cols × 8)，值 0-3"""
+        return self.render_batch([data], inline=inline)[0]
+
+    def render_batch(self, strings, inline=False, width=None):
+        """
+        多個字串一次繪製
+
+        回傳: np.ndarray (N, rows × 8, width × 8)；width 預設為最長字串的欄數
+        """
+        layouts = [self.layout(s, inline) for s in strings]
+        rows = 1 if inline else 2
+        width = width or max((l.shape[1] for l in layouts), default=0)
+        grid = np.full((len(layouts), rows, width), self.blank, dtype=np.int16)
+        for i, l in enumerate(layouts):
+            grid[i, :, :min(width, l.shape[1])] = l[:, :width]
+        tiles = self.tiles[grid]                          # (N, rows, width, 8, 8)
+        return tiles.transpose(0, 1, 3, 2, 4).reshape(len(layouts), rows * TILE_SIZE,
+                                                     width * TILE_SIZE)
+
+    def to_rgb(self, pixels, palette=None):
+        """像素陣列 → RGB (調色盤陣列快取)"""
+        key = tuple(palette or PALETTE)
+        if key not in self._rgb:
+            self._rgb[key] = np.asarray(key, dtype=np.uint8)
+        return self._rgb[key][pixels]
+
+
+def rom_name_strings(rom, count=257):
+    """姓名表的假名 bytes (每筆 8 bytes；ROM 截斷時只回傳完整的記錄)"""
+    count = min(count, max(0, (len(rom) - NAME_TABLE_ADDR) // NAME_RECORD_SIZE))
+    offsets = (NAME_TABLE_ADDR + i * NAME_RECORD_SIZE for i in range(count))
+    return [rom[offset:offset + NAME_DATA_SIZE] for offset in offsets]
+
+
+def render_sheet(font, strings, columns=8, scale=2, inline=False, margin=2):
+    """字串批次繪製成一張表 (每格一個字串)"""
+    images = font.render_batch(strings, inline=inline)
+    n, h, w = images.shape
+    rows = -(-n // columns) if n else 0
+    cell_h, cell_w = h + margin, w + margin
+    canvas = np.zeros((max(rows, 1) * cell_h + margin, columns * cell_w + margin), dtype=np.uint8)
+    for i in range(n):
+        y = margin + (i // columns) * cell_h
+        x = margin + (i % columns) * cell_w
+        canvas[y:y + h, x:x + w] = images[i]
+    rgb = font.to_rgb(canvas)
+    img = Image.fromarray(rgb, "RGB")
+    return img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+
+
+def render_font_sheet(font, scale=4, columns=16):
+    """字體表 (依 KANA_FONT_ORDER 排列)"""
+    return render_sheet(font, [bytes([code]) for code in _font_codes()],
+                        columns=columns, scale=scale, inline=True)
+
+
+def _font_codes():
+    """每個字體 tile 對應的一個半角假名碼"""
+    codes = {}
+    for code in range(0xA6, 0xE0):
+        codes.setdefault(int(CODE_MAP[code]), code)
+    return [codes[i] for i in range(len(KANA_FONT_ORDER)) if i in codes]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = sys.argv[1]
+    texts = []
+    inline = False
+    scale = 2
+    output_path = "kana_names.png"
+    font_path = None
+
+    i = 2
+    while i < len(sys.argv):
+        if sys.argv[i] == "--text" and i + 1 < len(sys.argv):
+            texts.append(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--scale" and i + 1 < len(sys.argv):
+            scale = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--font" and i + 1 < len(sys.argv):
+            font_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--inline":
+            inline = True
+            i += 1
+        else:
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    font = KanaFont(rom)
+
+    strings = [encode_text(t) for t in texts] if texts else rom_name_strings(rom)
+    render_sheet(font, strings, scale=scale, inline=inline).save(output_path)
+    print(f"已輸出 {len(strings)} 個字串: {output_path}")
+    if font_path:
+        render_font_sheet(font, scale=scale * 2).save(font_path)
+        print(f"已輸出字體表: {font_path}")
+
+
+if __name__ == "__main__":
+    main()
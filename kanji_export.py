@@ -13,17 +13,25 @@ FC 三國志 漢字字型匯出工具
 每個漢字 = 4 個 8×8 tiles = 32 bytes (只有 Plane 0)
 4 tiles 排列: [0][1] 在 offset+0, offset+8
               [2][3] 在 offset+16, offset+24
+
+Page 0/1 全部字形以 kanji_glyphs.decode_kanji_pages 一次解碼為
+(2, 256, 16, 16) 陣列，字型表、個別匯出與樣本都從中取用。
 """
 
 import os
 import sys
 
+import numpy as np
+
 try:
     from PIL import Image
 except ImportError:
     print("需要安裝 Pillow: pip3 install Pillow")
     sys.exit(1)
 
+from kanji_glyphs import decode_kanji_pages
+from nes_tiles import decode_glyphs_1bpp
+
 # ─── 常數 ────────────────────────────────────────────────────
 
 # 漢字 tile 基址 (PRG ROM)
@@ -36,7 +44,6 @@ KANJI_BASE_FILE_PAGE1 = KANJI_BASE_PRG_PAGE1 + 0x10
 
 # 每個漢字的大小 (bytes)
 KANJI_SIZE = 32  # 4 tiles × 8 bytes
-TILE_SIZE = 8    # 只有 Plane 0
 
 # 姓名表位置
 NAME_TABLE_ADDR = 0x3A314
@@ -51,40 +58,6 @@ PALETTE = [
 ]
 
 
-def decode_tile_8x8(tile_data, monochrome=False):
-    """
-    解碼 NES 8×8 tile (16 bytes) 為像素陣列
-
-    NES tile 格式: 2 bitplanes, 每個 8 bytes
-    - Plane 0: bytes 0-7
-    - Plane 1: bytes 8-15
-    - 每個像素 = bit from plane0 + (bit from plane1 << 1)
-
-    Args:
-        tile_data: tile 資料 (8 或 16 bytes)
-        monochrome: True 時只使用 Plane 0 (黑白模式，用於漢字)
-    """
-    if len(tile_data) < 8:
-        return [[0] * 8 for _ in range(8)]
-
-    pixels = []
-    for y in range(8):
-        row = []
-        plane0 = tile_data[y]
-        # 黑白模式: Plane 1 = Plane 0 (遊戲中漢字的實際處理方式)
-        if monochrome or len(tile_data) < 16:
-            plane1 = plane0
-        else:
-            plane1 = tile_data[y + 8]
-        for x in range(7, -1, -1):
-            bit0 = (plane0 >> x) & 1
-            bit1 = (plane1 >> x) & 1
-            pixel = bit0 + (bit1 << 1)
-            row.append(pixel)
-        pixels.append(row)
-    return pixels
-
-
 def decode_kanji_16x16(rom, tile_id, page=0):
     """
     解碼 16×16 漢字 (4 個 8×8 tiles)
@@ -111,46 +84,17 @@ def decode_kanji_16x16(rom, tile_id, page=0):
 
     # 計算 ROM 偏移: offset = base + tile_id × 32
     offset = base + tile_id * KANJI_SIZE
-
-    # 讀取 4 個 tiles (每個 8 bytes，共 32 bytes)
-    # 排列: [0][1] 在 offset+0, offset+8
-    #       [2][3] 在 offset+16, offset+24
-    tiles = []
-    for i in range(4):
-        tile_offset = offset + i * TILE_SIZE
-        if tile_offset + TILE_SIZE > len(rom):
-            tiles.append([[0] * 8 for _ in range(8)])
-        else:
-            tile_data = rom[tile_offset:tile_offset + TILE_SIZE]
-            tiles.append(decode_tile_8x8(tile_data, monochrome=True))
-
-    # 組合成 16×16
-    pixels = []
-    for y in range(8):
-        pixels.append(tiles[0][y] + tiles[1][y])
-    for y in range(8):
-        pixels.append(tiles[2][y] + tiles[3][y])
-
-    return pixels
+    return decode_glyphs_1bpp(rom, (offset,), 1)[0, 0].tolist()
 
 
 def pixels_to_image(pixels, scale=1, palette=None):
-    """將像素陣列轉換為 PIL Image"""
+    """將像素陣列 (list 或 np.ndarray) 轉換為 PIL Image"""
     if palette is None:
         palette = PALETTE
-
-    h = len(pixels)
-    w = len(pixels[0]) if h > 0 else 0
-
-    img = Image.new('RGB', (w * scale, h * scale))
-
-    for y, row in enumerate(pixels):
-        for x, p in enumerate(row):
-            color = palette[p]
-            for dy in range(scale):
-                for dx in range(scale):
-                    img.putpixel((x * scale + dx, y * scale + dy), color)
-    return img
+    rgb = np.asarray(palette, dtype=np.uint8)[np.asarray(pixels, dtype=np.uint8)]
+    if scale > 1:
+        rgb = rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+    return Image.fromarray(rgb, 'RGB')
 
 
 def load_name_table(rom):
@@ -188,12 +132,15 @@ def get_unique_tiles(name_table_tiles):
     return sorted(unique)
 
 
-def export_kanji_atlas(rom, output_path, scale=2):
+def export_kanji_atlas(rom, output_path, scale=2, page=0, glyphs=None):
     """
     匯出漢字字型表 (atlas)
 
     排列: 16 列 × 16 行，tile_id 0x00-0xFF
+    glyphs: decode_kanji_pages 的結果 (None 時自動解碼)
     """
+    if glyphs is None:
+        glyphs = decode_kanji_pages(rom)
     COLS = 16
     ROWS = 16
     CHAR_SIZE = 16 * scale
@@ -202,27 +149,25 @@ def export_kanji_atlas(rom, output_path, scale=2):
     img_width = COLS * (CHAR_SIZE + MARGIN) + MARGIN
     img_height = ROWS * (CHAR_SIZE + MARGIN) + MARGIN
 
-    atlas = Image.new('RGB', (img_width, img_height), (240, 240, 240))
-
-    for tile_id in range(256):
-        row = tile_id // COLS
-        col = tile_id % COLS
-
-        pixels = decode_kanji_16x16(rom, tile_id, page=0)
-        char_img = pixels_to_image(pixels, scale=scale)
-
-        x = MARGIN + col * (CHAR_SIZE + MARGIN)
-        y = MARGIN + row * (CHAR_SIZE + MARGIN)
-        atlas.paste(char_img, (x, y))
+    # 一次轉成 RGB 後貼入 (含 MARGIN 的) 畫布
+    rgb = np.asarray(PALETTE, dtype=np.uint8)[glyphs[page]]
+    rgb = rgb.repeat(scale, axis=1).repeat(scale, axis=2)
+    canvas = np.full((img_height, img_width, 3), 240, dtype=np.uint8)
+    cells = canvas[MARGIN:, MARGIN:].reshape(
+        ROWS, CHAR_SIZE + MARGIN, COLS, CHAR_SIZE + MARGIN, 3)[:, :CHAR_SIZE, :, :CHAR_SIZE]
+    cells[...] = rgb.reshape(ROWS, COLS, CHAR_SIZE, CHAR_SIZE, 3).transpose(0, 2, 1, 3, 4)
 
+    atlas = Image.fromarray(canvas, 'RGB')
     atlas.save(output_path)
     print(f"已儲存: {output_path}")
     return atlas
 
 
-def export_individual_kanji(rom, output_dir, scale=4):
+def export_individual_kanji(rom, output_dir, scale=4, glyphs=None):
     """匯出所有使用到的漢字為個別圖片"""
     os.makedirs(output_dir, exist_ok=True)
+    if glyphs is None:
+        glyphs = decode_kanji_pages(rom)
 
     # 載入姓名表取得使用的 tiles
     name_tiles = load_name_table(rom)
@@ -234,8 +179,7 @@ def export_individual_kanji(rom, output_dir, scale=4):
     page1_count = 0
 
     for tile_id, page in unique_tiles:
-        pixels = decode_kanji_16x16(rom, tile_id, page=page)
-        char_img = pixels_to_image(pixels, scale=scale)
+        char_img = pixels_to_image(glyphs[1 if page else 0, tile_id], scale=scale)
 
         filename = f"kanji_p{page}_{tile_id:02X}.png"
         filepath = os.path.join(output_dir, filename)
@@ -250,9 +194,11 @@ def export_individual_kanji(rom, output_dir, scale=4):
     print(f"儲存於: {output_dir}/")
 
 
-def export_sample_kanji(rom, output_dir=".", scale=8):
+def export_sample_kanji(rom, output_dir=".", scale=8, glyphs=None):
     """匯出幾個已知漢字作為驗證"""
     os.makedirs(output_dir, exist_ok=True)
+    if glyphs is None:
+        glyphs = decode_kanji_pages(rom)
 
     # 已知的 tile_id 對照
     known = [
@@ -269,8 +215,7 @@ def export_sample_kanji(rom, output_dir=".", scale=8):
 
     print("匯出已知漢字樣本:")
     for tile_id, name in known:
-        pixels = decode_kanji_16x16(rom, tile_id, page=0)
-        char_img = pixels_to_image(pixels, scale=scale)
+        char_img = pixels_to_image(glyphs[0, tile_id], scale=scale)
 
         filename = f"kanji_{tile_id:02X}_{name}.png"
         filepath = os.path.join(output_dir, filename)
@@ -301,24 +246,28 @@ def main():
     output_dir = "kanji_output"
     os.makedirs(output_dir, exist_ok=True)
 
+    # Page 0/1 一次解碼
+    glyphs = decode_kanji_pages(rom)
+
     # 1. 匯出已知漢字樣本 (驗證用)
     print("=" * 50)
     print("步驟 1: 匯出已知漢字樣本")
-    export_sample_kanji(rom, output_dir, scale=8)
+    export_sample_kanji(rom, output_dir, scale=8, glyphs=glyphs)
     print()
 
     # 2. 匯出完整字型表
     print("=" * 50)
-    print("步驟 2: 匯出漢字字型表 (Page 0)")
-    atlas_path = os.path.join(output_dir, "kanji_atlas_page0.png")
-    export_kanji_atlas(rom, atlas_path, scale=2)
+    print("步驟 2: 匯出漢字字型表 (Page 0 / Page 1)")
+    for page in range(len(glyphs)):
+        atlas_path = os.path.join(output_dir, f"kanji_atlas_page{page}.png")
+        export_kanji_atlas(rom, atlas_path, scale=2, page=page, glyphs=glyphs)
     print()
 
     # 3. 匯出所有個別漢字
     print("=" * 50)
     print("步驟 3: 匯出所有使用的漢字")
     individual_dir = os.path.join(output_dir, "individual")
-    export_individual_kanji(rom, individual_dir, scale=4)
+    export_individual_kanji(rom, individual_dir, scale=4, glyphs=glyphs)
     print()
 
     print("=" * 50)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+漢字字形 hash 與 page 感知的 tile 對照
+
+KANJI_TILE_MAP 只以 tile ID 為 key，忽略姓名表 +9/+11/+13 的 page byte，
+且同一字形在不同 ID 重複出現 (0x1E/0x21 桓、0x41/0x42 謙、0x70/0x73 紹、
+0x18/0xAC 陶)。這裡改以字形本身為準:
+
+  1. decode_kanji_pages: 一次解碼 Page 0/1 全部 16×16 字形 → (2, 256, 16, 16)
+  2. GlyphClasses: 每個字形取 hash，相同圖形歸為同一字形類別 (glyph class)
+  3. resolve_tile_pages: KANJI_TILE_MAP 每個條目的 page 由姓名表 +8..+13 實際
+     引用的 (page, tile) 決定；兩頁都引用時比較各頁引用者的 [EXT] 姓名是否含該字，
+     仍無法判斷 (或未被引用) 時不標記，列入報表的 page 衝突
+  4. label_lookup: 以 (page, tile) 為 key 的對照表只標記條目所在那一頁的字形類別，
+     展開為 (2, 256) 查表陣列；另一頁的同 ID 字形只有在圖形相同 (同一類別) 時
+     才得到標籤 → 姓名解碼為 lookup[pages, tiles] 一次陣列查詢
+
+報表 (KANJI_DIFF.md) 由 main 自動產生:
+  重複字形、page 衝突、標籤衝突、姓名表引用但未標記的字形、ROM 漢字與 [EXT] 姓名的
+  差異，以及依 EXT 姓名投票的建議對照。
+
+使用方法:
+    python kanji_glyphs.py <rom_file.nes> [options]
+
+選項:
+    --ext-csv FILE    - 外部 CSV (預設 EXT_CSV_PATH，不存在時使用 EXT_CHAR_INFO)
+    --output FILE     - 報表輸出 (預設 KANJI_DIFF.md)
+"""
+
+import sys
+import os
+import hashlib
+from collections import Counter
+
+import numpy as np
+
+from nes_tiles import decode_glyphs_1bpp
+
+# ─── 常數 ────────────────────────────────────────────────────
+
+KANJI_PAGE_BASES = (0x20014, 0x22014)   # Page 0 / Page 1 (檔案偏移)
+PAGE_COUNT = 2
+TILES_PER_PAGE = 256
+
+NAME_TABLE_ADDR = 0x3A314
+NAME_RECORD_SIZE = 15
+NAME_TILE_COLUMNS = [8, 10, 12]
+NAME_PAGE_COLUMNS = [9, 11, 13]
+
+
+def decode_kanji_pages(rom):
+    """
+    解碼 Page 0/1 的全部字形 (nes_tiles.decode_glyphs_1bpp 一次 unpack)
+
+    回傳: np.ndarray, shape (2, 256, 16, 16), dtype uint8, 值 0 或 3
+          (超出 ROM 的部分為 0)
+    """
+    return decode_glyphs_1bpp(rom, KANJI_PAGE_BASES, TILES_PER_PAGE)
+
+
+def glyph_hash(glyph):
+    """16×16 字形 → 8-byte hash (以 1bpp 壓縮後計算)"""
+    packed = np.packbits(np.asarray(glyph) != 0)
+    return hashlib.blake2b(packed.tobytes(), digest_size=8).digest()
+
+
+def name_kanji_refs(rom, count=257):
+    """姓名表的漢字 tile 與 page → (tiles, pages)，shape 皆為 (N, 3)"""
+    count = min(count, max(0, (len(rom) - NAME_TABLE_ADDR) // NAME_RECORD_SIZE))
+    if count == 0:
+        empty = np.zeros((0, len(NAME_TILE_COLUMNS)), dtype=np.uint8)
+        return empty, empty.copy()
+    names = np.frombuffer(rom, dtype=np.uint8, count=count * NAME_RECORD_SIZE,
+                          offset=NAME_TABLE_ADDR).reshape(count, NAME_RECORD_SIZE)
+    return names[:, NAME_TILE_COLUMNS], (names[:, NAME_PAGE_COLUMNS] != 0).astype(np.uint8)
+
+
+class GlyphClasses:
+    """字形類別: 圖形完全相同的 (page, tile) 共用一個類別"""
+
+    def __init__(self, glyphs):
+        self.glyphs = glyphs
+        hashes = [glyph_hash(g) for g in glyphs.reshape(-1, 16, 16)]
+        keys, inverse = np.unique(np.array(hashes, dtype="S8"), return_inverse=True)
+        self.class_map = inverse.reshape(PAGE_COUNT, TILES_PER_PAGE).astype(np.int32)
+        self.hashes = keys
+        self.blank = ~glyphs.reshape(PAGE_COUNT, TILES_PER_PAGE, -1).any(axis=2)
+
+    @classmethod
+    def from_rom(cls, rom):
+        return cls(decode_kanji_pages(rom))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def members(self, glyph_class):
+        """類別 → [(page, tile), ...]"""
+        pages, tiles = np.nonzero(self.class_map == glyph_class)
+        return list(zip(pages.tolist(), tiles.tolist()))
+
+    def duplicates(self, refs=None):
+        """
+        圖形相同但 (page, tile) 不同的類別: {class: [(page, tile), ...]}
+
+        refs: (tiles, pages) 時只列出姓名表實際引用的位置
+        """
+        mask = ~self.blank
+        if refs is not None:
+            used = np.zeros_like(mask)
+            tiles, pages = refs
+            used[pages[tiles != 0], tiles[tiles != 0]] = True
+            mask &= used
+        counts = np.bincount(self.class_map[mask], minlength=len(self))
+        return {int(c): [m for m in self.members(c) if mask[m]]
+                for c in np.flatnonzero(counts > 1)}
+
+    def label_lookup(self, page_tile_map):
+        """
+        以 page_tile_map ((page, tile) → 漢字) 決定每個類別的漢字
+
+        每個條目只為它所在那一頁的字形類別投票；空白字形與 tile 0 不投票。
+
+        回傳: (lookup, conflicts)
+            lookup: (2, 256) object 陣列，lookup[page, tile] → 漢字 ("" = 未知)
+            conflicts: {class: Counter(漢字 → 票數)}，同一類別得到不同漢字時
+        """
+        votes = {}
+        for (page, tile), ch in page_tile_map.items():
+            if tile == 0 or self.blank[page, tile]:
+                continue
+            votes.setdefault(int(self.class_map[page, tile]), Counter())[ch] += 1
+
+        labels = np.full(len(self), "", dtype=object)
+        conflicts = {}
+        for glyph_class, counter in votes.items():
+            labels[glyph_class] = min(counter, key=lambda ch: (-counter[ch], ch))
+            if len(counter) > 1:
+                conflicts[glyph_class] = counter
+        lookup = labels[self.class_map]
+        lookup[:, 0] = ""   # tile 0 = 無漢字
+        return lookup, conflicts
+
+    def unlabelled(self, refs, lookup):
+        """
+        姓名表引用但沒有標籤的字形類別
+
+        回傳: {class: [(page, tile), ...]} (只列出被引用的位置)
+        """
+        tiles, pages = refs
+        result = {}
+        for tile, page in sorted(set(zip(tiles.ravel().tolist(), pages.ravel().tolist()))):
+            if tile == 0 or lookup[page, tile]:
+                continue
+            result.setdefault(int(self.class_map[page, tile]), []).append((page, tile))
+        return result
+
+
+def resolve_tile_pages(tile_map, refs, ext_names):
+    """
+    tile ID → 漢字 對照表 (不含 page) 依姓名表引用決定每個條目的 page
+
+    - 只在一頁被引用: 該頁
+    - 兩頁都被引用: 各頁引用該 ID 的武將中，[EXT] 姓名含該字者較多的一頁
+    - 其餘 (票數相同、沒有 EXT 姓名、未被引用): 不標記，列為 page 衝突
+
+    參數:
+        tile_map: {tile: 漢字} (KANJI_TILE_MAP)
+        refs: name_kanji_refs() 的 (tiles, pages)
+        ext_names: {武將序號: [EXT] 姓名}
+
+    回傳: (page_tile_map, page_conflicts)
+        page_tile_map: {(page, tile): 漢字}
+        page_conflicts: {tile: (漢字, refs_per_page, ext_hits_per_page)}，
+                        後兩者為長度 2 的 list (各頁的引用次數 / EXT 姓名含該字的次數)
+    """
+    tiles, pages = refs
+    ref_counts = np.zeros((PAGE_COUNT, TILES_PER_PAGE), dtype=np.int64)
+    np.add.at(ref_counts, (pages.ravel(), tiles.ravel()), 1)
+
+    page_tile_map = {}
+    page_conflicts = {}
+    for tile, ch in tile_map.items():
+        counts = ref_counts[:, tile].tolist()
+        hits = [0] * PAGE_COUNT
+        if all(counts):
+            for index, ext_name in ext_names.items():
+                if index < len(tiles) and ext_name and ch in ext_name:
+                    for page in set(pages[index][tiles[index] == tile].tolist()):
+                        hits[page] += 1
+            candidates = hits
+        else:
+            candidates = counts
+        best = int(np.argmax(candidates))
+        if candidates[best] and candidates.count(candidates[best]) == 1:
+            page_tile_map[(best, tile)] = ch
+        else:
+            page_conflicts[tile] = (ch, counts, hits)
+    return page_tile_map, page_conflicts
+
+
+def decode_name_kanji(refs, lookup):
+    """(tiles, pages) → 各姓名的漢字字串 (lookup 一次查表)"""
+    tiles, pages = refs
+    chars = lookup[pages, tiles]
+    return ["".join(row) for row in chars.tolist()]
+
+
+# ─── 差異報表 ────────────────────────────────────────────────
+
+
+def diff_kind(rom_kanji, ext_name):
+    """ROM 漢字與 EXT 姓名的差異描述；相同時回傳 None"""
+    if rom_kanji == ext_name:
+        return None
+    if len(rom_kanji) < len(ext_name):
+        return f"缺少 {len(ext_name) - len(rom_kanji)} 字"
+    if len(rom_kanji) > len(ext_name):
+        return f"多出 {len(rom_kanji) - len(ext_name)} 字"
+    return ", ".join(f"{a}→{b}" for a, b in zip(rom_kanji, ext_name) if a != b)
+
+
+def ext_votes(refs, decoded, ext_names):
+    """
+    字數相同的武將，以 EXT 姓名的對應字為每個 (page, tile) 投票
+
+    回傳: {(page, tile): Counter(漢字 → 票數)}
+    """
+    tiles, pages = refs
+    votes = {}
+    for index, ext_name in ext_names.items():
+        row_tiles = [(int(p), int(t)) for t, p in zip(tiles[index], pages[index]) if t != 0]
+        if not ext_name or len(row_tiles) != len(ext_name) or len(decoded[index]) != len(ext_name):
+            continue
+        for key, ch in zip(row_tiles, ext_name):
+            votes.setdefault(key, Counter())[ch] += 1
+    return votes
+
+
+def format_report(classes, refs, lookup, conflicts, kana, decoded, ext_names,
+                  page_conflicts=None):
+    tiles, pages = refs
+    used = {(int(p), int(t)) for t, p in zip(tiles.ravel(), pages.ravel()) if t}
+    diffs = [(i, diff_kind(decoded[i], ext_names[i])) for i in sorted(ext_names)
+             if ext_names[i] and diff_kind(decoded[i], ext_names[i])]
+    dups = classes.duplicates(refs)
+    missing = classes.unlabelled(refs, lookup)
+    votes = ext_votes(refs, decoded, ext_names)
+    suggestions = sorted((key, counter) for key, counter in votes.items()
+                         if counter.most_common(1)[0][0] != lookup[key])
+    page_conflicts = page_conflicts or {}
+
+    lines = [
+        "# ROM_Kanji 與 [EXT]Name 差異對照表",
+        "",
+        "> 由 `python kanji_glyphs.py` 自動產生，請勿手動編輯。",
+        "",
+        f"- 字形: Page 0/1 共 {PAGE_COUNT * TILES_PER_PAGE} 個，"
+        f"相異字形類別 {len(classes)} 個",
+        f"- 姓名表引用的 (page, tile): {len(used)} 個",
+        f"- 重複字形 (不同 ID 相同圖形): {len(dups)} 組",
+        f"- page 衝突 (KANJI_TILE_MAP 條目無法決定 page，未標記): {len(page_conflicts)} 個",
+        f"- 標籤衝突: {len(conflicts)} 組",
+        f"- 未標記字形 (姓名表引用但對照表沒有該頁條目): {len(missing)} 個",
+        f"- 差異: **{len(diffs)}** 筆",
+        "",
+        "## 重複字形",
+        "",
+        "| 類別 | (Page, Tile) | 漢字 |",
+        "|------|--------------|------|",
+    ]
+    for glyph_class, members in sorted(dups.items()):
+        cells = ", ".join(f"({p}, 0x{t:02X})" for p, t in members)
+        lines.append(f"| {glyph_class} | {cells} | {lookup[members[0]]} |")
+
+    lines += ["", "## Page 衝突", "",
+              "KANJI_TILE_MAP 條目依姓名表引用決定 page；兩頁都引用時以 [EXT] 姓名含該字的"
+              "武將數判斷。無法判斷者不標記。", "",
+              "| Tile | 漢字 | Page 0 引用 | Page 1 引用 | Page 0 EXT 相符 | Page 1 EXT 相符 | 原因 |",
+              "|------|------|-------------|-------------|-----------------|-----------------|------|"]
+    for tile, (ch, counts, hits) in sorted(page_conflicts.items()):
+        reason = "兩頁 EXT 相符數相同" if all(counts) else "姓名表未引用"
+        lines.append(f"| 0x{tile:02X} | {ch} | {counts[0]} | {counts[1]} | "
+                     f"{hits[0]} | {hits[1]} | {reason} |")
+
+    lines += ["", "## 標籤衝突", "",
+              "同一字形類別在 (page, tile) 對照表中對應到不同漢字 (採用票數最多者)。", "",
+              "| 類別 | (Page, Tile) | 票數 |", "|------|--------------|------|"]
+    for glyph_class, counter in sorted(conflicts.items()):
+        cells = ", ".join(f"({p}, 0x{t:02X})" for p, t in classes.members(glyph_class))
+        lines.append(f"| {glyph_class} | {cells} | "
+                     + ", ".join(f"{ch}×{n}" for ch, n in counter.most_common()) + " |")
+
+    lines += ["", "## 未標記字形", "",
+              "姓名表引用、但 (page, tile) 對照表沒有描述該頁且圖形不同於任何已標記字形者。", "",
+              "| 類別 | (Page, Tile) | 引用次數 |", "|------|--------------|----------|"]
+    ref_counts = Counter((int(p), int(t)) for t, p in zip(tiles.ravel(), pages.ravel()) if t)
+    for glyph_class, members in sorted(missing.items()):
+        cells = ", ".join(f"({p}, 0x{t:02X})" for p, t in members)
+        lines.append(f"| {glyph_class} | {cells} | {sum(ref_counts[m] for m in members)} |")
+
+    lines += ["", "## 完整差異列表", "",
+              "| Index | ROM_Kana | ROM_Kanji | [EXT]Name | 差異類型 |",
+              "|-------|----------|-----------|-----------|----------|"]
+    for i, kind in diffs:
+        lines.append(f"| {i} | {kana[i]} | {decoded[i]} | {ext_names[i]} | {kind} |")
+
+    lines += ["", "## 建議對照", "",
+              "依 [EXT] 姓名投票 (只計入字數相同的武將)，與目前對照不同者。", "",
+              "| Page | Tile | 目前 | 建議 | 票數 |", "|------|------|------|------|------|"]
+    for (page, tile), counter in suggestions:
+        best, n = counter.most_common(1)[0]
+        lines.append(f"| {page} | 0x{tile:02X} | {lookup[page, tile] or '-'} | {best} | "
+                     f"{n}/{sum(counter.values())} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    from sangokushi_extract_v2 import (
+        EXT_CSV_PATH, extract_all, kanji_page_tile_map, load_rom_names)
+
+    rom_path = sys.argv[1]
+    ext_csv = EXT_CSV_PATH
+    output_path = "KANJI_DIFF.md"
+
+    i = 2
+    while i < len(sys.argv):
+        if sys.argv[i] == "--ext-csv" and i + 1 < len(sys.argv):
+            ext_csv = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        else:
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    characters = extract_all(rom_path, ext_csv if os.path.exists(ext_csv) else None)
+    ext_names = {c.index: c.ext_name for c in characters}
+    classes = GlyphClasses.from_rom(rom)
+    refs = name_kanji_refs(rom)
+    page_tile_map, page_conflicts = kanji_page_tile_map(rom, ext_names)
+    lookup, conflicts = classes.label_lookup(page_tile_map)
+    names = load_rom_names(rom)
+    decoded = decode_name_kanji(refs, lookup)
+
+    report = format_report(classes, refs, lookup, conflicts,
+                           [n[0] for n in names], decoded, ext_names, page_conflicts)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(report)
+    print(f"字形類別: {len(classes)}，重複: {len(classes.duplicates(refs))} 組，"
+          f"page 衝突: {len(page_conflicts)} 個，標籤衝突: {len(conflicts)} 組，"
+          f"未標記: {len(classes.unlabelled(refs, lookup))} 個")
+    print(f"已輸出: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
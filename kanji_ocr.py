@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+漢字字形 OCR (對照本機字型)
+
+以本機提供的字型 (TTF/OTF/TTC 或 BDF 點陣字型) 將候選漢字點陣化為 16×16，
+與 ROM 的 Page 0/1 字形一次做批次相關係數比對，列出每個 tile 的候選排名，
+作為建立 KANJI_TILE_MAP 的依據 (KANJI_TILES_ANALYSIS.md 後續工作 6)。
+
+比對方式:
+  1. 候選字與 ROM 字形都攤平成 256 維向量，(可選) 3×3 模糊以容忍筆畫粗細差異
+  2. 候選字另產生 ±SHIFT_RADIUS 像素的平移版本
+  3. 向量減去平均並正規化 → 一次矩陣乘法得到所有 (ROM 字形, 候選) 的相關係數
+  4. 每個候選取各平移版本的最大值，再取前 N 名
+
+字型中不存在的字通常會畫成相同的「豆腐」方框，重複出現超過 TOFU_LIMIT 次的
+點陣圖會被排除。
+
+使用方法:
+    python kanji_ocr.py <rom_file.nes> <字型檔> [options]
+
+選項:
+    --chars TEXT|FILE  - 候選字 (字串或文字檔；預設: BDF 全部字元 / TTF 的 CJK 統一漢字)
+    --size N           - TTF 字型大小 (預設 16)
+    --top N            - 每個 tile 輸出的候選數 (預設 5)
+    --all              - 比對全部非空白字形 (預設只比對姓名表引用的 tile)
+    --no-blur          - 不做 3×3 模糊
+    --workers N        - TTF 點陣化的 process 數 (預設 CPU 核心數)
+    --output FILE      - 輸出 CSV (預設 kanji_ocr.csv)
+
+範例:
+    python kanji_ocr.py "Sangokushi (Japan).nes" jiskan16.bdf --top 3
+    python kanji_ocr.py "Sangokushi (Japan).nes" NotoSansCJK-Regular.ttc --chars names.txt
+"""
+
+import sys
+import os
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    print("需要安裝 Pillow: pip3 install Pillow")
+    sys.exit(1)
+
+from kanji_glyphs import GlyphClasses, decode_kanji_pages, name_kanji_refs
+
+GLYPH_SIZE = 16
+CJK_RANGE = (0x4E00, 0x9FFF)   # CJK 統一漢字
+SHIFT_RADIUS = 1
+TOFU_LIMIT = 8
+CHUNK_SIZE = 4096              # 每次矩陣乘法的候選向量數
+DEFAULT_TOP = 5
+
+# BDF CHARSET_REGISTRY → 雙位元組編碼 (ENCODING 需加上 0x8080 轉為 EUC)
+BDF_EUC_CODECS = {
+    "JISX0208": "euc_jp",
+    "GB2312": "gb2312",
+    "KSC5601": "euc_kr",
+}
+
+
+# ─── 字型點陣化 ──────────────────────────────────────────────
+
+
+def fit_bitmap(bitmap, size=GLYPH_SIZE):
+    """裁掉空白後置中於 size×size；超出時等比例縮小"""
+    bitmap = np.asarray(bitmap, dtype=bool)
+    out = np.zeros((size, size), dtype=bool)
+    rows = np.flatnonzero(bitmap.any(axis=1))
+    cols = np.flatnonzero(bitmap.any(axis=0))
+    if len(rows) == 0:
+        return out
+    crop = bitmap[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    h, w = crop.shape
+    if h > size or w > size:
+        scale = size / max(h, w)
+        img = Image.fromarray(crop.astype(np.uint8) * 255).resize(
+            (max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+        crop = np.asarray(img) >= 128
+        h, w = crop.shape
+    y, x = (size - h) // 2, (size - w) // 2
+    out[y:y + h, x:x + w] = crop
+    return out
+
+
+def parse_chars(arg):
+    """--chars: 文字檔或字串 → 去除重複與空白的字元列表"""
+    if arg is None:
+        return None
+    if os.path.exists(arg):
+        with open(arg, "r", encoding="utf-8") as f:
+            arg = f.read()
+    return list(dict.fromkeys(ch for ch in arg if not ch.isspace()))
+
+
+def _bdf_decoder(registry):
+    for prefix, codec in BDF_EUC_CODECS.items():
+        if registry.upper().startswith(prefix):
+            def decode(code, codec=codec):
+                return bytes([0x80 | (code >> 8), 0x80 | (code & 0xFF)]).decode(codec)
+            return decode
+    return chr
+
+
+def load_bdf(path, chars=None):
+    """
+    讀取 BDF 點陣字型
+
+    回傳: (字元列表, (N, 16, 16) bool 陣列)
+    """
+    wanted = set(chars) if chars else None
+    registry = "ISO10646"
+    font_box = (GLYPH_SIZE, GLYPH_SIZE, 0, 0)
+    names, bitmaps = [], []
+    char, bbx, rows = None, None, None
+
+    with open(path, "r", encoding="latin-1") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            key = parts[0]
+            if rows is not None:
+                if key == "ENDCHAR":
+                    if char is not None and (wanted is None or char in wanted):
+                        names.append(char)
+                        bitmaps.append(_place_bdf_glyph(rows, bbx, font_box))
+                    char, bbx, rows = None, None, None
+                else:
+                    rows.append(int(key, 16))
+            elif key == "CHARSET_REGISTRY":
+                registry = parts[1].strip('"')
+            elif key == "FONTBOUNDINGBOX":
+                font_box = tuple(int(v) for v in parts[1:5])
+            elif key == "ENCODING":
+                code = int(parts[1])
+                try:
+                    char = _bdf_decoder(registry)(code) if code >= 0 else None
+                except (UnicodeDecodeError, ValueError):
+                    char = None
+            elif key == "BBX":
+                bbx = tuple(int(v) for v in parts[1:5])
+            elif key == "BITMAP":
+                rows = []
+    return names, np.array(bitmaps, dtype=bool).reshape(-1, GLYPH_SIZE, GLYPH_SIZE)
+
+
+def _place_bdf_glyph(rows, bbx, font_box):
+    """BDF 字元 (BBX 相對於字型基線) → 字型外框大小的點陣 → fit_bitmap"""
+    fw, fh, fx, fy = font_box
+    w, h, x, y = bbx or font_box
+    width_bytes = (w + 7) // 8
+    bits = np.unpackbits(np.array([[(r >> (8 * (width_bytes - 1 - i))) & 0xFF
+                                    for i in range(width_bytes)] for r in rows[:h]],
+                                  dtype=np.uint8).reshape(len(rows[:h]), width_bytes),
+                         axis=1)[:, :w].astype(bool)
+    cell = np.zeros((max(fh, h), max(fw, w)), dtype=bool)
+    top = max(0, (fh + fy) - (h + y))
+    left = max(0, x - fx)
+    bits = bits[:cell.shape[0] - top, :cell.shape[1] - left]
+    cell[top:top + bits.shape[0], left:left + bits.shape[1]] = bits
+    if cell.shape == (GLYPH_SIZE, GLYPH_SIZE):
+        return cell
+    return fit_bitmap(cell)
+
+
+def _render_chunk(args):
+    path, chars, size = args
+    font = ImageFont.truetype(path, size)
+    canvas = Image.new("L", (size * 2, size * 2))
+    draw = ImageDraw.Draw(canvas)
+    bitmaps = []
+    for ch in chars:
+        draw.rectangle((0, 0, size * 2, size * 2), fill=0)
+        draw.text((size // 2, size // 2), ch, font=font, fill=255)
+        bitmaps.append(fit_bitmap(np.asarray(canvas) >= 128))
+    return np.array(bitmaps, dtype=bool).reshape(-1, GLYPH_SIZE, GLYPH_SIZE)
+
+
+def render_truetype(path, chars, size=GLYPH_SIZE, workers=None):
+    """
+    以 TTF/OTF/TTC 字型點陣化候選字 (依 CPU 核心數分段平行處理)
+
+    回傳: (字元列表, (N, 16, 16) bool 陣列)
+    """
+    chars = list(chars)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chars) < CHUNK_SIZE:
+        return chars, _render_chunk((path, chars, size))
+    step = -(-len(chars) // workers)
+    jobs = [(path, chars[i:i + step], size) for i in range(0, len(chars), step)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return chars, np.concatenate(list(pool.map(_render_chunk, jobs)))
+
+
+def load_font_bitmaps(path, chars=None, size=GLYPH_SIZE, workers=None):
+    """依副檔名選擇 BDF 或 TrueType；TrueType 未指定候選字時使用 CJK 統一漢字"""
+    if path.lower().endswith(".bdf"):
+        names, bitmaps = load_bdf(path, chars)
+    else:
+        if chars is None:
+            chars = [chr(c) for c in range(CJK_RANGE[0], CJK_RANGE[1] + 1)]
+        names, bitmaps = render_truetype(path, chars, size, workers)
+    return drop_tofu(names, bitmaps)
+
+
+def drop_tofu(names, bitmaps):
+    """排除空白點陣與重複超過 TOFU_LIMIT 次的點陣 (缺字方框)"""
+    if len(names) == 0:
+        return names, bitmaps
+    packed = np.packbits(bitmaps.reshape(len(bitmaps), -1), axis=1)
+    _, inverse, counts = np.unique(packed, axis=0, return_inverse=True, return_counts=True)
+    keep = (counts[inverse.ravel()] <= TOFU_LIMIT) & bitmaps.reshape(len(bitmaps), -1).any(axis=1)
+    return [n for n, k in zip(names, keep) if k], bitmaps[keep]
+
+
+# ─── 批次相關係數 ────────────────────────────────────────────
+
+
+def blur(bitmaps):
+    """3×3 box blur，(N, 16, 16) → float32"""
+    x = np.pad(np.asarray(bitmaps, dtype=np.float32), ((0, 0), (1, 1), (1, 1)))
+    return sum(x[:, dy:dy + GLYPH_SIZE, dx:dx + GLYPH_SIZE]
+               for dy in range(3) for dx in range(3)) / 9.0
+
+
+def shifted(bitmaps, radius=SHIFT_RADIUS):
+    """平移版本 (不循環，補 0)，(N, 16, 16) → (N, S, 16, 16)"""
+    pad = np.pad(bitmaps, ((0, 0), (radius, radius), (radius, radius)))
+    offsets = range(2 * radius + 1)
+    return np.stack([pad[:, dy:dy + GLYPH_SIZE, dx:dx + GLYPH_SIZE]
+                     for dy in offsets for dx in offsets], axis=1)
+
+
+def normalize(vectors):
+    """減去平均並正規化為單位向量；空白向量維持 0"""
+    v = vectors.reshape(len(vectors), -1).astype(np.float32)
+    v -= v.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(v, axis=1, keepdims=True)
+    return np.divide(v, norm, out=np.zeros_like(v), where=norm > 0)
+
+
+def correlate(rom_glyphs, candidates, radius=SHIFT_RADIUS, use_blur=True, top=DEFAULT_TOP):
+    """
+    ROM 字形 × 候選字 的相關係數排名
+
+    參數:
+        rom_glyphs: (M, 16, 16)
+        candidates: (N, 16, 16)
+
+    回傳: (indices, scores)，shape (M, top)，依分數遞減
+    """
+    prep = blur if use_blur else (lambda b: np.asarray(b, dtype=np.float32))
+    rom_vec = normalize(prep(rom_glyphs))
+    shift_count = (2 * radius + 1) ** 2
+    best = np.full((len(rom_glyphs), len(candidates)), -1.0, dtype=np.float32)
+
+    for start in range(0, len(candidates), CHUNK_SIZE):
+        chunk = shifted(np.asarray(candidates[start:start + CHUNK_SIZE]), radius)
+        n = len(chunk)
+        cand_vec = normalize(prep(chunk.reshape(n * shift_count, GLYPH_SIZE, GLYPH_SIZE)))
+        scores = rom_vec @ cand_vec.T                      # (M, n × S)
+        best[:, start:start + n] = scores.reshape(len(rom_glyphs), n, shift_count).max(axis=2)
+
+    top = min(top, len(candidates))
+    order = np.argpartition(-best, top - 1, axis=1)[:, :top] if top else np.zeros((len(best), 0), int)
+    part = np.take_along_axis(best, order, axis=1)
+    rank = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(order, rank, axis=1), np.take_along_axis(part, rank, axis=1)
+
+
+def target_tiles(rom, all_tiles=False):
+    """比對對象 [(page, tile), ...]: 姓名表引用的 tile，或全部非空白字形"""
+    glyphs = decode_kanji_pages(rom)
+    if all_tiles:
+        blank = GlyphClasses(glyphs).blank
+        pages, tiles = np.nonzero(~blank)
+        keys = list(zip(pages.tolist(), tiles.tolist()))
+    else:
+        tiles, pages = name_kanji_refs(rom)
+        keys = sorted({(int(p), int(t)) for t, p in zip(tiles.ravel(), pages.ravel()) if t})
+    return keys, glyphs
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path, font_path = sys.argv[1], sys.argv[2]
+    chars = None
+    size = GLYPH_SIZE
+    top = DEFAULT_TOP
+    all_tiles = False
+    use_blur = True
+    output_path = "kanji_ocr.csv"
+    workers = None
+
+    i = 3
+    while i < len(sys.argv):
+        if sys.argv[i] == "--chars" and i + 1 < len(sys.argv):
+            chars = parse_chars(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--size" and i + 1 < len(sys.argv):
+            size = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--top" and i + 1 < len(sys.argv):
+            top = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--workers" and i + 1 < len(sys.argv):
+            workers = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--all":
+            all_tiles = True
+            i += 1
+        elif sys.argv[i] == "--no-blur":
+            use_blur = False
+            i += 1
+        else:
+            i += 1
+
+    for path in (rom_path, font_path):
+        if not os.path.exists(path):
+            print(f"錯誤: 找不到檔案 '{path}'")
+            sys.exit(1)
+
+    from sangokushi_extract_v2 import kanji_lookup
+
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    keys, glyphs = target_tiles(rom, all_tiles)
+    names, bitmaps = load_font_bitmaps(font_path, chars, size, workers)
+    if not names:
+        print("錯誤: 字型中沒有可用的候選字")
+        sys.exit(1)
+    print(f"ROM 字形 {len(keys)} 個 × 候選字 {len(names)} 個")
+
+    rom_glyphs = np.array([glyphs[key] for key in keys])
+    indices, scores = correlate(rom_glyphs, bitmaps, use_blur=use_blur, top=top)
+    lookup = kanji_lookup(rom)
+
+    fields = ["page", "tile", "current"]
+    for k in range(indices.shape[1]):
+        fields += [f"cand{k + 1}", f"score{k + 1}"]
+    agree = 0
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for (page, tile), idx, score in zip(keys, indices, scores):
+            current = lookup[page, tile]
+            row = [page, f"0x{tile:02X}", current]
+            for j, s in zip(idx, score):
+                row += [names[j], round(float(s), 3)]
+            agree += bool(current) and len(idx) > 0 and names[idx[0]] == current
+            writer.writerow(row)
+    print(f"第一候選與目前對照相同: {agree} / {len(keys)}")
+    print(f"已輸出: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -92,6 +92,39 @@ def export_csv(records, output_path):
             writer.writerow(r)
 
 
+def export_columnar(rom, output_dir):
+    """
+    欄式匯出 (見 columnar.py)
+
+    輸出:
+        <dir>/components/*.npy  組件索引表各欄 (uint8；portrait_index, rom_offset 為整數)
+        <dir>/mob_portraits.npz portraits (174, 48, 48) 與各組件 tile 陣列
+    """
+    import numpy as np
+    from columnar import write_columns, write_tensors
+    from portrait_bank import load_mob_components, render_mob_portraits
+
+    table = np.frombuffer(rom, dtype=np.uint8, count=PORTRAIT_COUNT * COMP_RECORD_SIZE,
+                          offset=COMP_TABLE_OFFSET).reshape(PORTRAIT_COUNT, COMP_RECORD_SIZE)
+    columns = {
+        "portrait_index": np.arange(PORTRAIT_START, PORTRAIT_END + 1, dtype=np.uint8),
+        "rom_offset": COMP_TABLE_OFFSET + np.arange(PORTRAIT_COUNT, dtype=np.uint32) * COMP_RECORD_SIZE,
+    }
+    for j, name in enumerate(COMP_NAMES):
+        columns[name] = table[:, j]
+    write_columns(os.path.join(output_dir, "components"), columns)
+
+    components = load_mob_components(rom)
+    write_tensors(
+        os.path.join(output_dir, "mob_portraits.npz"),
+        portraits=render_mob_portraits(rom),
+        heads=components["heads"],
+        eyes=components["eyes"],
+        noses=components["noses"],
+        mouths=components["mouths"],
+    )
+
+
 def print_summary(records):
     """印出統計摘要"""
     # 各組件的值分佈
@@ -140,8 +173,11 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     csv_path = os.path.join(output_dir, "mob_component_index.csv")
     export_csv(records, csv_path)
+    columns_dir = os.path.join(output_dir, "mob_component_columns")
+    export_columnar(rom, columns_dir)
     print()
     print(f"已匯出: {csv_path}")
+    print(f"已匯出: {columns_dir}")
 
 
 if __name__ == "__main__":
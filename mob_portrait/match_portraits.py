@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 """
 Match screenshot portraits to find correct Group and variant indices.
+
+Usage:
+    python match_portraits.py [--palette FILE]
+
+    --palette FILE  - palette profile (see tools/palette_calibrate.py) used as the
+                      reference palette when locating and quantizing screenshots
 """
 
 import os
+import sys
 from PIL import Image
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from portrait_locator import crop_portrait_if_frame, format_location  # noqa: E402
+from palette_quant import quantize_indices  # noqa: E402
+from portrait_bank import rgb_to_indices  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+
 SCREENSHOT_DIR = "screenshot"
 EXPLORER_ASSETS = "variant_explorer/assets"
+ASSET_SCALE = 3  # explorer assets are rendered at 3x (24x24 pixels per tile)
 
 # Palette for comparison (convert to grayscale-ish for simpler matching)
 PALETTE = {
@@ -23,22 +39,24 @@ def load_image_as_array(path):
     img = Image.open(path).convert('RGB')
     return np.array(img)
 
+def load_asset_as_indices(path):
+    """Load a rendered asset (exact PALETTE colours) as palette indices."""
+    return rgb_to_indices(load_image_as_array(path), list(PALETTE))
+
 def extract_region(img_array, row_start, row_end, col_start, col_end, scale=1):
     """Extract a region from the image array."""
     return img_array[row_start*scale:row_end*scale, col_start*scale:col_end*scale]
 
 def compare_images(img1, img2):
-    """Compare two images and return similarity score (0-1)."""
+    """Compare two palette-index images and return similarity score (0-1)."""
     if img1.shape != img2.shape:
-        # Resize if needed
-        min_shape = (min(img1.shape[0], img2.shape[0]),
-                     min(img1.shape[1], img2.shape[1]), 3)
-        img1 = img1[:min_shape[0], :min_shape[1]]
-        img2 = img2[:min_shape[0], :min_shape[1]]
+        # Crop to the common size if needed
+        h = min(img1.shape[0], img2.shape[0])
+        w = min(img1.shape[1], img2.shape[1])
+        img1 = img1[:h, :w]
+        img2 = img2[:h, :w]
 
-    diff = np.abs(img1.astype(int) - img2.astype(int))
-    similarity = 1 - (np.sum(diff) / (img1.size * 255))
-    return similarity
+    return float(np.mean(img1 == img2))
 
 def find_best_match(target_region, variant_dir, variant_prefix, count=20):
     """Find the best matching variant for a target region."""
@@ -49,7 +67,7 @@ def find_best_match(target_region, variant_dir, variant_prefix, count=20):
     for i in range(count):
         variant_path = os.path.join(variant_dir, f"{variant_prefix}_{i:02d}.png")
         if os.path.exists(variant_path):
-            variant_img = load_image_as_array(variant_path)
+            variant_img = load_asset_as_indices(variant_path)
             score = compare_images(target_region, variant_img)
             scores.append((i, score))
             if score > best_score:
@@ -68,7 +86,7 @@ def find_best_framework(target_img, frameworks_dir, count=19):
 
     # Extract framework regions (rows 0-1, and edge columns)
     # Scale is 3 in the assets (24x24 pixels per 8x8 tile region)
-    scale = 3
+    scale = ASSET_SCALE
 
     # Top 2 rows (full width)
     target_top = target_img[:16*scale, :]
@@ -76,7 +94,7 @@ def find_best_framework(target_img, frameworks_dir, count=19):
     for i in range(count):
         framework_path = os.path.join(frameworks_dir, f"framework_{i:02d}.png")
         if os.path.exists(framework_path):
-            framework_img = load_image_as_array(framework_path)
+            framework_img = load_asset_as_indices(framework_path)
             framework_top = framework_img[:16*scale, :]
 
             score = compare_images(target_top, framework_top)
@@ -88,22 +106,26 @@ def find_best_framework(target_img, frameworks_dir, count=19):
     scores.sort(key=lambda x: -x[1])
     return best_match, best_score, scores[:3]
 
-def analyze_screenshot(screenshot_path, assets_dir):
+def analyze_screenshot(screenshot_path, assets_dir, palette=None):
     """Analyze a screenshot and find matching indices."""
     name = os.path.splitext(os.path.basename(screenshot_path))[0]
     print(f"\n{'='*60}")
     print(f"分析: {name}")
     print(f"{'='*60}")
 
-    # Load screenshot
-    img = load_image_as_array(screenshot_path)
-    print(f"圖片大小: {img.shape}")
+    # Load screenshot (full emulator frames are located and cropped first)
+    img = Image.open(screenshot_path).convert('RGB')
+    print(f"圖片大小: {img.size}")
+    img, location = crop_portrait_if_frame(img, palette)
+    if location is not None:
+        print(f"定位頭像: {format_location(location)}")
 
-    # Determine scale (screenshot might be different size)
-    # Expected: 48x48 base, but screenshots might be scaled
-    height, width = img.shape[:2]
-    scale = height // 48
-    print(f"推測縮放比例: {scale}x")
+    # Resample to the 3x asset scale so regions line up with the assets,
+    # then quantize to palette indices so matching is independent of the
+    # emulator's NES palette
+    scale = ASSET_SCALE
+    img = img.resize((48 * scale, 48 * scale), Image.NEAREST)
+    img = quantize_indices(np.array(img), palette or list(PALETTE))
 
     # Find best framework match
     framework_match, fw_score, fw_top3 = find_best_framework(
@@ -157,6 +179,7 @@ def analyze_screenshot(screenshot_path, assets_dir):
     }
 
 def main():
+    _, palette = pop_palette_option(sys.argv)
     assets_dir = EXPLORER_ASSETS
 
     # Find all screenshots
@@ -170,7 +193,7 @@ def main():
 
     results = []
     for screenshot in screenshots:
-        result = analyze_screenshot(screenshot, assets_dir)
+        result = analyze_screenshot(screenshot, assets_dir, palette)
         results.append(result)
 
     # Print summary
@@ -14,6 +14,8 @@ import csv
 import os
 import sys
 
+from palette_profile import pop_palette_option
+
 try:
     from PIL import Image
 except ImportError:
@@ -126,8 +128,11 @@ def read_component_table(rom):
 
 # ─── 頭像渲染 ────────────────────────────────────────────────
 
-def render_portrait(rom, cat, head_local, eye_local, nose_local, mouth_local):
-    """從組件索引組合頭像，回傳 48×48 PIL Image"""
+def render_portrait(rom, cat, head_local, eye_local, nose_local, mouth_local, palette=None):
+    """從組件索引組合頭像，回傳 48×48 PIL Image (palette 預設 PALETTE)"""
+    if palette is None:
+        palette = PALETTE
+
     # 轉換為全域索引
     head_g = cat * 5 + head_local
     eye_g = cat * 5 + eye_local
@@ -161,7 +166,7 @@ def render_portrait(rom, cat, head_local, eye_local, nose_local, mouth_local):
         mouth_tiles.append(decode_tile(rom[offset:offset + 16]))
 
     # 組合 48×48 圖像
-    img = Image.new('RGB', (48, 48), PALETTE[0])
+    img = Image.new('RGB', (48, 48), palette[0])
 
     for row in range(6):
         for col in range(6):
@@ -194,7 +199,7 @@ def render_portrait(rom, cat, head_local, eye_local, nose_local, mouth_local):
             # 繪製 tile
             for y in range(8):
                 for x in range(8):
-                    img.putpixel((col * 8 + x, row * 8 + y), PALETTE[pixels[y][x]])
+                    img.putpixel((col * 8 + x, row * 8 + y), palette[pixels[y][x]])
 
     return img
 
@@ -202,7 +207,9 @@ def render_portrait(rom, cat, head_local, eye_local, nose_local, mouth_local):
 # ─── 主程式 ────────────────────────────────────────────────
 
 def main():
-    rom_path = sys.argv[1] if len(sys.argv) > 1 else "Sangokushi (Japan).nes"
+    # --palette FILE: 使用 tools/palette_calibrate.py 產生的調色盤設定檔
+    argv, palette = pop_palette_option(sys.argv)
+    rom_path = argv[1] if len(argv) > 1 else "Sangokushi (Japan).nes"
 
     if not os.path.exists(rom_path):
         print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
@@ -222,7 +229,7 @@ def main():
     records = read_component_table(rom)
 
     # 匯出設定
-    scale = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    scale = int(argv[2]) if len(argv) > 2 else 2
     output_dir = "output/mob_portraits" if scale > 1 else "output/mob_portraits_48"
     os.makedirs(output_dir, exist_ok=True)
 
@@ -234,7 +241,7 @@ def main():
         pi = r['portrait_index']
         name = names.get(pi, '')
 
-        img = render_portrait(rom, r['cat'], r['head'], r['eye'], r['nose'], r['mouth'])
+        img = render_portrait(rom, r['cat'], r['head'], r['eye'], r['nose'], r['mouth'], palette)
 
         if scale > 1:
             img = img.resize((48 * scale, 48 * scale), Image.NEAREST)
@@ -263,7 +270,7 @@ def main():
 
     for i, r in enumerate(records):
         pi = r['portrait_index']
-        img = render_portrait(rom, r['cat'], r['head'], r['eye'], r['nose'], r['mouth'])
+        img = render_portrait(rom, r['cat'], r['head'], r['eye'], r['nose'], r['mouth'], palette)
         if scale > 1:
             img = img.resize((size, size), Image.NEAREST)
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+武將姓名 n-gram 搜尋
+
+索引來源:
+  - load_rom_names: ROM 半角片假名、解碼後的漢字
+  - EXT 姓名 / 假名 (外部 CSV 或 EXT_CHAR_INFO)
+
+假名正規化 (normalize_kana):
+  NFKC (半角 → 全角、半角濁點合併) → 片假名轉平假名 → 去除濁點/半濁點
+  因此 "ﾘｭｳﾋﾞ"、"リュウビ"、"りゅうひ" 都視為相同。
+
+每個欄位拆成 1-gram 與 2-gram 建立倒排索引；查詢時以共同 n-gram 數計算
+Dice 係數排序，部分字串、漏字、錯字都能找到。
+
+API:
+    index = NameSearchIndex.from_rom(rom, ext_lookup)
+    for hit in index.search("りゅうび"): print(hit.index, hit.score, hit.field, hit.text)
+
+CLI:
+    python character_query.py <rom_file.nes> search <文字> [--limit N]
+"""
+
+import unicodedata
+from collections import Counter, namedtuple
+
+from sangokushi_extract_v2 import build_characters, load_rom_names
+
+DEFAULT_LIMIT = 10
+DEFAULT_MIN_SCORE = 0.3
+
+SearchHit = namedtuple("SearchHit", ["index", "score", "field", "text"])
+
+_KATAKANA_FIRST, _KATAKANA_LAST = 0x30A1, 0x30F6   # ァ - ヶ
+_KANA_OFFSET = 0x60                                # ァ → ぁ
+_VOICED_MARKS = {"\u3099", "\u309a"}     # 結合用濁點 / 半濁點
+
+
+def normalize_kana(text, fold_dakuten=True):
+    """正規化: NFKC、片假名 → 平假名、(可選) 去除濁點"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(chr(ord(c) - _KANA_OFFSET) if _KATAKANA_FIRST <= ord(c) <= _KATAKANA_LAST else c
+                   for c in text)
+    if fold_dakuten:
+        text = "".join(c for c in unicodedata.normalize("NFD", text) if c not in _VOICED_MARKS)
+        text = unicodedata.normalize("NFC", text)
+    return "".join(text.split())
+
+
+def ngrams(text):
+    """1-gram 與 2-gram (以集合表示)"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class NameSearchIndex:
+    """n-gram 倒排索引: gram → {(武將索引, 欄位)}"""
+
+    def __init__(self, entries):
+        """entries: [(index, {field: text}), ...]"""
+        self.texts = {}      # (index, field) → 原始文字
+        self.normalized = {} # (index, field) → 正規化文字
+        self.sizes = {}      # (index, field) → n-gram 數
+        self.postings = {}   # gram → [(index, field), ...]
+        for index, fields in entries:
+            for field, text in fields.items():
+                norm = normalize_kana(text)
+                if not norm:
+                    continue
+                key = (index, field)
+                grams = ngrams(norm)
+                self.texts[key] = text
+                self.normalized[key] = norm
+                self.sizes[key] = len(grams)
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(key)
+
+    @classmethod
+    def from_rom(cls, rom, ext_lookup=None):
+        """ROM 姓名表 + EXT 姓名 (能力值比對含近似比對，同 extract_all)"""
+        entries = []
+        characters = build_characters(rom, ext_lookup=ext_lookup)
+        for index, (kana, kanji, _) in enumerate(load_rom_names(rom)):
+            fields = {"rom_kana": kana, "rom_kanji": kanji}
+            if index < len(characters):
+                character = characters[index]
+                fields["ext_name"] = character.ext_name
+                fields["ext_kana"] = character.ext_kana
+            entries.append((index, fields))
+        return cls(entries)
+
+    def search(self, query, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+        """
+        回傳依分數排序的 SearchHit 列表 (每位武將只取分數最高的欄位)
+
+        分數為 Dice 係數 2|Q∩E| / (|Q|+|E|)；欄位包含整個查詢字串時另加 1
+        """
+        norm = normalize_kana(query)
+        if not norm:
+            return []
+        grams = ngrams(norm)
+        shared = Counter()
+        for gram in grams:
+            for key in self.postings.get(gram, ()):
+                shared[key] += 1
+
+        best = {}
+        for key, count in shared.items():
+            score = 2 * count / (len(grams) + self.sizes[key])
+            if norm in self.normalized[key]:
+                score += 1.0
+            if score >= min_score and score > best.get(key[0], (0,))[0]:
+                best[key[0]] = (score, key[1])
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [SearchHit(index, round(score, 3), field, self.texts[(index, field)])
+                for index, (score, field) in ranked]
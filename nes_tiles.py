@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NES tile 批次解碼
+
+以 NumPy 一次解碼整段 ROM 資料，取代逐像素的 decode_tile 迴圈。
+
+NES tile 格式 (2bpp planar):
+  每個 tile 16 bytes = Plane 0 (8 bytes) + Plane 1 (8 bytes)
+  像素值 = bit(plane0) + (bit(plane1) << 1), 0-3
+"""
+
+import numpy as np
+
+# ─── 常數 ────────────────────────────────────────────────────
+
+TILE_BYTES_2BPP = 16
+TILE_BYTES_1BPP = 8
+
+
+def decode_2bpp(data, count=None):
+    """
+    批次解碼 2bpp tiles
+
+    參數:
+        data: bytes / bytearray / uint8 陣列
+        count: 要解碼的 tile 數 (None = 全部; 資料不足時以 0 補齊)
+
+    回傳:
+        np.ndarray, shape (count, 8, 8), dtype uint8, 值 0-3
+    """
+    buf = np.frombuffer(bytes(data), dtype=np.uint8)
+    if count is None:
+        count = len(buf) // TILE_BYTES_2BPP
+    need = count * TILE_BYTES_2BPP
+    if len(buf) < need:
+        buf = np.concatenate([buf, np.zeros(need - len(buf), dtype=np.uint8)])
+    planes = buf[:need].reshape(count, 2, 8)
+    bits = np.unpackbits(planes, axis=2).reshape(count, 2, 8, 8)
+    return bits[:, 0] | (bits[:, 1] << 1)
+
+
+def decode_1bpp(data, count=None):
+    """
+    批次解碼 1bpp tiles (只有 Plane 0，顯示時 Plane 1 = Plane 0，如漢字字型)
+
+    參數:
+        data: bytes / bytearray / uint8 陣列
+        count: 要解碼的 tile 數 (None = 全部; 資料不足時以 0 補齊)
+
+    回傳:
+        np.ndarray, shape (count, 8, 8), dtype uint8, 值 0 或 3
+    """
+    buf = np.frombuffer(bytes(data), dtype=np.uint8)
+    if count is None:
+        count = len(buf) // TILE_BYTES_1BPP
+    need = count * TILE_BYTES_1BPP
+    if len(buf) < need:
+        buf = np.concatenate([buf, np.zeros(need - len(buf), dtype=np.uint8)])
+    bits = np.unpackbits(buf[:need].reshape(count, 8, 1), axis=2)
+    return bits * 3
+
+
+def arrange_tiles(tiles, rows, cols):
+    """
+    (..., rows × cols, 8, 8) → (..., rows × 8, cols × 8)，tile 依列優先排列
+    """
+    tiles = np.asarray(tiles)
+    lead = tiles.shape[:-3]
+    blocks = tiles.reshape(lead + (rows, cols, 8, 8))
+    n = len(lead)
+    order = tuple(range(n)) + (n, n + 2, n + 1, n + 3)
+    return blocks.transpose(order).reshape(lead + (rows * 8, cols * 8))
+
+
+def decode_glyphs_1bpp(rom, bases, count, rows=2, cols=2):
+    """
+    從多個基址各解碼 count 個 1bpp 字形 (每字 rows × cols 個 tiles)
+
+    所有基址的資料先串成一段，一次 unpack；超出 ROM 的部分為 0。
+
+    回傳:
+        np.ndarray, shape (len(bases), count, rows × 8, cols × 8), 值 0 或 3
+    """
+    glyph_bytes = rows * cols * TILE_BYTES_1BPP
+    size = count * glyph_bytes
+    buf = np.zeros((len(bases), size), dtype=np.uint8)
+    for i, base in enumerate(bases):
+        chunk = np.frombuffer(bytes(rom[base:base + size]), dtype=np.uint8)
+        buf[i, :len(chunk)] = chunk
+    tiles = decode_1bpp(buf, len(bases) * count * rows * cols)
+    return arrange_tiles(tiles.reshape(len(bases), count, rows * cols, 8, 8), rows, cols)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+調色盤設定檔 (Palette Profile)
+
+各模擬器 / 擷取卡的實際 RGB 不同。tools/palette_calibrate.py 從截圖校準後
+輸出 JSON 設定檔，渲染與比對工具皆可以 --palette 載入。
+
+格式:
+{
+  "name": "mesen",
+  "palette": [[r, g, b], [r, g, b], [r, g, b], [r, g, b]],   // 索引 0-3
+  "samples": [n0, n1, n2, n3],                               // 各索引的取樣像素數
+  "screenshots": 12                                          // 使用的截圖數
+}
+"""
+
+import json
+
+PALETTE_SIZE = 4
+
+
+def load_palette_profile(path):
+    """讀取設定檔，回傳 4 個 (r, g, b) tuple 的 list"""
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    palette = [tuple(int(v) for v in color) for color in profile['palette']]
+    if len(palette) != PALETTE_SIZE:
+        raise ValueError(f"調色盤設定檔需有 {PALETTE_SIZE} 色: {path}")
+    return palette
+
+
+def save_palette_profile(path, name, palette, samples=None, screenshots=0):
+    """寫出調色盤設定檔"""
+    profile = {
+        'name': name,
+        'palette': [[int(v) for v in color] for color in palette],
+        'samples': [int(n) for n in samples] if samples is not None else [],
+        'screenshots': screenshots,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+
+
+def pop_palette_option(argv):
+    """
+    從命令列參數取出 --palette FILE
+
+    回傳: (剩餘參數 list, palette 或 None)
+    """
+    args = list(argv)
+    if '--palette' not in args:
+        return args, None
+    i = args.index('--palette')
+    if i + 1 >= len(args):
+        raise SystemExit("錯誤: --palette 需要指定設定檔路徑")
+    path = args[i + 1]
+    del args[i:i + 2]
+    return args, load_palette_profile(path)
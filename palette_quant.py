@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+調色盤無關的 4 色量化
+
+不同模擬器 / 擷取卡的 NES 調色盤與色偏不同，直接找最接近的 PALETTE 顏色
+容易誤判。這裡改為:
+
+  1. 以向量化 k-means 將截圖區域分成 (最多) 4 群顏色
+  2. 將群中心與參考調色盤各自做每通道 min-max 正規化 (消除亮度/白平衡差異)
+  3. 窮舉群 → 調色盤索引的排列 (最多 4! = 24 種)，取總距離最小者
+
+之後所有比對都在調色盤索引空間 (0-3) 進行。
+
+注意: 應對整張 48×48 頭像量化 (通常 4 色俱全)，而非單獨量化眼睛等小區域。
+"""
+
+from itertools import permutations
+
+import numpy as np
+
+from portrait_export import PALETTE
+
+# ─── 常數 ────────────────────────────────────────────────────
+
+COLOR_COUNT = 4
+KMEANS_ITERATIONS = 12
+LUMA = np.array([0.299, 0.587, 0.114])
+
+
+def kmeans_colors(colors, weights=None, k=COLOR_COUNT, iterations=KMEANS_ITERATIONS):
+    """
+    向量化加權 k-means
+
+    參數:
+        colors: (N, 3) float 陣列 (通常為唯一顏色)
+        weights: (N,) 各顏色的像素數 (None = 全為 1)
+        k: 群數
+
+    回傳:
+        centers (k, 3), labels (N,)
+    """
+    if weights is None:
+        weights = np.ones(len(colors))
+    # 最遠點初始化 (從最暗的顏色開始)，結果可重現且不受大面積單色影響
+    centers = [colors[np.argmin(colors @ LUMA)]]
+    for _ in range(1, k):
+        dist = ((colors[:, None, :] - np.array(centers)[None]) ** 2).sum(axis=2).min(axis=1)
+        centers.append(colors[dist.argmax()])
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(iterations):
+        dist = ((colors[:, None, :] - centers[None]) ** 2).sum(axis=2)
+        new_labels = dist.argmin(axis=1)
+        totals = np.bincount(new_labels, weights=weights, minlength=k)
+        sums = np.stack([np.bincount(new_labels, weights=weights * colors[:, c], minlength=k)
+                         for c in range(3)], axis=1)
+        filled = totals > 0
+        centers[filled] = sums[filled] / totals[filled, None]
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return centers, labels
+
+
+def _normalize(colors, lo, hi):
+    return (colors - lo) / np.maximum(hi - lo, 1.0)
+
+
+def best_permutation(centers, palette=None):
+    """
+    找出群中心 → 調色盤索引的最佳對應
+
+    兩邊各自以每通道 min-max 正規化後比較，因此與絕對色值無關
+
+    回傳:
+        tuple, mapping[cluster] = palette_index
+    """
+    if palette is None:
+        palette = PALETTE
+    pal = np.asarray(palette, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    c_norm = _normalize(centers, centers.min(axis=0), centers.max(axis=0))
+    p_norm = _normalize(pal, pal.min(axis=0), pal.max(axis=0))
+    cost = ((c_norm[:, None, :] - p_norm[None]) ** 2).sum(axis=2)
+
+    best = None
+    best_cost = np.inf
+    for perm in permutations(range(len(pal)), len(centers)):
+        total = cost[np.arange(len(centers)), perm].sum()
+        if total < best_cost:
+            best_cost = total
+            best = perm
+    return best
+
+
+def quantize_indices(rgb, palette=None):
+    """
+    RGB 陣列 (H, W, 3) → 調色盤索引陣列 (H, W), uint8
+
+    與 portrait_bank.rgb_to_indices 不同，不假設截圖使用相同的 RGB 調色盤
+    """
+    rgb = np.asarray(rgb)[..., :3]
+    shape = rgb.shape[:2]
+    colors, inverse = np.unique(rgb.reshape(-1, 3), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    colors = colors.astype(np.float64)
+
+    if len(colors) <= COLOR_COUNT:
+        # 顏色數已不超過 4: 每個顏色自成一群
+        centers, labels = colors, np.arange(len(colors))
+    else:
+        centers, labels = kmeans_colors(colors, np.bincount(inverse).astype(np.float64))
+
+    mapping = np.asarray(best_permutation(centers, palette), dtype=np.uint8)
+    return mapping[labels[inverse]].reshape(shape)
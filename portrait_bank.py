@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+頭像庫 (Portrait Bank)
+
+將 ROM 中全部 255 個頭像 (標準 P00-P80 + 大眾臉 P81-P254) 一次渲染為
+調色盤索引陣列 (48×48, 值 0-3)，供截圖定位與比對工具共用。
+
+渲染規則與 portrait_export.generate_portrait / mob_portrait_export.render_portrait
+相同，只是以 tile 陣列組合取代逐像素 putpixel。
+"""
+
+import numpy as np
+
+from nes_tiles import decode_2bpp
+from portrait_export import (
+    PALETTE,
+    PORTRAIT_COUNT as STANDARD_COUNT,
+    read_portrait_ptr_table,
+    load_all_arrangements,
+    build_portrait_arrangement_mapping,
+)
+from mob_portrait_export import (
+    PORTRAIT_START as MOB_START,
+    PORTRAIT_COUNT as MOB_COUNT,
+    HEADS,
+    HEAD_TILE_COUNT,
+    EYES_START,
+    NOSES_START,
+    MOUTHS_START,
+    read_template,
+    read_component_table,
+)
+
+# ─── 常數 ────────────────────────────────────────────────────
+
+BANK_SIZE = STANDARD_COUNT + MOB_COUNT  # 255
+VARIANT_COUNT = 20
+
+# 嘴巴 6 tiles 在 rows 4-5 的排列 (同 render_portrait)
+MOUTH_ROW_TILES = {4: [0, 1, 4], 5: [2, 3, 5]}
+
+
+def tiles_to_image(grid):
+    """6×6 個 8×8 tile (shape (6, 6, 8, 8)) → 48×48 索引陣列"""
+    return grid.transpose(0, 2, 1, 3).reshape(48, 48)
+
+
+def indices_to_rgb(indices, palette=None):
+    """調色盤索引陣列 → RGB 陣列 (uint8)"""
+    if palette is None:
+        palette = PALETTE
+    return np.asarray(palette, dtype=np.uint8)[indices]
+
+
+def rgb_to_indices(rgb, palette=None):
+    """RGB 陣列 → 最接近的調色盤索引 (uint8)"""
+    if palette is None:
+        palette = PALETTE
+    pal = np.asarray(palette, dtype=np.int32)
+    pixels = np.asarray(rgb)[..., :3].astype(np.int32)
+    dist = ((pixels[..., None, :] - pal) ** 2).sum(axis=-1)
+    return dist.argmin(axis=-1).astype(np.uint8)
+
+
+# ─── 標準頭像 (P00-P80) ──────────────────────────────────────
+
+def render_standard_portraits(rom):
+    """渲染 81 個標準頭像，回傳 shape (81, 48, 48)"""
+    portraits = read_portrait_ptr_table(rom)
+    arrangements = load_all_arrangements(rom)
+    mapping = build_portrait_arrangement_mapping(portraits, arrangements)
+
+    bank = np.zeros((STANDARD_COUNT, 48, 48), dtype=np.uint8)
+    for p in portraits:
+        tile_count = p['tile_count']
+        offset = p['file_offset']
+        # index 0 = 空白 tile (排列值 0 或超出 tile_count 的位置不繪製)
+        tiles = np.zeros((tile_count + 1, 8, 8), dtype=np.uint8)
+        tiles[1:] = decode_2bpp(rom[offset:offset + tile_count * 16], tile_count)
+        layout = np.array(mapping[p['index']], dtype=np.int32)
+        layout[(layout <= 0) | (layout > tile_count)] = 0
+        bank[p['index']] = tiles_to_image(tiles[layout])
+    return bank
+
+
+# ─── 大眾臉頭像 (P81-P254) ───────────────────────────────────
+
+def load_mob_components(rom):
+    """
+    解碼大眾臉全部組件
+
+    回傳 dict:
+        heads:     (20, 24, 8, 8) 框架 tiles
+        templates: 20 個 6×6 排列模板 (None = 變體位置)
+        eyes:      (20, 3, 8, 8)
+        noses:     (20, 3, 8, 8)
+        mouths:    (20, 6, 8, 8)
+    """
+    heads = np.stack([
+        decode_2bpp(rom[base:base + HEAD_TILE_COUNT * 16], HEAD_TILE_COUNT)
+        for base in HEADS
+    ])
+    eyes = decode_2bpp(rom[EYES_START:EYES_START + VARIANT_COUNT * 3 * 16])
+    noses = decode_2bpp(rom[NOSES_START:NOSES_START + VARIANT_COUNT * 3 * 16])
+    mouths = decode_2bpp(rom[MOUTHS_START:MOUTHS_START + VARIANT_COUNT * 6 * 16])
+    return {
+        'heads': heads,
+        'templates': [read_template(rom, i) for i in range(len(HEADS))],
+        'eyes': eyes.reshape(VARIANT_COUNT, 3, 8, 8),
+        'noses': noses.reshape(VARIANT_COUNT, 3, 8, 8),
+        'mouths': mouths.reshape(VARIANT_COUNT, 6, 8, 8),
+    }
+
+
+def compose_mob_portrait(components, cat, head_local, eye_local, nose_local, mouth_local):
+    """從組件索引組合大眾臉頭像，回傳 48×48 索引陣列"""
+    head_g = cat * 5 + head_local
+    eye_g = cat * 5 + eye_local
+    nose_g = cat * 5 + nose_local
+    mouth_g = cat * 5 + mouth_local
+
+    template = components['templates'][head_g]
+    head_tiles = components['heads'][head_g]
+    grid = np.zeros((6, 6, 8, 8), dtype=np.uint8)
+
+    for row in range(6):
+        for col in range(6):
+            tile_idx = template[row][col]
+            if tile_idx is not None:
+                if tile_idx < HEAD_TILE_COUNT:
+                    grid[row, col] = head_tiles[tile_idx]
+                continue
+            vc = col - 1
+            if row == 2:
+                grid[row, col] = components['eyes'][eye_g][vc]
+            elif row == 3:
+                grid[row, col] = components['noses'][nose_g][vc]
+            elif row in MOUTH_ROW_TILES:
+                grid[row, col] = components['mouths'][mouth_g][MOUTH_ROW_TILES[row][vc]]
+
+    return tiles_to_image(grid)
+
+
+def render_mob_portraits(rom):
+    """渲染 174 個大眾臉頭像，回傳 shape (174, 48, 48)"""
+    components = load_mob_components(rom)
+    records = read_component_table(rom)
+    bank = np.zeros((MOB_COUNT, 48, 48), dtype=np.uint8)
+    for i, r in enumerate(records):
+        bank[i] = compose_mob_portrait(
+            components, r['cat'], r['head'], r['eye'], r['nose'], r['mouth'])
+    return bank
+
+
+def load_portrait_bank(rom):
+    """
+    渲染全部頭像
+
+    回傳:
+        np.ndarray, shape (255, 48, 48)；陣列索引即頭像索引 (0-254)
+    """
+    return np.concatenate([render_standard_portraits(rom), render_mob_portraits(rom)])
@@ -9,6 +9,8 @@ FC 三國志 頭像匯出工具
 import os
 import sys
 
+from palette_profile import pop_palette_option
+
 try:
     from PIL import Image
 except ImportError:
@@ -137,8 +139,10 @@ def decode_tile(rom, offset):
     return pixels
 
 
-def generate_portrait(rom, portrait, layout):
-    """生成頭像圖像"""
+def generate_portrait(rom, portrait, layout, palette=None):
+    """生成頭像圖像 (palette: 調色盤設定檔的 4 色，預設 PALETTE)"""
+    if palette is None:
+        palette = PALETTE
     file_offset = portrait['file_offset']
     tile_count = portrait['tile_count']
 
@@ -150,7 +154,7 @@ def generate_portrait(rom, portrait, layout):
         tiles.append(tile_pixels)
 
     # 建立 48×48 圖像
-    img = Image.new('RGB', (48, 48), PALETTE[0])
+    img = Image.new('RGB', (48, 48), palette[0])
 
     # 繪製
     for display_y in range(6):
@@ -163,7 +167,7 @@ def generate_portrait(rom, portrait, layout):
                 for x in range(8):
                     px = display_x * 8 + x
                     py = display_y * 8 + y
-                    img.putpixel((px, py), PALETTE[tile_pixels[y][x]])
+                    img.putpixel((px, py), palette[tile_pixels[y][x]])
 
     return img
 
@@ -193,7 +197,7 @@ def build_portrait_arrangement_mapping(portraits, arrangements):
     return mapping
 
 
-def export_all_portraits(rom, output_dir, scale=2):
+def export_all_portraits(rom, output_dir, scale=2, palette=None):
     """匯出所有頭像"""
     os.makedirs(output_dir, exist_ok=True)
 
@@ -208,7 +212,7 @@ def export_all_portraits(rom, output_dir, scale=2):
 
     for p in portraits:
         layout = mapping.get(p['index'], STANDARD_LAYOUT)
-        img = generate_portrait(rom, p, layout)
+        img = generate_portrait(rom, p, layout, palette)
 
         if scale > 1:
             img = img.resize((48 * scale, 48 * scale), Image.NEAREST)
@@ -219,7 +223,7 @@ def export_all_portraits(rom, output_dir, scale=2):
     print(f"完成! 已儲存 {PORTRAIT_COUNT} 個頭像")
 
 
-def export_portrait_atlas(rom, output_path, scale=2):
+def export_portrait_atlas(rom, output_path, scale=2, palette=None):
     """匯出頭像總覽圖"""
     portraits = read_portrait_ptr_table(rom)
     arrangements = load_all_arrangements(rom)
@@ -237,7 +241,7 @@ def export_portrait_atlas(rom, output_path, scale=2):
 
     for i, p in enumerate(portraits):
         layout = mapping.get(p['index'], STANDARD_LAYOUT)
-        portrait_img = generate_portrait(rom, p, layout)
+        portrait_img = generate_portrait(rom, p, layout, palette)
         if scale > 1:
             portrait_img = portrait_img.resize((size, size), Image.NEAREST)
 
@@ -252,7 +256,9 @@ def export_portrait_atlas(rom, output_path, scale=2):
 
 
 def main():
-    rom_path = sys.argv[1] if len(sys.argv) > 1 else "Sangokushi (Japan).nes"
+    # --palette FILE: 使用 tools/palette_calibrate.py 產生的調色盤設定檔
+    argv, palette = pop_palette_option(sys.argv)
+    rom_path = argv[1] if len(argv) > 1 else "Sangokushi (Japan).nes"
 
     if not os.path.exists(rom_path):
         print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
@@ -269,11 +275,11 @@ def main():
     print()
 
     output_dir = "kanji_output/portraits"
-    export_all_portraits(rom, output_dir, scale=2)
+    export_all_portraits(rom, output_dir, scale=2, palette=palette)
     print()
 
     atlas_path = "kanji_output/portrait_atlas.png"
-    export_portrait_atlas(rom, atlas_path, scale=2)
+    export_portrait_atlas(rom, atlas_path, scale=2, palette=palette)
 
 
 if __name__ == "__main__":
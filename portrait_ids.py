@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+頭像識別表 (Portrait Identification Table)
+
+預先計算「頭像索引陣列 hash → 頭像索引 → 使用該頭像的武將」:
+
+  1. 以 portrait_bank 渲染全部 255 個頭像 (標準 + 大眾臉)，在調色盤索引空間
+     (48×48, 值 0-3) 計算 hash
+  2. 反查姓名表 byte 14 (get_portrait_index / build_portrait_to_chars) 得到武將
+
+識別只需一次 dict 查詢。結果連同頭像庫存成 ROM 旁的快取檔
+(<ROM>.ids.pkl)，以 ROM 的 SHA-1 判斷是否失效。
+
+用法:
+    table = load_identification_table(rom_path)
+    hit = table.identify(quantize_indices(crop))
+    if hit:
+        portraits, characters = hit
+"""
+
+import hashlib
+import os
+import pickle
+
+import numpy as np
+
+from portrait_bank import load_portrait_bank
+from mob_component_extract import build_portrait_to_chars
+
+# 快取格式變更時遞增
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.ids.pkl'
+
+
+def portrait_key(indices):
+    """48×48 調色盤索引陣列 → hash key (bytes)"""
+    data = np.ascontiguousarray(indices, dtype=np.uint8).tobytes()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def rom_digest(rom):
+    return hashlib.sha1(rom).hexdigest()
+
+
+class IdentificationTable:
+    """頭像 hash → (頭像索引列表, 武將索引列表)"""
+
+    def __init__(self, bank, portrait_to_chars):
+        self.bank = bank
+        self.portrait_to_chars = portrait_to_chars
+        # 渲染結果相同的頭像共用同一個 key，故值為列表
+        self.key_to_portraits = {}
+        for portrait, indices in enumerate(bank):
+            self.key_to_portraits.setdefault(portrait_key(indices), []).append(portrait)
+
+    def __len__(self):
+        return len(self.key_to_portraits)
+
+    def characters(self, portraits):
+        """頭像索引列表 → 使用這些頭像的武將索引 (排序)"""
+        return sorted(c for p in portraits for c in self.portrait_to_chars.get(p, []))
+
+    def identify(self, indices):
+        """
+        48×48 索引陣列 → (頭像索引列表, 武將索引列表)
+
+        與任何頭像都不完全相符時回傳 None
+        """
+        portraits = self.key_to_portraits.get(portrait_key(indices))
+        if portraits is None:
+            return None
+        return portraits, self.characters(portraits)
+
+
+def build_identification_table(rom):
+    return IdentificationTable(load_portrait_bank(rom), build_portrait_to_chars(rom))
+
+
+def cache_path_for(rom_path):
+    return rom_path + CACHE_SUFFIX
+
+
+def load_identification_table(rom_path, cache_path=None, rebuild=False):
+    """
+    讀取識別表；快取不存在、版本不符或 ROM 已變更時重建並寫回
+
+    參數:
+        rom_path: ROM 檔案路徑
+        cache_path: 快取檔路徑 (預設 <ROM>.ids.pkl)
+        rebuild: True 則忽略現有快取
+    """
+    cache_path = cache_path or cache_path_for(rom_path)
+    with open(rom_path, 'rb') as f:
+        rom = f.read()
+    digest = rom_digest(rom)
+
+    if not rebuild and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == CACHE_VERSION and cached.get('rom_sha1') == digest:
+                return cached['table']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError,
+                ImportError, TypeError):
+            pass
+
+    table = build_identification_table(rom)
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'rom_sha1': digest, 'table': table},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"警告: 無法寫入識別表快取 '{cache_path}': {e}")
+    return table
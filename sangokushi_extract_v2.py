@@ -90,11 +90,18 @@
 """
 
 import csv
-import struct
 import sys
 import os
 import warnings
 
+import functools
+
+import numpy as np
+
+from ext_stats_index import load_ext_index, warn_duplicates
+from stat_match import assign as assign_by_stats
+from kanji_glyphs import GlyphClasses, decode_name_kanji, name_kanji_refs, resolve_tile_pages
+
 # ─── 常數 ────────────────────────────────────────────────
 TABLE_DATA_ADDR   = 0x38014
 RECORD_DATA_SIZE  = 12
@@ -102,6 +109,27 @@ RECORD_SEP        = bytes([0x0A, 0x0A, 0x0A, 0x00, 0x00])
 RECORD_TOTAL_SIZE = RECORD_DATA_SIZE + len(RECORD_SEP)  # 17
 MAX_RECORDS       = 256
 
+# 單筆記錄的 structured dtype (17 bytes, 與 ROM 位元組排列一致)
+# np.frombuffer 直接對應 ROM 緩衝區，各欄位 (如 table["military"]) 為零複製的 strided view
+CHAR_DTYPE = np.dtype([
+    ("age",          "i1"),    # B0 signed
+    ("body",         "u1"),    # B1
+    ("intelligence", "u1"),    # B2
+    ("military",     "u1"),    # B3
+    ("charisma",     "u1"),    # B4
+    ("luck",         "u1"),    # B5
+    ("loyalty",      "u1"),    # B6
+    ("b7_raw",       "u1"),    # B7 bitfield
+    ("troops",       "<u2"),   # B8-B9 little-endian
+    ("city",         "u1"),    # B10
+    ("faction",      "u1"),    # B11
+    ("sep",          "V5"),    # 0A 0A 0A 00 00
+])
+STAT_FIELDS = ["age", "body", "intelligence", "military", "charisma", "luck",
+               "loyalty", "b7_raw", "troops", "city", "faction"]
+# 與外部 CSV 比對姓名用的能力值 (S01 欄 8-12)
+EXT_STAT_FIELDS = ["body", "intelligence", "military", "charisma", "luck"]
+
 # 武將姓名表位置 (半角片假名)
 NAME_TABLE_ADDR   = 0x3A314
 NAME_RECORD_SIZE  = 15
@@ -183,55 +211,31 @@ EXT_CHAR_INFO = {
 EXT_CSV_PATH = "光榮三國志系列武將登場統計 - 能力表.csv"
 
 
-def load_ext_char_info_from_csv(csv_path):
+def load_ext_char_info_from_csv(csv_path, title="S01"):
     """
     從外部 CSV 載入 S01 (FC 三國志) 武將資料
 
     回傳: {(body, intelligence, military, charisma, luck): (name, kana)} 字典
 
-    CSV 欄位對應:
+    CSV 欄位對應 (見 ext_stats_index.py):
       - 欄 0: 姓名
       - 欄 5: 假名 (日文假名讀音)
       - 欄 8-12: S01 身體/知力/武力/魅力/運勢
+
+    索引快取於 <CSV>.index.pkl，CSV 未變更時不重新解析
     """
     if not os.path.exists(csv_path):
         return {}
 
-    lookup = {}
     try:
-        with open(csv_path, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            next(reader)  # 跳過表頭
-            for row in reader:
-                if len(row) <= 12 or not row[8]:
-                    continue  # 跳過無 S01 資料的列
-                try:
-                    body = int(row[8])
-                    intl = int(row[9])
-                    mil = int(row[10])
-                    cha = int(row[11])
-                    luck = int(row[12])
-                except ValueError:
-                    continue  # 跳過能力值欄位為空或非數字的列
-
-                key = (body, intl, mil, cha, luck)
-                name = row[0]
-                kana = row[5]
-
-                if key in lookup:
-                    # 多筆武將能力值相同，記錄警告
-                    existing_name = lookup[key][0]
-                    warnings.warn(
-                        f"重複能力值組合 {key}: '{existing_name}' 與 '{name}'，採用第一筆",
-                        stacklevel=2
-                    )
-                else:
-                    lookup[key] = (name, kana)
+        index = load_ext_index(csv_path)
     except Exception as e:
         warnings.warn(f"載入外部 CSV 失敗: {e}", stacklevel=2)
         return {}
 
-    return lookup
+    # 多筆武將能力值相同時彙整為一則警告
+    warn_duplicates(index, title)
+    return index.exact_lookup(title)
 
 # 身份名稱
 def get_status_name(b7):
@@ -246,6 +250,21 @@ def get_navy(b7):
     return b7 & 1
 
 
+def get_leader(b7):
+    """從 B7 bit1 取得統領旗標 (可傳入 int 或 numpy 陣列)"""
+    return (b7 >> 1) & 1
+
+
+def table_navy(table):
+    """parse_table 結果 → 水軍旗標陣列 (0/1)"""
+    return get_navy(table["b7_raw"])
+
+
+def table_roles(table):
+    """parse_table 結果 → 身份名稱陣列"""
+    return np.where(get_leader(table["b7_raw"]) == 1, "統領", "一般")
+
+
 def decode_halfwidth_kana(data):
     """
     解碼半角片假名 (Shift-JIS 0xA6-0xDF)
@@ -267,12 +286,47 @@ def decode_halfwidth_kana(data):
     return ''.join(result)
 
 
-def decode_kanji_tiles(data):
+def kanji_page_tile_map(rom_data, ext_names=None):
+    """
+    KANJI_TILE_MAP 各條目的 page 由姓名表引用決定 (kanji_glyphs.resolve_tile_pages)
+
+    參數:
+        ext_names: {武將序號: [EXT] 姓名}，兩頁都引用同一 ID 時用來判斷；
+                   None 時以 EXT_CSV_PATH (不存在時 EXT_CHAR_INFO) 比對
+
+    回傳: ({(page, tile): 漢字}, page 衝突 {tile: ...})
+    """
+    if ext_names is None:
+        ext_lookup = load_ext_char_info_from_csv(EXT_CSV_PATH)
+        ext_names = {c.index: c.ext_name for c in build_characters(rom_data, ext_lookup=ext_lookup)}
+    return resolve_tile_pages(KANJI_TILE_MAP, name_kanji_refs(rom_data), ext_names)
+
+
+def kanji_lookup(rom_data):
+    """
+    ROM 的 (page, tile) → 漢字查表陣列 (2, 256)
+
+    以字形 hash 分類 (kanji_glyphs.GlyphClasses)，圖形相同的 tile 共用同一漢字；
+    page 無法決定的 KANJI_TILE_MAP 條目不標記。每個 ROM 只建立一次。
+    """
+    return _kanji_lookup(bytes(rom_data))
+
+
+@functools.lru_cache(maxsize=4)
+def _kanji_lookup(rom_data):
+    page_tile_map, _ = kanji_page_tile_map(rom_data)
+    lookup, _ = GlyphClasses.from_rom(rom_data).label_lookup(page_tile_map)
+    return lookup
+
+
+def decode_kanji_tiles(data, lookup=None):
     """
     從姓名記錄的 metadata 解碼漢字 (tile ID → 漢字)
 
     參數:
         data: bytes, 姓名記錄 +8 到 +14 的 7 bytes
+        lookup: kanji_lookup() 的 (page, tile) 查表陣列；
+                None 時只以 tile ID 查 KANJI_TILE_MAP (忽略 page)
 
     回傳:
         str: 解碼後的漢字字串 (最多 3 字)
@@ -280,18 +334,22 @@ def decode_kanji_tiles(data):
     姓名記錄結構:
         +0-7:  假名 (8 bytes)
         +8:    第一個漢字 tile ID
-        +9:    未知
+        +9:    第一個漢字 Page
         +10:   第二個漢字 tile ID
-        +11:   未知
+        +11:   第二個漢字 Page
         +12:   第三個漢字 tile ID
-        +13-14: 未知
+        +13:   第三個漢字 Page
+        +14:   頭像索引 byte
     """
     kanji_chars = []
-    # tile ID 位於 offset 0, 2, 4 (相對於 +8 起始)
+    # tile ID 位於 offset 0, 2, 4 (相對於 +8 起始)，page 緊接其後
     for offset in [0, 2, 4]:
         if offset < len(data):
             tile_id = data[offset]
-            if tile_id in KANJI_TILE_MAP:
+            if lookup is not None:
+                page = 1 if offset + 1 < len(data) and data[offset + 1] else 0
+                kanji_chars.append(lookup[page, tile_id])
+            elif tile_id in KANJI_TILE_MAP:
                 kanji_chars.append(KANJI_TILE_MAP[tile_id])
     return ''.join(kanji_chars)
 
@@ -316,20 +374,16 @@ def load_rom_names(rom_data):
         +13:   漢字3 Page
         +14:   頭像索引 byte (portrait_index = byte - 1)
     """
+    # 漢字以 (page, tile) 查表陣列一次解碼
+    refs = name_kanji_refs(rom_data)
+    kanji = decode_name_kanji(refs, kanji_lookup(rom_data))
     names = []
-    for i in range(257):  # 256 武將 + 1 新君主模板
+    for i in range(len(kanji)):  # 256 武將 + 1 新君主模板
         offset = NAME_TABLE_ADDR + i * NAME_RECORD_SIZE
-        if offset + NAME_RECORD_SIZE > len(rom_data):
-            break
         # 假名 (前 8 bytes)
-        kana_bytes = rom_data[offset:offset + NAME_DATA_SIZE]
-        kana = decode_halfwidth_kana(kana_bytes)
-        # 漢字 tile IDs (後 7 bytes: +8 到 +14)
-        kanji_bytes = rom_data[offset + NAME_DATA_SIZE:offset + NAME_RECORD_SIZE]
-        kanji = decode_kanji_tiles(kanji_bytes)
+        kana = decode_halfwidth_kana(rom_data[offset:offset + NAME_DATA_SIZE])
         # 頭像索引 byte (+14)
-        portrait_byte = rom_data[offset + 14]
-        names.append((kana, kanji, portrait_byte))
+        names.append((kana, kanji[i], rom_data[offset + 14]))
     return names
 
 
@@ -393,30 +447,224 @@ CSV_FIELDS = [
 ]
 
 
+def parse_table(rom_data, offset=TABLE_DATA_ADDR, count=MAX_RECORDS):
+    """
+    將武將資料表解析為 CHAR_DTYPE structured array (零複製)
+
+    參數:
+        rom_data: bytes, ROM 資料
+        offset: 表格起始偏移
+        count: 最多讀取筆數
+
+    回傳:
+        np.ndarray (dtype=CHAR_DTYPE)；在第一筆分隔符不符或資料不足處截斷，
+        offset 超出範圍時為空陣列
+    """
+    if not 0 <= offset <= len(rom_data):
+        return np.empty(0, dtype=CHAR_DTYPE)
+    count = min(count, max(0, (len(rom_data) - offset) // RECORD_TOTAL_SIZE))
+    table = np.frombuffer(rom_data, dtype=CHAR_DTYPE, count=count, offset=offset)
+    raw = np.frombuffer(rom_data, dtype=np.uint8, count=count * RECORD_TOTAL_SIZE,
+                        offset=offset).reshape(count, RECORD_TOTAL_SIZE)
+    sep = np.frombuffer(RECORD_SEP, dtype=np.uint8)
+    invalid = np.flatnonzero((raw[:, RECORD_DATA_SIZE:] != sep).any(axis=1))
+    if len(invalid):
+        table = table[:invalid[0]]
+    return table
+
+
+def table_records(table):
+    """parse_table 結果 → 記錄 dict 列表 (欄位一次轉為 list，避免逐筆存取 numpy 純量)"""
+    columns = {name: table[name].tolist() for name in STAT_FIELDS}
+    navy = table_navy(table).tolist()
+    roles = table_roles(table).tolist()
+    raw = table.tobytes()
+    records = []
+    for i in range(len(table)):
+        rec = {name: columns[name][i] for name in STAT_FIELDS}
+        rec["navy"] = navy[i]
+        rec["role"] = roles[i]
+        start = i * RECORD_TOTAL_SIZE
+        rec["raw"] = raw[start:start + RECORD_DATA_SIZE]
+        records.append(rec)
+    return records
+
+
 def parse_record(rom_data, offset):
-    if offset + RECORD_TOTAL_SIZE > len(rom_data):
-        return None
-    rec = rom_data[offset:offset + RECORD_DATA_SIZE]
-    sep = rom_data[offset + RECORD_DATA_SIZE:offset + RECORD_TOTAL_SIZE]
-    if sep != RECORD_SEP:
+    table = parse_table(rom_data, offset, 1)
+    if len(table) == 0:
         return None
-    age = struct.unpack('b', bytes([rec[0]]))[0]
-    return {
-        "age":          age,
-        "body":         rec[1],
-        "intelligence": rec[2],
-        "military":     rec[3],
-        "charisma":     rec[4],
-        "luck":         rec[5],
-        "loyalty":      rec[6],
-        "b7_raw":       rec[7],
-        "navy":         get_navy(rec[7]),
-        "role":         get_role_name(rec[7]),
-        "troops":       rec[8] + rec[9] * 256,
-        "city":         rec[10],
-        "faction":      rec[11],
-        "raw":          rec,
-    }
+    return table_records(table)[0]
+
+
+# 各能力值欄位在 17-byte 記錄內的位元組偏移 (age 與 troops 另行處理)
+_BYTE_FIELDS = {
+    "body": 1, "intelligence": 2, "military": 3, "charisma": 4, "luck": 5,
+    "loyalty": 6, "b7_raw": 7, "city": 10, "faction": 11,
+}
+_UNSET = object()
+
+
+class Character:
+    """
+    單筆武將記錄
+
+    只保存共用 ROM 緩衝區與偏移；能力值直接從 ROM 讀取，
+    假名/漢字/EXT 姓名在第一次存取時才解碼並快取。
+    支援 rec["military"] 形式的存取 (相容 export_csv / export_xlsx)。
+
+    ext_distance: EXT 姓名的能力值距離 (0 = 完全相符, None = 未比對到外部 CSV)
+    """
+
+    __slots__ = ("_rom", "_ext_lookup", "index", "offset", "_kana", "_kanji", "_ext",
+                 "ext_distance")
+
+    def __init__(self, rom, index, offset=None, ext_lookup=None):
+        self._rom = rom
+        self._ext_lookup = ext_lookup
+        self.index = index
+        self.offset = TABLE_DATA_ADDR + index * RECORD_TOTAL_SIZE if offset is None else offset
+        self._kana = _UNSET
+        self._kanji = _UNSET
+        self._ext = _UNSET
+        self.ext_distance = None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __getattr__(self, name):
+        # B1-B7, B10, B11: 單一 unsigned byte
+        if name in _BYTE_FIELDS:
+            return self._rom[self.offset + _BYTE_FIELDS[name]]
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return f"Character({self.index}, offset=0x{self.offset:05X})"
+
+    # ─── ROM 武將資料 ───
+    @property
+    def age(self):
+        b = self._rom[self.offset]
+        return b - 256 if b >= 0x80 else b
+
+    @property
+    def troops(self):
+        return self._rom[self.offset + 8] | (self._rom[self.offset + 9] << 8)
+
+    @property
+    def navy(self):
+        return get_navy(self.b7_raw)
+
+    @property
+    def role(self):
+        return get_role_name(self.b7_raw)
+
+    @property
+    def raw(self):
+        return self._rom[self.offset:self.offset + RECORD_DATA_SIZE]
+
+    # ─── 姓名表 (延遲解碼) ───
+    @property
+    def name_offset(self):
+        """姓名表記錄偏移；超出 ROM 時為 None"""
+        offset = NAME_TABLE_ADDR + self.index * NAME_RECORD_SIZE
+        return offset if offset + NAME_RECORD_SIZE <= len(self._rom) else None
+
+    @property
+    def rom_kana(self):
+        if self._kana is _UNSET:
+            offset = self.name_offset
+            self._kana = "" if offset is None else decode_halfwidth_kana(
+                self._rom[offset:offset + NAME_DATA_SIZE])
+        return self._kana
+
+    @property
+    def rom_kanji(self):
+        if self._kanji is _UNSET:
+            offset = self.name_offset
+            self._kanji = "" if offset is None else decode_kanji_tiles(
+                self._rom[offset + NAME_DATA_SIZE:offset + NAME_RECORD_SIZE],
+                kanji_lookup(self._rom))
+        return self._kanji
+
+    @property
+    def portrait(self):
+        offset = self.name_offset
+        return 0 if offset is None else get_portrait_index(self._rom[offset + 14])
+
+    @property
+    def arrangement(self):
+        if self.name_offset is None:
+            return "STD"
+        return get_arrangement_index(self.portrait)
+
+    # ─── 外部姓名 (延遲查詢) ───
+    def _ext_info(self):
+        if self._ext is _UNSET:
+            stats_key = (self.body, self.intelligence, self.military,
+                         self.charisma, self.luck)
+            if self._ext_lookup and stats_key in self._ext_lookup:
+                self._ext = self._ext_lookup[stats_key]
+                self.ext_distance = 0
+            else:
+                # 回退到靜態 EXT_CHAR_INFO (依序號)
+                self._ext = EXT_CHAR_INFO.get(self.index, ("", ""))
+        return self._ext
+
+    @property
+    def ext_name(self):
+        return self._ext_info()[0]
+
+    @property
+    def ext_kana(self):
+        return self._ext_info()[1]
+
+    def set_ext(self, name, kana, distance):
+        """指定 EXT 姓名 (近似比對結果)"""
+        self._ext = (name, kana)
+        self.ext_distance = distance
+
+
+def match_ext_nearest(characters, table, ext_lookup):
+    """
+    能力值不完全相符的武將，與尚未被使用的外部列做一對一近似指派 (stat_match)
+
+    回傳: 指派的筆數
+    """
+    if not ext_lookup:
+        return 0
+    stats = np.stack([table[f] for f in EXT_STAT_FIELDS], axis=1)
+    keys = [tuple(row) for row in stats.tolist()]
+    unmatched = [i for i, key in enumerate(keys) if key not in ext_lookup]
+    used = set(keys)
+    ext_keys = [key for key in ext_lookup if key not in used]
+    if not unmatched or not ext_keys:
+        return 0
+
+    pairs = assign_by_stats(stats[unmatched], np.array(ext_keys))
+    for row, col, distance in pairs:
+        name, kana = ext_lookup[ext_keys[col]]
+        characters[unmatched[row]].set_ext(name, kana, distance)
+    return len(pairs)
+
+
+def build_characters(rom, table=None, ext_lookup=None):
+    """
+    ROM → Character 列表，EXT 姓名含近似比對 (extract_all / character_query / name_search 共用)
+
+    參數:
+        table: parse_table(rom) 的結果 (可選，避免重複解析)
+    """
+    if table is None:
+        table = parse_table(rom)
+    # 名字表索引與武將索引相同
+    characters = [Character(rom, idx, ext_lookup=ext_lookup) for idx in range(len(table))]
+    # 能力值不完全相符者以近似比對補上姓名 (誤植、版本差異)
+    match_ext_nearest(characters, table, ext_lookup)
+    return characters
 
 
 def extract_all(rom_path, ext_csv_path=None):
@@ -428,7 +676,7 @@ def extract_all(rom_path, ext_csv_path=None):
         ext_csv_path: 外部 CSV 路徑 (可選，用於動態載入武將姓名)
 
     回傳:
-        武將記錄列表
+        Character 列表 (姓名等欄位延遲解碼)
     """
     with open(rom_path, "rb") as f:
         rom = f.read()
@@ -440,45 +688,8 @@ def extract_all(rom_path, ext_csv_path=None):
     if ext_csv_path:
         ext_lookup = load_ext_char_info_from_csv(ext_csv_path)
 
-    # 載入 ROM 中的假名姓名表
-    rom_names = load_rom_names(rom)
-
-    records = []
-    offset = TABLE_DATA_ADDR
-    for idx in range(MAX_RECORDS):
-        rec = parse_record(rom, offset)
-        if rec is None:
-            break
-        rec["index"] = idx
-        rec["offset"] = offset
-
-        # ROM 假名、漢字、頭像索引 (名字表索引與武將索引相同)
-        if idx < len(rom_names):
-            rec["rom_kana"] = rom_names[idx][0]
-            rec["rom_kanji"] = rom_names[idx][1]
-            portrait_byte = rom_names[idx][2]
-            rec["portrait"] = get_portrait_index(portrait_byte)
-            rec["arrangement"] = get_arrangement_index(rec["portrait"])
-        else:
-            rec["rom_kana"] = ""
-            rec["rom_kanji"] = ""
-            rec["portrait"] = 0
-            rec["arrangement"] = "STD"
-
-        # 先嘗試從外部 CSV 比對能力值
-        stats_key = (rec["body"], rec["intelligence"], rec["military"],
-                     rec["charisma"], rec["luck"])
-        if stats_key in ext_lookup:
-            name, kana = ext_lookup[stats_key]
-        else:
-            # 回退到靜態 EXT_CHAR_INFO (依序號)
-            name, kana = EXT_CHAR_INFO.get(idx, ("", ""))
-
-        rec["ext_name"] = name
-        rec["ext_kana"] = kana
-        records.append(rec)
-        offset += RECORD_TOTAL_SIZE
-    return records
+    # 分隔符驗證以整欄向量化完成；記錄本身只保存偏移
+    return build_characters(rom, ext_lookup=ext_lookup)
 
 
 def export_csv(records, output_path):
@@ -513,13 +724,105 @@ def export_csv(records, output_path):
     print(f"已匯出 {len(records)} 筆 → {output_path}")
 
 
+def export_columnar(rom_data, output_dir, table=None):
+    """
+    欄式匯出 (見 columnar.py；命令列以 --columnar 啟用)
+
+    table: parse_table(rom_data) 的結果 (可選，避免重複解析)
+
+    輸出:
+        <dir>/characters/*.npy  武將資料表各欄 (與 CHAR_DTYPE 同型別)
+        <dir>/names/*.npy       姓名表各欄 (假名/漢字字串、漢字 tile/page、頭像 byte)
+        <dir>/portraits.npz     bank: (255, 48, 48) 頭像調色盤索引
+        <dir>/glyphs.npz        kanji: (2, 256, 16, 16) 漢字字型 (page 0/1)
+    """
+    from columnar import write_columns, write_tensors
+    from portrait_bank import load_portrait_bank
+    from kanji_glyphs import decode_kanji_pages
+
+    if table is None:
+        table = parse_table(rom_data)
+    count = len(table)
+    columns = {name: table[name] for name in STAT_FIELDS}
+    columns["index"] = np.arange(count, dtype=np.uint16)
+    columns["offset"] = TABLE_DATA_ADDR + np.arange(count, dtype=np.uint32) * RECORD_TOTAL_SIZE
+    columns["navy"] = table_navy(table)
+    columns["leader"] = get_leader(table["b7_raw"])
+    write_columns(os.path.join(output_dir, "characters"), columns)
+
+    names = load_rom_names(rom_data)
+    name_bytes = np.frombuffer(rom_data, dtype=np.uint8, count=len(names) * NAME_RECORD_SIZE,
+                               offset=NAME_TABLE_ADDR).reshape(len(names), NAME_RECORD_SIZE)
+    name_columns = {
+        "index": np.arange(len(names), dtype=np.uint16),
+        "kana": np.array([n[0] for n in names], dtype=f"U{NAME_DATA_SIZE}"),
+        "kanji": np.array([n[1] for n in names], dtype="U3"),
+    }
+    for i in range(3):
+        name_columns[f"kanji_tile{i + 1}"] = name_bytes[:, NAME_DATA_SIZE + i * 2]
+        name_columns[f"kanji_page{i + 1}"] = name_bytes[:, NAME_DATA_SIZE + i * 2 + 1]
+    name_columns["portrait_byte"] = name_bytes[:, 14]
+    write_columns(os.path.join(output_dir, "names"), name_columns)
+
+    write_tensors(os.path.join(output_dir, "portraits.npz"), bank=load_portrait_bank(rom_data))
+    write_tensors(os.path.join(output_dir, "glyphs.npz"), kanji=decode_kanji_pages(rom_data))
+    print(f"已匯出欄式資料 ({count} 筆武將、{len(names)} 筆姓名) → {output_dir}")
+
+
+# XLSX 背景色 (身份・水軍)
+XLSX_ROW_FILLS = {
+    "leader": "FFF2CC",
+    "navy":   "D6EAF8",
+    "both":   "D5F5E3",
+}
+
+
+def _register_xlsx_styles(wb):
+    """
+    預先註冊 NamedStyle，儲存格只引用樣式名稱
+
+    回傳: {(kind, bg): 樣式名稱}；kind 為 data / left / ext / mono / neg，bg 為 None 或 XLSX_ROW_FILLS 的鍵
+    """
+    from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+
+    thin_border = Border(bottom=Side(style="thin", color="D0D0D0"))
+    center = Alignment(horizontal="center")
+    left = Alignment(horizontal="left")
+    kinds = {
+        "data": (Font(name="Arial", size=10), center),
+        "left": (Font(name="Arial", size=10), left),                      # ROM假名, ROM漢字
+        "ext":  (Font(name="Arial", size=10, color="1A5276"), left),      # [EXT]姓名, [EXT]假名
+        "mono": (Font(name="Consolas", size=9, color="666666"), left),    # Raw Hex
+        "neg":  (Font(name="Arial", size=10, color="CC0000"), center),    # 負年齡
+    }
+
+    hdr_font = Font(name="Arial", bold=True, color="FFFFFF", size=10)
+    hdr_align = Alignment(horizontal="center", vertical="center")
+    for name, color in (("header", "4472C4"), ("header_ext", "2E75B6")):  # 外部欄位用深藍
+        wb.add_named_style(NamedStyle(name=name, font=hdr_font, alignment=hdr_align,
+                                      fill=PatternFill("solid", fgColor=color)))
+
+    styles = {}
+    for kind, (font, alignment) in kinds.items():
+        for bg in (None, *XLSX_ROW_FILLS):
+            name = kind if bg is None else f"{kind}_{bg}"
+            style = NamedStyle(name=name, font=font, alignment=alignment, border=thin_border)
+            if bg is not None:
+                style.fill = PatternFill("solid", fgColor=XLSX_ROW_FILLS[bg])
+            wb.add_named_style(style)
+            styles[(kind, bg)] = name
+    return styles
+
+
 def export_xlsx(records, output_path):
     from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "武將資料"
+    # write-only: 逐列串流寫出，記憶體不隨列數成長
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("武將資料")
+    styles = _register_xlsx_styles(wb)
 
     headers = [
         ("序號", 5),  ("偏移", 9),   ("ROM假名", 12),  ("ROM漢字", 10),
@@ -530,41 +833,35 @@ def export_xlsx(records, output_path):
         ("水軍", 5),  ("身份", 10),  ("兵士", 8),       ("城市", 5),
         ("勢力", 5),  ("Raw Hex", 38),
     ]
+    # 各欄樣式種類: ROM假名(3), ROM漢字(4), [EXT]姓名(5), [EXT]假名(6), Raw Hex(22)
+    column_kinds = ["data"] * len(headers)
+    column_kinds[2] = column_kinds[3] = "left"
+    column_kinds[4] = column_kinds[5] = "ext"
+    column_kinds[21] = "mono"
+    AGE_COLUMN = 8
+
+    for col, (_, width) in enumerate(headers, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    ws.freeze_panes = "A2"
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(records) + 1}"
 
-    hdr_font = Font(name="Arial", bold=True, color="FFFFFF", size=10)
-    hdr_fill = PatternFill("solid", fgColor="4472C4")
-    ext_fill = PatternFill("solid", fgColor="2E75B6")  # 外部欄位用深藍
-    hdr_align = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(bottom=Side(style="thin", color="D0D0D0"))
+    header_cells = []
+    for name, _ in headers:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.style = "header_ext" if name.startswith("[EXT]") else "header"
+        header_cells.append(cell)
+    ws.append(header_cells)
 
-    for col, (name, width) in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=name)
-        cell.font = hdr_font
-        cell.fill = ext_fill if name.startswith("[EXT]") else hdr_fill
-        cell.alignment = hdr_align
-        ws.column_dimensions[cell.column_letter].width = width
-
-    # 條件色
-    leader_fill = PatternFill("solid", fgColor="FFF2CC")
-    navy_fill   = PatternFill("solid", fgColor="D6EAF8")
-    both_fill   = PatternFill("solid", fgColor="D5F5E3")
-    data_font   = Font(name="Arial", size=10)
-    mono_font   = Font(name="Consolas", size=9, color="666666")
-    ext_font    = Font(name="Arial", size=10, color="1A5276")
-    center      = Alignment(horizontal="center")
-    neg_font    = Font(name="Arial", size=10, color="CC0000")
-
-    for i, r in enumerate(records):
-        row = i + 2
+    for r in records:
         is_navy   = r["navy"]
-        is_leader = (r["b7_raw"] >> 1) & 1
+        is_leader = get_leader(r["b7_raw"])
         bg = None
         if is_leader and is_navy:
-            bg = both_fill
+            bg = "both"
         elif is_leader:
-            bg = leader_fill
+            bg = "leader"
         elif is_navy:
-            bg = navy_fill
+            bg = "navy"
 
         values = [
             r["index"],
@@ -591,38 +888,28 @@ def export_xlsx(records, output_path):
             " ".join(f"{b:02X}" for b in r["raw"]),
         ]
 
-        for col, val in enumerate(values, 1):
-            cell = ws.cell(row=row, column=col, value=val)
-            cell.border = thin_border
-            # 左對齊: ROM假名(3), ROM漢字(4), [EXT]姓名(5), [EXT]假名(6), Raw Hex(22)
-            cell.alignment = center if col not in (3, 4, 5, 6, 22) else Alignment(horizontal="left")
-            # 字型
-            if col == 22:  # Raw Hex
-                cell.font = mono_font
-            elif col in (3, 4):  # ROM假名, ROM漢字
-                cell.font = data_font
-            elif col in (5, 6):  # [EXT]姓名, [EXT]假名
-                cell.font = ext_font
-            elif col == 9 and isinstance(val, int) and val < 0:  # 年齡 (負值, 現在是第9欄)
-                cell.font = neg_font
-            else:
-                cell.font = data_font
-            # 背景
-            if bg:
-                cell.fill = bg
+        row = []
+        for col, val in enumerate(values):
+            kind = column_kinds[col]
+            if col == AGE_COLUMN and isinstance(val, int) and val < 0:
+                kind = "neg"
+            cell = WriteOnlyCell(ws, value=val)
+            cell.style = styles[(kind, bg)]
+            row.append(cell)
+        ws.append(row)
 
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = ws.dimensions
     wb.save(output_path)
     print(f"已匯出 {len(records)} 筆 → {output_path}")
 
 
 if __name__ == "__main__":
-    rom_path = sys.argv[1] if len(sys.argv) > 1 else "Sangokushi__Japan_.nes"
+    args = [a for a in sys.argv[1:] if a != "--columnar"]
+    columnar = "--columnar" in sys.argv[1:]
+    rom_path = args[0] if args else "Sangokushi__Japan_.nes"
 
     if not os.path.exists(rom_path):
         print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
-        print(f"用法: python {sys.argv[0]} <rom_file.nes>")
+        print(f"用法: python {sys.argv[0]} <rom_file.nes> [--columnar]")
         sys.exit(1)
 
     # 決定外部 CSV 路徑 (同目錄下尋找)
@@ -632,19 +919,31 @@ if __name__ == "__main__":
         ext_csv_path = None
         print(f"提示: 未找到外部 CSV '{EXT_CSV_PATH}'，使用靜態姓名資料")
 
-    records = extract_all(rom_path, ext_csv_path)
+    # ROM 只讀取、解析一次，供記錄、統計與欄式匯出共用
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    if rom[:4] != b"NES\x1a":
+        print("錯誤: 非有效的 iNES ROM 檔案")
+        sys.exit(1)
+    table = parse_table(rom)
+    ext_lookup = load_ext_char_info_from_csv(ext_csv_path) if ext_csv_path else {}
+    records = build_characters(rom, table, ext_lookup)
 
-    navy_count   = sum(1 for r in records if r["navy"])
-    leader_count = sum(1 for r in records if (r["b7_raw"] >> 1) & 1)
-    named_count  = sum(1 for r in records if r["ext_name"])
+    # 統計以整欄計算 (完整報表見 scenario_report.py)
+    navy_count   = int(table_navy(table).sum())
+    leader_count = int(get_leader(table["b7_raw"]).sum())
+    named_count  = sum(1 for r in records if r.ext_name)
+    near_count   = sum(1 for r in records if r.ext_distance)
 
     print(f"解析完成: 共 {len(records)} 筆武將記錄")
     print(f"  水軍: {navy_count} 人 / 非水軍: {len(records) - navy_count} 人")
     print(f"  統領: {leader_count} 人 (君主+軍師)")
-    print(f"  已知姓名: {named_count} 人 (外部提供)")
+    print(f"  已知姓名: {named_count} 人 (外部提供，其中近似比對 {near_count} 人)")
 
     base = os.path.splitext(os.path.basename(rom_path))[0]
     export_csv(records, f"{base}_characters_v2.csv")
+    if columnar:
+        export_columnar(rom, f"{base}_columns", table)
 
     try:
         import openpyxl
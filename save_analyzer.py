@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+存檔 / RAM dump 武將資料分析
+
+在電池存檔 (.sav / .srm)、模擬器 RAM dump 或 gzip 壓縮的即時存檔中，
+以 ROM 初始武將資料表為特徵找出武將資料的副本，用與 parse_table 相同的
+structured dtype 解碼，並與 ROM 初始值比對差異。
+
+定位方式:
+  1. 每筆記錄的 B1-B4 (體力/智力/武力/魅力) 遊戲中不變，作為 4-byte 特徵
+  2. 在檔案中所有位置取 4-byte 視窗 (sliding window)，查出符合第 i 筆特徵的位置 p
+  3. 對每種記錄長度 (17 = 含分隔符、12 = 不含) 投票: 起點 = p - 1 - i × 長度
+  4. 票數最高且達 MIN_MATCHED 筆者即為資料表位置
+
+多個存檔先以 process pool 平行讀取與定位，再把所有存檔的資料表疊成
+(存檔數, 256) 陣列，一次向量化算出所有欄位的差異。
+
+使用方法:
+    python save_analyzer.py <rom_file.nes> <存檔|目錄> ... [options]
+
+選項:
+    --output FILE     - 各存檔摘要 CSV (預設 save_summary.csv)
+    --changes FILE    - 逐欄差異 CSV (存檔, 武將, 欄位, ROM 值, 存檔值)
+    --workers N       - process 數 (預設 CPU 核心數)
+
+範例:
+    python save_analyzer.py "Sangokushi (Japan).nes" saves/ --changes changes.csv
+"""
+
+import sys
+import os
+import csv
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sangokushi_extract_v2 import (
+    CHAR_DTYPE,
+    MAX_RECORDS,
+    RECORD_DATA_SIZE,
+    RECORD_TOTAL_SIZE,
+    STAT_FIELDS,
+    parse_table,
+)
+
+SAVE_EXTENSIONS = (".sav", ".srm", ".ram", ".bin", ".dmp", ".gz")
+SIGNATURE_OFFSET = 1     # B1
+SIGNATURE_SIZE = 4       # B1-B4
+RECORD_STRIDES = (RECORD_TOTAL_SIZE, RECORD_DATA_SIZE)
+MIN_MATCHED = 64
+
+# 不含分隔符的 12-byte 記錄 (欄位與 CHAR_DTYPE 相同)
+CHAR_DATA_DTYPE = np.dtype({
+    "names": STAT_FIELDS,
+    "formats": [CHAR_DTYPE.fields[name][0] for name in STAT_FIELDS],
+    "offsets": [CHAR_DTYPE.fields[name][1] for name in STAT_FIELDS],
+    "itemsize": RECORD_DATA_SIZE,
+})
+SUMMARY_FIELDS = ["file", "offset", "stride", "matched", "records", "changed_records"] + STAT_FIELDS
+
+
+def read_save(path):
+    """讀取存檔；gzip 壓縮 (FCEUX 即時存檔等) 自動解壓"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data
+
+
+def iter_save_paths(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, n) for n in sorted(os.listdir(item))
+                         if n.lower().endswith(SAVE_EXTENSIONS))
+        else:
+            paths.append(item)
+    return paths
+
+
+def signature_keys(table):
+    """每筆記錄 B1-B4 的 4-byte 特徵 (uint32)"""
+    raw = np.stack([table[f] for f in STAT_FIELDS[1:1 + SIGNATURE_SIZE]], axis=1)
+    return raw.astype(np.uint8).copy().view("<u4").ravel()
+
+
+def locate_table(data, keys):
+    """
+    找出存檔中的武將資料表
+
+    參數:
+        data: 存檔 bytes
+        keys: signature_keys(ROM 資料表)
+
+    回傳: (offset, stride, matched)；找不到時 offset 為 None
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if len(buf) < SIGNATURE_SIZE:
+        return None, None, 0
+    windows = np.lib.stride_tricks.sliding_window_view(buf, SIGNATURE_SIZE)
+    window_keys = np.ascontiguousarray(windows).view("<u4").ravel()
+
+    # 特徵 → 記錄索引 (重複的特徵只保留第一筆)
+    uniq, first = np.unique(keys, return_index=True)
+    pos = np.searchsorted(uniq, window_keys)
+    pos[pos == len(uniq)] = 0
+    hit = np.flatnonzero(uniq[pos] == window_keys)
+    records = first[pos[hit]]
+
+    best = (None, None, 0)
+    for stride in RECORD_STRIDES:
+        starts = hit - SIGNATURE_OFFSET - records * stride
+        valid = starts >= 0
+        if not valid.any():
+            continue
+        votes = np.bincount(starts[valid])
+        start = int(votes.argmax())
+        if votes[start] > best[2]:
+            best = (start, stride, int(votes[start]))
+    if best[2] < MIN_MATCHED:
+        return None, None, best[2]
+    return best
+
+
+def decode_table(data, offset, stride, count=MAX_RECORDS):
+    """以 CHAR_DTYPE (17) 或 CHAR_DATA_DTYPE (12) 解碼，回傳只含 STAT_FIELDS 的陣列"""
+    dtype = CHAR_DTYPE if stride == RECORD_TOTAL_SIZE else CHAR_DATA_DTYPE
+    count = min(count, (len(data) - offset) // stride)
+    table = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    out = np.zeros(MAX_RECORDS, dtype=CHAR_DATA_DTYPE)
+    for name in STAT_FIELDS:
+        out[name][:count] = table[name]
+    return out, count
+
+
+# worker 內的共用狀態 (由 _init_worker 設定)
+_keys = None
+
+
+def _init_worker(keys):
+    global _keys
+    _keys = keys
+
+
+def analyze_one(path):
+    """讀取、定位、解碼單一存檔 (在 process pool 中執行)"""
+    data = read_save(path)
+    offset, stride, matched = locate_table(data, _keys)
+    if offset is None:
+        return path, None, None, matched, None, 0
+    table, count = decode_table(data, offset, stride)
+    return path, offset, stride, matched, table, count
+
+
+def analyze_saves(paths, baseline, workers=None):
+    """
+    平行分析多個存檔並與 ROM 初始資料表比對
+
+    回傳: (results, changed, tables)
+        results: [(path, offset, stride, matched, count)]，順序同 paths；
+                 count 為實際解碼的筆數 (檔案在資料表中途結束時少於 256)
+        changed: {field: (存檔數, 256) bool 陣列}；只比較前 count 筆，
+                 未找到資料表的存檔整列為 False
+        tables: (存檔數, 256) 解碼後的資料表
+    """
+    keys = signature_keys(baseline)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(keys,)) as pool:
+        outputs = list(pool.map(analyze_one, paths,
+                                chunksize=max(1, len(paths) // (workers * 4))))
+
+    tables = np.zeros((len(paths), MAX_RECORDS), dtype=CHAR_DATA_DTYPE)
+    counts = np.zeros(len(paths), dtype=np.int64)
+    results = []
+    for i, (path, offset, stride, matched, table, count) in enumerate(outputs):
+        results.append((path, offset, stride, matched, count))
+        if table is not None:
+            tables[i] = table
+            counts[i] = count
+    valid = np.arange(MAX_RECORDS)[None, :] < np.minimum(counts, len(baseline))[:, None]
+
+    # 所有存檔 × 所有欄位一次比較
+    base = np.zeros(MAX_RECORDS, dtype=CHAR_DATA_DTYPE)
+    for name in STAT_FIELDS:
+        base[name][:len(baseline)] = baseline[name]
+    changed = {name: (tables[name] != base[name][None, :]) & valid
+               for name in STAT_FIELDS}
+    return results, changed, tables
+
+
+def summary_rows(results, changed):
+    any_changed = np.logical_or.reduce([changed[name] for name in STAT_FIELDS])
+    rows = []
+    for i, (path, offset, stride, matched, count) in enumerate(results):
+        row = {
+            "file": path,
+            "offset": f"0x{offset:05X}" if offset is not None else "",
+            "stride": stride or "",
+            "matched": matched,
+            "records": count,
+            "changed_records": int(any_changed[i].sum()),
+        }
+        row.update({name: int(changed[name][i].sum()) for name in STAT_FIELDS})
+        rows.append(row)
+    return rows
+
+
+def change_rows(results, changed, tables, baseline):
+    """逐欄差異 (長格式)"""
+    for name in STAT_FIELDS:
+        saves, records = np.nonzero(changed[name])
+        for s, r in zip(saves.tolist(), records.tolist()):
+            yield {
+                "file": results[s][0],
+                "index": r,
+                "field": name,
+                "rom": int(baseline[name][r]),
+                "save": int(tables[name][s, r]),
+            }
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = sys.argv[1]
+    inputs = []
+    output_path = "save_summary.csv"
+    changes_path = None
+    workers = None
+
+    i = 2
+    while i < len(sys.argv):
+        if sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--changes" and i + 1 < len(sys.argv):
+            changes_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--workers" and i + 1 < len(sys.argv):
+            workers = int(sys.argv[i + 1])
+            i += 2
+        else:
+            inputs.append(sys.argv[i])
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+    paths = iter_save_paths(inputs)
+    if not paths:
+        print("錯誤: 沒有找到任何存檔")
+        sys.exit(1)
+
+    with open(rom_path, "rb") as f:
+        baseline = parse_table(f.read())
+
+    print(f"分析 {len(paths)} 個存檔...")
+    results, changed, tables = analyze_saves(paths, baseline, workers)
+    rows = summary_rows(results, changed)
+
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"找到資料表: {sum(1 for r in results if r[1] is not None)} / {len(results)}")
+    partial = [r for r in results if r[1] is not None and r[4] < MAX_RECORDS]
+    if partial:
+        print(f"  其中 {len(partial)} 個存檔的資料表不完整，只比較前 records 筆")
+    print(f"已輸出: {output_path}")
+
+    if changes_path:
+        with open(changes_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=["file", "index", "field", "rom", "save"])
+            writer.writeheader()
+            writer.writerows(change_rows(results, changed, tables, baseline))
+        print(f"已輸出: {changes_path}")
+
+
+if __name__ == "__main__":
+    main()
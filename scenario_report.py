@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+劇本統計報表 (依勢力 / 城市)
+
+以 parse_table 的 structured array 為基礎，np.bincount 一次算出每組的:
+  武將數、兵士合計、水軍人數與比例、統領人數、未出生人數 (年齡 < 0)、
+  各能力值平均與最大值
+
+多個 ROM 會串接成一個表，以 (ROM, 分組) 組合鍵一次 bincount，不逐 ROM 重算。
+
+使用方法:
+    python scenario_report.py <rom.nes|目錄> ... [options]
+
+選項:
+    --by faction|city   - 分組欄位 (預設 faction)
+    --output FILE       - 輸出檔 (.csv / .json / .md，預設輸出 Markdown 到 stdout)
+
+範例:
+    python scenario_report.py "Sangokushi (Japan).nes" --by city --output city.csv
+    python scenario_report.py roms/ --output factions.md
+"""
+
+import sys
+import os
+import csv
+import json
+
+import numpy as np
+
+from sangokushi_extract_v2 import get_leader, get_navy, parse_table
+
+GROUP_FIELDS = ("faction", "city")
+MEAN_MAX_FIELDS = ["body", "intelligence", "military", "charisma", "luck", "loyalty"]
+REPORT_FIELDS = (
+    ["rom", "group", "officers", "troops", "navy", "navy_share", "leaders", "unborn"]
+    + [f"{f}_mean" for f in MEAN_MAX_FIELDS]
+    + [f"{f}_max" for f in MEAN_MAX_FIELDS]
+)
+
+
+def iter_rom_paths(inputs):
+    """展開輸入的檔案與目錄 (目錄下所有 .nes)"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, n) for n in sorted(os.listdir(item))
+                         if n.lower().endswith(".nes"))
+        else:
+            paths.append(item)
+    return paths
+
+
+def load_corpus(rom_paths):
+    """
+    讀取多個 ROM 的武將資料表並串接
+
+    回傳: (table, rom_ids, names)；rom_ids[i] 為第 i 筆記錄所屬 ROM 的序號
+    """
+    tables, ids, names = [], [], []
+    for rom_id, path in enumerate(rom_paths):
+        with open(path, "rb") as f:
+            table = parse_table(f.read())
+        tables.append(table)
+        ids.append(np.full(len(table), rom_id, dtype=np.int64))
+        names.append(os.path.basename(path))
+    if not tables:
+        return parse_table(b""), np.zeros(0, dtype=np.int64), names
+    return np.concatenate(tables), np.concatenate(ids), names
+
+
+def aggregate(table, rom_ids, by="faction", rom_count=1):
+    """
+    依 (ROM, 分組欄位) 彙總
+
+    回傳: dict of 陣列，每個元素為一組 (只保留有武將的組)
+    """
+    groups = table[by].astype(np.int64)
+    group_count = int(groups.max()) + 1 if len(groups) else 1
+    key = rom_ids * group_count + groups
+    size = rom_count * group_count
+
+    def total(weights=None):
+        return np.bincount(key, weights=weights, minlength=size)
+
+    officers = total()
+    present = np.flatnonzero(officers)
+    n = officers[present]
+    navy = total(get_navy(table["b7_raw"]).astype(np.float64))[present]
+
+    result = {
+        "rom": present // group_count,
+        "group": present % group_count,
+        "officers": n.astype(np.int64),
+        "troops": total(table["troops"].astype(np.float64))[present].astype(np.int64),
+        "navy": navy.astype(np.int64),
+        "navy_share": navy / n,
+        "leaders": total(get_leader(table["b7_raw"]).astype(np.float64))[present].astype(np.int64),
+        "unborn": total((table["age"] < 0).astype(np.float64))[present].astype(np.int64),
+    }
+    for field in MEAN_MAX_FIELDS:
+        values = table[field].astype(np.int64)
+        result[f"{field}_mean"] = total(values.astype(np.float64))[present] / n
+        maxima = np.zeros(size, dtype=np.int64)
+        np.maximum.at(maxima, key, values)
+        result[f"{field}_max"] = maxima[present]
+    return result
+
+
+def report_rows(result, rom_names):
+    rows = []
+    for i in range(len(result["group"])):
+        row = {}
+        for field in REPORT_FIELDS:
+            value = result[field][i]
+            if field == "rom":
+                row[field] = rom_names[int(value)]
+            elif isinstance(value, np.floating):
+                row[field] = round(float(value), 3)
+            else:
+                row[field] = int(value)
+        rows.append(row)
+    return rows
+
+
+def write_csv(rows, output_path):
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(rows, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+def format_markdown(rows, by="faction"):
+    headers = ["ROM", by, "武將", "兵士", "水軍", "水軍比", "統領", "未出生"]
+    headers += [f"{f[:3]}均/最大" for f in MEAN_MAX_FIELDS]
+    lines = ["| " + " | ".join(headers) + " |",
+             "|" + "|".join("---" for _ in headers) + "|"]
+    for r in rows:
+        cells = [r["rom"], r["group"], r["officers"], r["troops"], r["navy"],
+                 f"{r['navy_share']:.0%}", r["leaders"], r["unborn"]]
+        cells += [f"{r[f + '_mean']:.1f}/{r[f + '_max']}" for f in MEAN_MAX_FIELDS]
+        lines.append("| " + " | ".join(str(c) for c in cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    inputs = []
+    by = "faction"
+    output_path = None
+
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == "--by" and i + 1 < len(sys.argv):
+            by = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        else:
+            inputs.append(sys.argv[i])
+            i += 1
+
+    if by not in GROUP_FIELDS:
+        print(f"錯誤: --by 必須是 {' 或 '.join(GROUP_FIELDS)}")
+        sys.exit(1)
+    rom_paths = iter_rom_paths(inputs)
+    missing = [p for p in rom_paths if not os.path.exists(p)]
+    if not rom_paths or missing:
+        print(f"錯誤: 找不到 ROM 檔案 {missing or inputs}")
+        sys.exit(1)
+
+    table, rom_ids, names = load_corpus(rom_paths)
+    rows = report_rows(aggregate(table, rom_ids, by, len(names)), names)
+
+    if output_path is None:
+        print(format_markdown(rows, by), end="")
+    elif output_path.lower().endswith(".csv"):
+        write_csv(rows, output_path)
+    elif output_path.lower().endswith(".json"):
+        write_json(rows, output_path)
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(format_markdown(rows, by))
+    if output_path:
+        print(f"已輸出 {len(rows)} 組 ({len(names)} 個 ROM) → {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+武將資料 SQLite 匯出
+
+將 ROM 解析結果寫入正規化的 SQLite 資料庫，供任何語言以 SQL 直接查詢:
+
+  characters     武將能力值 (一列一武將)，索引: faction, city, portrait
+  names          姓名表 (ROM 假名、ROM 漢字、EXT 姓名/假名、頭像 byte)
+  portraits      頭像 (0-254)，標準頭像的排列索引 / 大眾臉的組件表列
+  mob_components 大眾臉組件索引表 (read_component_table)
+  kanji_tiles    姓名表漢字 tile 使用情況 (武將, 位置, tile, page, 漢字)
+  names_fts      假名/漢字/EXT 姓名全文檢索 (FTS5；不支援時略過並警告)
+                 姓名多為 1-3 字，故以「逐字空白分隔」寫入，每個字即一個 token；
+                 多字查詢使用片語 (fts_query("劉備") → '"劉 備"')
+
+使用方法:
+    python sqlite_export.py <rom_file.nes> [output.db]
+
+範例:
+    python sqlite_export.py "Sangokushi (Japan).nes" sangokushi.db
+    sqlite3 sangokushi.db "SELECT idx, military FROM characters WHERE faction = 3 ORDER BY troops DESC"
+    sqlite3 sangokushi.db "SELECT rowid, kanji FROM names_fts WHERE names_fts MATCH '\"劉 備\"'"
+"""
+
+import sys
+import os
+import sqlite3
+import warnings
+
+from sangokushi_extract_v2 import (
+    EXT_CSV_PATH,
+    NAME_DATA_SIZE,
+    NAME_RECORD_SIZE,
+    NAME_TABLE_ADDR,
+    extract_all,
+    get_arrangement_index,
+    kanji_lookup,
+    load_rom_names,
+)
+from mob_component_extract import read_component_table, PORTRAIT_START
+from portrait_bank import BANK_SIZE
+
+SCHEMA = """
+CREATE TABLE characters (
+    idx          INTEGER PRIMARY KEY,
+    rom_offset   INTEGER NOT NULL,
+    age          INTEGER NOT NULL,
+    body         INTEGER NOT NULL,
+    intelligence INTEGER NOT NULL,
+    military     INTEGER NOT NULL,
+    charisma     INTEGER NOT NULL,
+    luck         INTEGER NOT NULL,
+    loyalty      INTEGER NOT NULL,
+    b7_raw       INTEGER NOT NULL,
+    navy         INTEGER NOT NULL,
+    role         TEXT    NOT NULL,
+    troops       INTEGER NOT NULL,
+    city         INTEGER NOT NULL,
+    faction      INTEGER NOT NULL,
+    portrait     INTEGER REFERENCES portraits(portrait),
+    raw          BLOB    NOT NULL
+);
+CREATE INDEX idx_characters_faction  ON characters(faction);
+CREATE INDEX idx_characters_city     ON characters(city);
+CREATE INDEX idx_characters_portrait ON characters(portrait);
+
+CREATE TABLE names (
+    idx           INTEGER PRIMARY KEY,   -- 姓名表索引 (= 武將索引；256 為新君主模板)
+    rom_offset    INTEGER NOT NULL,
+    kana          TEXT NOT NULL,
+    kanji         TEXT NOT NULL,
+    ext_name      TEXT NOT NULL DEFAULT '',
+    ext_kana      TEXT NOT NULL DEFAULT '',
+    portrait_byte INTEGER NOT NULL
+);
+
+CREATE TABLE portraits (
+    portrait      INTEGER PRIMARY KEY,
+    kind          TEXT NOT NULL,         -- 'standard' / 'mob'
+    arrangement   TEXT,                  -- 標準頭像: 排列索引或 'STD'
+    component_row INTEGER REFERENCES mob_components(row)
+);
+
+CREATE TABLE mob_components (
+    row        INTEGER PRIMARY KEY,
+    portrait   INTEGER NOT NULL UNIQUE,
+    rom_offset INTEGER NOT NULL,
+    cat        INTEGER NOT NULL,
+    head       INTEGER NOT NULL,
+    eye        INTEGER NOT NULL,
+    nose       INTEGER NOT NULL,
+    mouth      INTEGER NOT NULL
+);
+
+CREATE TABLE kanji_tiles (
+    name_idx INTEGER NOT NULL REFERENCES names(idx),
+    position INTEGER NOT NULL,           -- 0-2
+    tile     INTEGER NOT NULL,
+    page     INTEGER NOT NULL,
+    kanji    TEXT,                       -- 字形類別未對應漢字時為 NULL
+    PRIMARY KEY (name_idx, position)
+);
+CREATE INDEX idx_kanji_tiles_tile ON kanji_tiles(tile, page);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE names_fts USING fts5(kana, kanji, ext_name);
+"""
+
+
+def fts_text(text):
+    """逐字以空白分隔，讓 unicode61 tokenizer 將每個字視為一個 token"""
+    return " ".join(text)
+
+
+def fts_query(text):
+    """查詢字串 → FTS5 片語 (連續字元)"""
+    return '"' + fts_text(text.replace('"', '')) + '"'
+
+
+def _create_fts(conn):
+    """建立 FTS5 表；SQLite 未編入 FTS5 時回傳 False"""
+    try:
+        conn.executescript(FTS_SCHEMA)
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def name_rows(rom, characters):
+    ext = {c.index: (c.ext_name, c.ext_kana) for c in characters}
+    for idx, (kana, kanji, portrait_byte) in enumerate(load_rom_names(rom)):
+        ext_name, ext_kana = ext.get(idx, ("", ""))
+        yield (idx, NAME_TABLE_ADDR + idx * NAME_RECORD_SIZE, kana, kanji,
+               ext_name, ext_kana, portrait_byte)
+
+
+def kanji_tile_rows(rom, name_count):
+    lookup = kanji_lookup(rom)
+    for idx in range(name_count):
+        base = NAME_TABLE_ADDR + idx * NAME_RECORD_SIZE + NAME_DATA_SIZE
+        for position in range(3):
+            tile = rom[base + position * 2]
+            page = rom[base + position * 2 + 1]
+            if tile == 0:
+                continue
+            yield idx, position, tile, page, lookup[1 if page else 0, tile] or None
+
+
+def portrait_rows(components):
+    by_portrait = {r["portrait_index"]: i for i, r in enumerate(components)}
+    for p in range(BANK_SIZE):
+        if p < PORTRAIT_START:
+            yield p, "standard", str(get_arrangement_index(p)), None
+        else:
+            yield p, "mob", None, by_portrait.get(p)
+
+
+def export_sqlite(rom_path, output_path, ext_csv_path=None):
+    """
+    匯出 SQLite 資料庫 (覆寫既有檔案)
+
+    回傳: FTS5 是否可用
+    """
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    characters = extract_all(rom_path, ext_csv_path)
+    components = read_component_table(rom)
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    conn = sqlite3.connect(output_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO characters VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+            ((c.index, c.offset, c.age, c.body, c.intelligence, c.military, c.charisma,
+              c.luck, c.loyalty, c.b7_raw, c.navy, c.role, c.troops, c.city, c.faction,
+              c.portrait, c.raw) for c in characters))
+
+        names = list(name_rows(rom, characters))
+        conn.executemany("INSERT INTO names VALUES (?,?,?,?,?,?,?)", names)
+        conn.executemany("INSERT INTO kanji_tiles VALUES (?,?,?,?,?)",
+                         kanji_tile_rows(rom, len(names)))
+        conn.executemany(
+            "INSERT INTO mob_components VALUES (?,?,?,?,?,?,?,?)",
+            ((i, r["portrait_index"], int(r["rom_offset"], 16), r["cat"], r["head"],
+              r["eye"], r["nose"], r["mouth"]) for i, r in enumerate(components)))
+        conn.executemany("INSERT INTO portraits VALUES (?,?,?,?)", portrait_rows(components))
+
+        has_fts = _create_fts(conn)
+        if has_fts:
+            conn.executemany(
+                "INSERT INTO names_fts (rowid, kana, kanji, ext_name) VALUES (?,?,?,?)",
+                ((n[0], fts_text(n[2]), fts_text(n[3]), fts_text(n[4])) for n in names))
+        else:
+            warnings.warn("此 SQLite 未支援 FTS5，略過 names_fts 全文檢索表", stacklevel=2)
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"已匯出 {len(characters)} 筆武將、{len(components)} 筆組件 → {output_path}")
+    return has_fts
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = sys.argv[1]
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+    base = os.path.splitext(os.path.basename(rom_path))[0]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else f"{base}.db"
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    ext_csv_path = os.path.join(script_dir, EXT_CSV_PATH)
+    if not os.path.exists(ext_csv_path):
+        ext_csv_path = None
+
+    export_sqlite(rom_path, output_path, ext_csv_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+能力值近似比對
+
+外部 CSV 的能力值可能有誤植或版本差異，完全相符的 (body, intelligence,
+military, charisma, luck) 查詢會漏掉這些武將。這裡以向量化距離矩陣:
+
+  - nearest_candidates: 每筆 ROM 能力值的前 k 個外部候選與距離
+  - assign: 全部記錄一次做一對一指派 (scipy 的 Hungarian 演算法；
+            未安裝 scipy 時改用貪婪法)
+
+距離為 L1 (各能力值差的絕對值總和)，且差異欄位數需在 MAX_DIFFERING_STATS 以內，
+避免把整組能力值都不同的武將硬湊成一對。
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+MAX_STAT_DISTANCE = 30
+MAX_DIFFERING_STATS = 2
+
+
+def distance_matrix(rom_stats, ext_stats):
+    """
+    回傳 (distance, differing)，shape 皆為 (N, M)
+
+    distance: L1 距離；differing: 不相同的欄位數
+    """
+    a = np.asarray(rom_stats, dtype=np.int32)[:, None, :]
+    b = np.asarray(ext_stats, dtype=np.int32)[None, :, :]
+    diff = np.abs(a - b)
+    return diff.sum(axis=2), (diff != 0).sum(axis=2)
+
+
+def _allowed(distance, differing, max_distance, max_differing):
+    return (distance <= max_distance) & (differing <= max_differing)
+
+
+def nearest_candidates(rom_stats, ext_stats, k=3):
+    """
+    每筆 ROM 能力值的前 k 個外部候選
+
+    回傳: (indices, distances)，shape (N, k)；外部筆數不足 k 時以 -1 補齊
+    """
+    distance, _ = distance_matrix(rom_stats, ext_stats)
+    k_eff = min(k, distance.shape[1])
+    order = np.argsort(distance, axis=1, kind="stable")[:, :k_eff]
+    dists = np.take_along_axis(distance, order, axis=1)
+    if k_eff < k:
+        pad = ((0, 0), (0, k - k_eff))
+        order = np.pad(order, pad, constant_values=-1)
+        dists = np.pad(dists, pad, constant_values=-1)
+    return order, dists
+
+
+def _greedy(cost, allowed):
+    """依距離由小到大取用，ROM 與外部列各只用一次"""
+    rows, cols = np.nonzero(allowed)
+    order = np.lexsort((cols, rows, cost[rows, cols]))
+    used_rows, used_cols = set(), set()
+    pairs = []
+    for r, c in zip(rows[order], cols[order]):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((int(r), int(c)))
+    return pairs
+
+
+def assign(rom_stats, ext_stats, max_distance=MAX_STAT_DISTANCE,
+           max_differing=MAX_DIFFERING_STATS):
+    """
+    一對一指派 ROM 記錄與外部列
+
+    回傳: [(rom_row, ext_row, distance), ...]，只包含通過門檻的配對
+    """
+    if len(rom_stats) == 0 or len(ext_stats) == 0:
+        return []
+    distance, differing = distance_matrix(rom_stats, ext_stats)
+    allowed = _allowed(distance, differing, max_distance, max_differing)
+    if not allowed.any():
+        return []
+
+    if linear_sum_assignment is not None:
+        # 不允許的配對給予極大成本，指派後再剔除
+        big = int(distance.max()) * max(distance.shape) + 1
+        cost = np.where(allowed, distance, big)
+        rows, cols = linear_sum_assignment(cost)
+        pairs = [(int(r), int(c)) for r, c in zip(rows, cols) if allowed[r, c]]
+    else:
+        pairs = _greedy(distance, allowed)
+    return [(r, c, int(distance[r, c])) for r, c in pairs]
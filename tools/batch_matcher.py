@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Batch Matcher - 平行批次比對截圖與頭像庫，輸出 JSON / CSV
+
+使用方法:
+    python batch_matcher.py <screenshot.png|目錄> ... [options]
+
+參數:
+    screenshot.png  - 頭像截圖或完整模擬器畫面 (完整畫面自動定位頭像)
+    目錄           - 目錄下所有 .png 都會處理
+
+選項:
+    --output FILE   - 結果檔 (.json 或 .csv，預設 match_results.json)
+    --top N         - 每張截圖保留前 N 名候選 (預設 5)
+    --workers N     - 比對用 process 數 (預設 CPU 核心數)
+    --palette FILE  - 調色盤設定檔 (見 palette_calibrate.py)，作為量化的參考調色盤
+    --rom FILE      - ROM 路徑 (預設 ../Sangokushi (Japan).nes)
+
+流程:
+    1. Thread pool 解碼 PNG (PIL 解碼時釋放 GIL)；解碼與比對各最多 workers×4 張
+       在處理中，大量截圖也不會全部留在記憶體
+    2. Process pool 比對；識別表 (portrait_ids, 含頭像庫) 從 ROM 快取讀取一次，
+       經 initializer 傳給各 worker
+    3. 裁切後量化為 4 色索引 (palette_quant, 不受模擬器調色盤影響)
+    4. 索引陣列 hash 命中識別表即完成 (完全相符，不需逐一比對)；
+       未命中才逐像素比對 255 個頭像，記錄分數與前 N 名候選
+
+範例:
+    python batch_matcher.py ../mob_portrait/screenshot captures/ --output results.csv --top 3
+"""
+
+import sys
+import os
+import csv
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portrait_ids import load_identification_table  # noqa: E402
+from palette_quant import quantize_indices  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+from portrait_locator import (  # noqa: E402
+    ROM_PATH, PortraitLocator, is_cropped_portrait, iter_png_paths)
+
+DEFAULT_OUTPUT = 'match_results.json'
+DEFAULT_TOP = 5
+
+# worker 內的共用狀態 (由 _init_worker 設定)
+_table = None
+_locator = None
+_palette = None
+
+
+def _init_worker(table, palette=None):
+    global _table, _locator, _palette
+    _table = table
+    _locator = PortraitLocator(table.bank, palette)
+    _palette = palette
+
+
+def load_rgb(path):
+    """讀取 PNG 為 RGB 陣列 (在 thread pool 中執行)"""
+    with Image.open(path) as img:
+        return np.array(img.convert('RGB'))
+
+
+def score_portrait(indices, bank):
+    """48×48 索引陣列對頭像庫逐像素比對，回傳每個頭像的相符比例"""
+    return (bank == indices[None]).mean(axis=(1, 2))
+
+
+def match_one(job):
+    """比對單張截圖 (在 process pool 中執行)"""
+    path, rgb, top = job
+    height, width = rgb.shape[:2]
+    location = None
+    if not is_cropped_portrait(width, height):
+        location = _locator.locate(rgb)
+    crop = _locator.crop(rgb, location)
+    indices = quantize_indices(crop, _palette)
+
+    hit = _table.identify(indices)
+    if hit is not None:
+        # 完全相符: 渲染結果相同的其他頭像列為候選 (分數同為 1.0)
+        portraits, characters = hit
+        result = {
+            'file': path,
+            'portrait': portraits[0],
+            'score': 1.0,
+            'exact': True,
+            'characters': characters,
+            'location': None,
+            'alternatives': [{'portrait': p, 'score': 1.0} for p in portraits[1:top]],
+        }
+    else:
+        scores = score_portrait(indices, _table.bank)
+        ranked = np.argsort(-scores, kind='stable')[:top]
+        best = int(np.argmax(scores))
+        result = {
+            'file': path,
+            'portrait': best,
+            'score': round(float(scores[best]), 4),
+            'exact': False,
+            'characters': _table.characters([best]),
+            'location': None,
+            'alternatives': [
+                {'portrait': int(p), 'score': round(float(scores[p]), 4)} for p in ranked[1:]
+            ],
+        }
+    if location is not None:
+        result['location'] = {
+            'x': round(location.x, 2),
+            'y': round(location.y, 2),
+            'scale_x': round(location.scale_x, 4),
+            'scale_y': round(location.scale_y, 4),
+        }
+    return result
+
+
+def _bounded_map(executor, fn, items, window):
+    """
+    同 executor.map，但最多只有 window 個工作在排隊/執行中
+
+    Executor.map 會一次送出全部工作，解碼後的影像全部留在記憶體；
+    這裡取回最前面的結果後才送出下一個，結果順序同 items
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def match_files(paths, table, top=DEFAULT_TOP, workers=None, palette=None):
+    """
+    平行比對多張截圖
+
+    參數:
+        paths: 截圖路徑列表
+        table: portrait_ids.load_identification_table() 的識別表
+        top: 每張保留的候選數
+        workers: process 數 (None = CPU 核心數)
+        palette: 調色盤設定檔的 4 色 (None = 預設 PALETTE)
+
+    回傳: 結果 dict 列表 (順序同 paths)
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=min(8, workers * 2)) as decoders, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(table, palette)) as matchers:
+        images = _bounded_map(decoders, load_rgb, paths, window)
+        jobs = ((path, rgb, top) for path, rgb in zip(paths, images))
+        return list(_bounded_map(matchers, match_one, jobs, window))
+
+
+def write_json(results, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def write_csv(results, output_path, top):
+    fieldnames = ['file', 'portrait', 'score', 'exact', 'characters',
+                  'x', 'y', 'scale_x', 'scale_y']
+    fieldnames += [f'alt{i}' for i in range(1, top)]
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for r in results:
+            row = {
+                'file': r['file'],
+                'portrait': f"P{r['portrait']:03d}",
+                'score': r['score'],
+                'exact': int(r['exact']),
+                'characters': ' '.join(str(c) for c in r['characters']),
+            }
+            if r['location']:
+                row.update(r['location'])
+            for i, alt in enumerate(r['alternatives'], 1):
+                row[f'alt{i}'] = f"P{alt['portrait']:03d}:{alt['score']}"
+            writer.writerow(row)
+
+
+def main():
+    argv, palette = pop_palette_option(sys.argv)
+    if len(argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    inputs = []
+    output_path = DEFAULT_OUTPUT
+    top = DEFAULT_TOP
+    workers = None
+    rom_path = ROM_PATH
+
+    i = 1
+    while i < len(argv):
+        if argv[i] == '--output' and i + 1 < len(argv):
+            output_path = argv[i + 1]
+            i += 2
+        elif argv[i] == '--top' and i + 1 < len(argv):
+            top = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--workers' and i + 1 < len(argv):
+            workers = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--rom' and i + 1 < len(argv):
+            rom_path = argv[i + 1]
+            i += 2
+        else:
+            inputs.append(argv[i])
+            i += 1
+
+    if top < 1:
+        print("錯誤: --top 必須 >= 1")
+        sys.exit(1)
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    paths = iter_png_paths(inputs)
+    if not paths:
+        print("錯誤: 沒有找到任何 .png 截圖")
+        sys.exit(1)
+
+    table = load_identification_table(rom_path)
+
+    print(f"比對 {len(paths)} 張截圖 (頭像庫 {len(table.bank)} 個)...")
+    results = match_files(paths, table, top=top, workers=workers, palette=palette)
+
+    if output_path.lower().endswith('.csv'):
+        write_csv(results, output_path, top)
+    else:
+        write_json(results, output_path)
+
+    exact = sum(1 for r in results if r['exact'])
+    print(f"完全相符: {exact} / {len(results)}")
+    print(f"已輸出: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Mob Solver - 大眾臉頭像分解求解 (截圖 → 組件索引 → ROM 記錄 → 武將)
+
+使用方法:
+    python mob_solver.py <screenshot.png|目錄> ... [--rom FILE] [--palette FILE]
+
+參數:
+    screenshot.png  - 大眾臉頭像截圖 (或完整模擬器畫面，自動定位頭像)
+    --rom FILE      - ROM 路徑 (預設 ../Sangokushi (Japan).nes)
+    --palette FILE  - 調色盤設定檔 (見 palette_calibrate.py)，作為定位與量化的參考調色盤
+
+原理:
+    大眾臉頭像可分離 (見 mob_portrait_export.render_portrait):
+      框架 (Head)  - 排列模板中非 None 的位置
+      眼睛 (Eye)   - Row 2, C1-C3
+      鼻子 (Nose)  - Row 3, C1-C3
+      嘴巴 (Mouth) - Row 4-5, C1-C3
+    每個區域獨立對 20 個選項比對 (成本為 20+20+20+20，而非 20^4 種組合)，
+    再由 Head 決定 Category，轉回 Category-local 索引，
+    經 0x1F034 組件索引表與姓名表 byte 14 反查頭像與武將。
+
+範例:
+    python mob_solver.py ../mob_portrait/screenshot
+"""
+
+import sys
+import os
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portrait_bank import (  # noqa: E402
+    HEAD_TILE_COUNT, MOUTH_ROW_TILES, VARIANT_COUNT,
+    load_mob_components, load_portrait_bank, tiles_to_image)
+from palette_quant import quantize_indices  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+from mob_component_extract import (  # noqa: E402
+    COMP_NAMES, read_component_table, build_portrait_to_chars)
+from sangokushi_extract_v2 import load_rom_names  # noqa: E402
+from portrait_locator import ROM_PATH, PortraitLocator, iter_png_paths  # noqa: E402
+
+CATEGORY_SIZE = 5
+
+# 變體區域: 名稱 → 像素列範圍 (欄範圍皆為 C1-C3)
+VARIANT_REGIONS = {
+    'eye': (16, 24),
+    'nose': (24, 32),
+    'mouth': (32, 48),
+}
+VARIANT_COLS = (8, 32)
+
+
+def _variant_strips(components):
+    """將變體 tiles 排成截圖中的樣子: eye/nose (20, 8, 24), mouth (20, 16, 24)"""
+    eyes = components['eyes'].transpose(0, 2, 1, 3).reshape(VARIANT_COUNT, 8, 24)
+    noses = components['noses'].transpose(0, 2, 1, 3).reshape(VARIANT_COUNT, 8, 24)
+    mouths = components['mouths']
+    rows = [mouths[:, MOUTH_ROW_TILES[r]] for r in (4, 5)]      # 各 (20, 3, 8, 8)
+    mouth_grid = np.stack(rows, axis=1)                          # (20, 2, 3, 8, 8)
+    mouths = mouth_grid.transpose(0, 1, 3, 2, 4).reshape(VARIANT_COUNT, 16, 24)
+    return {'eye': eyes, 'nose': noses, 'mouth': mouths}
+
+
+def _head_frames(components):
+    """
+    渲染 20 個 Head 框架與遮罩
+
+    回傳: frames (20, 48, 48), masks (20, 48, 48) bool (True = 框架像素)
+    """
+    count = len(components['templates'])
+    frames = np.zeros((count, 48, 48), dtype=np.uint8)
+    masks = np.zeros((count, 48, 48), dtype=bool)
+    for h, template in enumerate(components['templates']):
+        grid = np.zeros((6, 6, 8, 8), dtype=np.uint8)
+        cell_mask = np.zeros((6, 6, 8, 8), dtype=bool)
+        for row in range(6):
+            for col in range(6):
+                tile_idx = template[row][col]
+                if tile_idx is None:
+                    continue
+                cell_mask[row, col] = True
+                if tile_idx < HEAD_TILE_COUNT:
+                    grid[row, col] = components['heads'][h][tile_idx]
+        frames[h] = tiles_to_image(grid)
+        masks[h] = tiles_to_image(cell_mask)
+    return frames, masks
+
+
+class MobSolver:
+    """大眾臉頭像分解求解器"""
+
+    def __init__(self, rom):
+        components = load_mob_components(rom)
+        self.strips = _variant_strips(components)
+        self.head_frames, self.head_masks = _head_frames(components)
+
+        # (cat, head, eye, nose, mouth) → 組件索引表記錄
+        self.records = {}
+        for r in read_component_table(rom):
+            key = tuple(r[name] for name in COMP_NAMES)
+            self.records.setdefault(key, []).append(r)
+
+        self.portrait_to_chars = build_portrait_to_chars(rom)
+        self.rom_names = load_rom_names(rom)
+
+    def _solve_head(self, indices):
+        match = (self.head_frames == indices[None]) & self.head_masks
+        scores = match.sum(axis=(1, 2)) / np.maximum(self.head_masks.sum(axis=(1, 2)), 1)
+        return int(scores.argmax()), scores
+
+    def _solve_variant(self, indices, name, cat, head_mask):
+        r0, r1 = VARIANT_REGIONS[name]
+        c0, c1 = VARIANT_COLS
+        region = indices[r0:r1, c0:c1]
+        # 只比對此 Head 模板中屬於變體的像素
+        mask = ~head_mask[r0:r1, c0:c1]
+        if not mask.any():
+            mask = np.ones_like(mask)
+        match = (self.strips[name] == region[None]) & mask
+        scores = match.sum(axis=(1, 2)) / mask.sum()
+        in_cat = scores[cat * CATEGORY_SIZE:(cat + 1) * CATEGORY_SIZE]
+        local = int(in_cat.argmax())
+        return local, float(in_cat[local]), int(scores.argmax())
+
+    def solve(self, indices):
+        """
+        求解 48×48 調色盤索引陣列
+
+        回傳 dict:
+            components: {cat, head, eye, nose, mouth} (Category-local)
+            scores:     各區域相符比例
+            exact:      所有區域完全相符
+            warnings:   最佳變體不在同一 Category 時的提示
+            records:    組件索引表中符合的記錄 (含 portrait_index, rom_offset)
+            characters: 使用該頭像的武將 [{index, kana, kanji}]
+        """
+        head_g, head_scores = self._solve_head(indices)
+        cat, head_local = divmod(head_g, CATEGORY_SIZE)
+        result = {
+            'components': {'cat': cat, 'head': head_local},
+            'scores': {'head': round(float(head_scores[head_g]), 4)},
+            'warnings': [],
+        }
+
+        for name in VARIANT_REGIONS:
+            local, score, global_best = self._solve_variant(
+                indices, name, cat, self.head_masks[head_g])
+            result['components'][name] = local
+            result['scores'][name] = round(score, 4)
+            if global_best // CATEGORY_SIZE != cat:
+                result['warnings'].append(
+                    f"{name}: 全域最佳 #{global_best} 不屬於 Category {cat}")
+
+        result['exact'] = all(s == 1.0 for s in result['scores'].values())
+        key = tuple(result['components'][name] for name in COMP_NAMES)
+        result['records'] = self.records.get(key, [])
+
+        characters = []
+        for record in result['records']:
+            for ci in self.portrait_to_chars.get(record['portrait_index'], []):
+                kana, kanji, _ = self.rom_names[ci]
+                characters.append({'index': ci, 'kana': kana, 'kanji': kanji})
+        result['characters'] = characters
+        return result
+
+
+def main():
+    argv, palette = pop_palette_option(sys.argv)
+    if len(argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    inputs = []
+    rom_path = ROM_PATH
+    i = 1
+    while i < len(argv):
+        if argv[i] == '--rom' and i + 1 < len(argv):
+            rom_path = argv[i + 1]
+            i += 2
+        else:
+            inputs.append(argv[i])
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, 'rb') as f:
+        rom = f.read()
+    solver = MobSolver(rom)
+    locator = PortraitLocator(load_portrait_bank(rom), palette)
+
+    for path in iter_png_paths(inputs):
+        rgb = np.array(Image.open(path).convert('RGB'))
+        result = solver.solve(quantize_indices(locator.crop(rgb), palette))
+        c = result['components']
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        print(f"{name}: cat={c['cat']} head={c['head']} eye={c['eye']} "
+              f"nose={c['nose']} mouth={c['mouth']}"
+              f"{' (完全相符)' if result['exact'] else ''}")
+        print(f"  相符比例: {result['scores']}")
+        for w in result['warnings']:
+            print(f"  警告: {w}")
+        if not result['records']:
+            print("  組件索引表中沒有此組合")
+        for r in result['records']:
+            print(f"  → P{r['portrait_index']:03d} @ {r['rom_offset']}")
+        for ch in result['characters']:
+            print(f"  → 武將 #{ch['index']:03d} {ch['kanji']} ({ch['kana']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Palette Calibrate - 從截圖集校準模擬器調色盤，輸出調色盤設定檔
+
+使用方法:
+    python palette_calibrate.py <screenshot.png|目錄> ... --name NAME [options]
+
+參數:
+    screenshot.png  - 頭像截圖或完整模擬器畫面 (同一模擬器 / 擷取設定)
+    --name NAME     - 設定檔名稱 (例: mesen, fceux, capture_card)
+
+選項:
+    --output FILE   - 設定檔路徑 (預設 palette_<NAME>.json)
+    --threshold T   - 截圖與頭像庫相符比例低於此值則略過 (預設 0.9)
+    --rom FILE      - ROM 路徑 (預設 ../Sangokushi (Japan).nes)
+
+流程:
+    1. 定位並裁切頭像，量化為 4 色索引後找出對應的 ROM 頭像
+    2. 只取與 ROM 渲染完全相符的 8×8 tile (exact-match tiles) 作為對齊樣本
+    3. 以 np.bincount 累加每個調色盤索引的 R/G/B 直方圖
+    4. 每個索引取各通道中位數作為校準後的顏色
+
+範例:
+    python palette_calibrate.py captures/mesen --name mesen
+    python ../portrait_export.py "Sangokushi (Japan).nes" --palette palette_mesen.json
+"""
+
+import sys
+import os
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portrait_bank import PALETTE, load_portrait_bank  # noqa: E402
+from palette_quant import quantize_indices  # noqa: E402
+from palette_profile import PALETTE_SIZE, save_palette_profile  # noqa: E402
+from portrait_locator import ROM_PATH, PortraitLocator, iter_png_paths  # noqa: E402
+from batch_matcher import score_portrait  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.9
+
+
+class PaletteCalibrator:
+    """累加截圖中每個調色盤索引的 RGB 直方圖"""
+
+    def __init__(self, bank, threshold=DEFAULT_THRESHOLD):
+        self.bank = bank
+        self.locator = PortraitLocator(bank)
+        self.threshold = threshold
+        # hist[channel, index, value]
+        self.hist = np.zeros((3, PALETTE_SIZE, 256), dtype=np.int64)
+        self.screenshots = 0
+
+    def add(self, rgb):
+        """
+        加入一張截圖
+
+        回傳: (portrait_index, 相符比例, 採用的 tile 數)；相符比例過低時 portrait_index 為 None
+        """
+        crop = self.locator.crop(rgb)
+        indices = quantize_indices(crop)
+        scores = score_portrait(indices, self.bank)
+        portrait = int(scores.argmax())
+        if scores[portrait] < self.threshold:
+            return None, float(scores[portrait]), 0
+
+        # 完全相符的 tile: 這些像素的索引可信
+        reference = self.bank[portrait]
+        tile_match = (indices == reference).reshape(6, 8, 6, 8).all(axis=(1, 3))
+        pixel_mask = np.repeat(np.repeat(tile_match, 8, axis=0), 8, axis=1)
+
+        labels = reference[pixel_mask].astype(np.int64)
+        samples = crop[pixel_mask].astype(np.int64)
+        for c in range(3):
+            self.hist[c] += np.bincount(
+                labels * 256 + samples[:, c], minlength=PALETTE_SIZE * 256
+            ).reshape(PALETTE_SIZE, 256)
+        self.screenshots += 1
+        return portrait, float(scores[portrait]), int(tile_match.sum())
+
+    def sample_counts(self):
+        return self.hist[0].sum(axis=1)
+
+    def palette(self, fallback):
+        """各索引各通道取中位數；沒有樣本的索引沿用 fallback"""
+        result = []
+        counts = self.sample_counts()
+        for index in range(PALETTE_SIZE):
+            if counts[index] == 0:
+                result.append(tuple(fallback[index]))
+                continue
+            color = []
+            for c in range(3):
+                cumulative = np.cumsum(self.hist[c, index])
+                color.append(int(np.searchsorted(cumulative, cumulative[-1] / 2)))
+            result.append(tuple(color))
+        return result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    inputs = []
+    name = None
+    output_path = None
+    threshold = DEFAULT_THRESHOLD
+    rom_path = ROM_PATH
+
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == '--name' and i + 1 < len(sys.argv):
+            name = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == '--output' and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == '--threshold' and i + 1 < len(sys.argv):
+            threshold = float(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == '--rom' and i + 1 < len(sys.argv):
+            rom_path = sys.argv[i + 1]
+            i += 2
+        else:
+            inputs.append(sys.argv[i])
+            i += 1
+
+    if not name:
+        print("錯誤: 需要以 --name 指定設定檔名稱")
+        sys.exit(1)
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+    output_path = output_path or f"palette_{name}.json"
+
+    with open(rom_path, 'rb') as f:
+        calibrator = PaletteCalibrator(load_portrait_bank(f.read()), threshold)
+
+    for path in iter_png_paths(inputs):
+        rgb = np.array(Image.open(path).convert('RGB'))
+        portrait, score, tiles = calibrator.add(rgb)
+        label = os.path.basename(path)
+        if portrait is None:
+            print(f"  略過 {label}: 最佳相符比例 {score:.1%}")
+        else:
+            print(f"  {label}: P{portrait:03d} ({score:.1%}), 採用 {tiles}/36 tiles")
+
+    if calibrator.screenshots == 0:
+        print("錯誤: 沒有可用的截圖")
+        sys.exit(1)
+
+    palette = calibrator.palette(PALETTE)
+    counts = calibrator.sample_counts()
+    save_palette_profile(output_path, name, palette, counts, calibrator.screenshots)
+
+    print()
+    for index, (color, n) in enumerate(zip(palette, counts)):
+        print(f"  {index}: RGB{color}  ({n} 像素)")
+    print(f"已輸出: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Portrait Dedup - 以 bitplane 打包 + popcount 找出相近頭像
+
+使用方法:
+    python portrait_dedup.py [options]
+
+選項:
+    --rom FILE        - ROM 路徑 (預設 ../Sangokushi (Japan).nes)
+    --max-dist K      - 列出像素差異 ≤ K 的頭像對 (預設 64)
+    --combinations    - 加入大眾臉全部組合空間 (4 Category × 5^4 = 2500 張)
+    --query ID        - 只列出與 ID 相差 ≤ K 的頭像 (BK-tree 查詢)
+                        ID 格式: P081 (ROM 頭像) 或 C2-1-3-0-4 (cat-head-eye-nose-mouth)
+
+原理:
+    每張 48×48 頭像的 2 個 bitplane 各打包為 36 個 uint64 (2304 bits)。
+    兩張頭像的像素差異數 = popcount((a0 ^ b0) | (a1 ^ b1))，
+    全對距離矩陣以區塊方式向量化計算。
+
+    標準頭像 (P00-P80) 的近似重複可用來檢查
+    portrait_export.find_arrangement_for_portrait 是否套錯排列。
+
+範例:
+    python portrait_dedup.py --max-dist 32
+    python portrait_dedup.py --combinations --query P150 --max-dist 100
+"""
+
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portrait_bank import (  # noqa: E402
+    MOB_START, compose_mob_portrait, load_mob_components, load_portrait_bank)
+from portrait_export import STANDARD_36_PORTRAITS  # noqa: E402
+
+ROM_PATH = os.path.join(os.path.dirname(__file__), '..', 'Sangokushi (Japan).nes')
+
+CATEGORY_COUNT = 4
+CATEGORY_SIZE = 5
+DEFAULT_MAX_DIST = 64
+
+# 全對距離每次處理的列數 (控制暫存陣列大小)
+PAIR_BLOCK = 64
+
+# popcount: NumPy 2.0+ 有 bitwise_count，否則以 byte 查表
+_POPCOUNT_LUT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """uint64 陣列逐元素 popcount"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+    return _POPCOUNT_LUT[as_bytes].sum(axis=-1)
+
+
+def pack_bitplanes(images):
+    """
+    (N, 48, 48) 調色盤索引陣列 → (N, 2, 36) uint64
+
+    plane 0 = bit0, plane 1 = bit1 (同 NES tile 的兩個 bitplane)
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    flat = images.reshape(len(images), -1)
+    planes = np.stack([flat & 1, flat >> 1], axis=1)
+    packed = np.packbits(planes, axis=2)
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def pixel_distance(a, b):
+    """兩組打包頭像 (..., 2, 36) 的像素差異數"""
+    diff = (a[..., 0, :] ^ b[..., 0, :]) | (a[..., 1, :] ^ b[..., 1, :])
+    return popcount(diff).sum(axis=-1, dtype=np.int32)
+
+
+def all_pairs_distance(packed):
+    """全對像素差異矩陣, shape (N, N), dtype uint16"""
+    n = len(packed)
+    result = np.empty((n, n), dtype=np.uint16)
+    for start in range(0, n, PAIR_BLOCK):
+        block = packed[start:start + PAIR_BLOCK]
+        result[start:start + len(block)] = pixel_distance(block[:, None], packed[None])
+    return result
+
+
+class BKTree:
+    """
+    BK-tree: 支援「與 X 相差 ≤ k 像素的所有頭像」查詢
+
+    節點以 (item, {distance: child}) 儲存；查詢時只走 |d - dist| ≤ k 的分支
+    """
+
+    def __init__(self, packed, labels=None):
+        self.packed = packed
+        self.labels = labels if labels is not None else list(range(len(packed)))
+        self.root = None
+        for i in range(len(packed)):
+            self.add(i)
+
+    def _distance(self, i, target):
+        return int(pixel_distance(self.packed[i], target))
+
+    def add(self, i):
+        if self.root is None:
+            self.root = (i, {})
+            return
+        node = self.root
+        while True:
+            d = self._distance(node[0], self.packed[i])
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (i, {})
+                return
+            node = child
+
+    def query(self, target, k):
+        """回傳 [(label, distance)]，依距離排序"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            item, children = stack.pop()
+            d = self._distance(item, target)
+            if d <= k:
+                found.append((self.labels[item], d))
+            for child_d, child in children.items():
+                if d - k <= child_d <= d + k:
+                    stack.append(child)
+        return sorted(found, key=lambda x: x[1])
+
+
+def render_combination_space(rom):
+    """
+    渲染大眾臉全部組件組合
+
+    回傳: images (2500, 48, 48), labels ['C{cat}-{head}-{eye}-{nose}-{mouth}', ...]
+    """
+    components = load_mob_components(rom)
+    images = []
+    labels = []
+    for cat in range(CATEGORY_COUNT):
+        for head in range(CATEGORY_SIZE):
+            for eye in range(CATEGORY_SIZE):
+                for nose in range(CATEGORY_SIZE):
+                    for mouth in range(CATEGORY_SIZE):
+                        images.append(compose_mob_portrait(
+                            components, cat, head, eye, nose, mouth))
+                        labels.append(f"C{cat}-{head}-{eye}-{nose}-{mouth}")
+    return np.stack(images), labels
+
+
+def close_pairs(distances, labels, max_dist):
+    """從距離矩陣取出距離 ≤ max_dist 的頭像對 (上三角)"""
+    rows, cols = np.nonzero(np.triu(distances <= max_dist, k=1))
+    order = np.argsort(distances[rows, cols], kind='stable')
+    return [(labels[rows[i]], labels[cols[i]], int(distances[rows[i], cols[i]])) for i in order]
+
+
+def main():
+    rom_path = ROM_PATH
+    max_dist = DEFAULT_MAX_DIST
+    combinations = False
+    query = None
+
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == '--rom' and i + 1 < len(sys.argv):
+            rom_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == '--max-dist' and i + 1 < len(sys.argv):
+            max_dist = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == '--query' and i + 1 < len(sys.argv):
+            query = sys.argv[i + 1].upper()
+            i += 2
+        elif sys.argv[i] == '--combinations':
+            combinations = True
+            i += 1
+        else:
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, 'rb') as f:
+        rom = f.read()
+
+    images = load_portrait_bank(rom)
+    labels = [f"P{p:03d}" for p in range(len(images))]
+    if combinations:
+        combo_images, combo_labels = render_combination_space(rom)
+        images = np.concatenate([images, combo_images])
+        labels += combo_labels
+    packed = pack_bitplanes(images)
+    print(f"頭像數: {len(images)}")
+
+    if query:
+        if query not in labels:
+            print(f"錯誤: 找不到 '{query}'")
+            sys.exit(1)
+        tree = BKTree(packed, labels)
+        target = packed[labels.index(query)]
+        print(f"與 {query} 相差 ≤ {max_dist} 像素:")
+        for label, d in tree.query(target, max_dist):
+            if label != query:
+                print(f"  {label}  {d:5d}")
+        return
+
+    distances = all_pairs_distance(packed)
+    pairs = close_pairs(distances, labels, max_dist)
+    print(f"相差 ≤ {max_dist} 像素的頭像對: {len(pairs)}")
+    for a, b, d in pairs:
+        note = ""
+        # 兩個標準頭像 (非 36-tile) 過於相近: 可能套錯排列
+        if a[0] == b[0] == 'P' and int(a[1:]) < MOB_START and int(b[1:]) < MOB_START:
+            if int(a[1:]) not in STANDARD_36_PORTRAITS or int(b[1:]) not in STANDARD_36_PORTRAITS:
+                note = "  ← 標準頭像相近，檢查排列對應"
+        print(f"  {a:>14s}  {b:>14s}  {d:5d}{note}")
+
+
+if __name__ == '__main__':
+    main()
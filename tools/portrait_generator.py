@@ -17,6 +17,7 @@ Portrait Generator - 從 Group 和變體索引產生頭像
                       Group C: 0=標準(0-23), 1=48-67
     --output FILE   - 輸出檔案 (預設 generated_portrait.png)
     --scale N       - 放大倍率 (預設 8)
+    --palette FILE  - 調色盤設定檔 (見 palette_calibrate.py，預設內建 PALETTE)
 
 範例:
     # P081 周泰 (Group A, eye=17, face=18, mouth=16)
@@ -33,6 +34,10 @@ import sys
 import os
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from palette_profile import pop_palette_option  # noqa: E402
+
 # 調色盤
 PALETTE = [
     (0, 0, 0),          # 0: 黑
@@ -128,8 +133,9 @@ GROUP_FRAMEWORKS = {
 ROM_PATH = os.path.join(os.path.dirname(__file__), '..', 'Sangokushi (Japan).nes')
 
 
-def load_rom_tiles(base_addr, num_tiles=800):
-    """從 ROM 載入 tiles"""
+def load_rom_tiles(base_addr, num_tiles=800, palette=None):
+    """從 ROM 載入 tiles (palette 預設 PALETTE)"""
+    palette = palette or PALETTE
     tiles = []
     with open(ROM_PATH, 'rb') as f:
         f.seek(base_addr)
@@ -153,7 +159,7 @@ def load_rom_tiles(base_addr, num_tiles=800):
                 b0 = (bp0[row] >> bit) & 1
                 b1 = (bp1[row] >> bit) & 1
                 color_idx = b1 * 2 + b0
-                row_pixels.append(PALETTE[color_idx])
+                row_pixels.append(palette[color_idx])
             pixels.append(row_pixels)
 
         tiles.append(pixels)
@@ -161,7 +167,8 @@ def load_rom_tiles(base_addr, num_tiles=800):
     return tiles
 
 
-def generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx=0, scale=8):
+def generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx=0, scale=8,
+                      palette=None):
     """產生頭像"""
     # 取得框架
     framework_list = GROUP_FRAMEWORKS.get(group, ['standard'])
@@ -172,7 +179,7 @@ def generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx=0, scal
 
     # 載入 ROM tiles
     base_addr = GROUP_BASES[group]
-    rom_tiles = load_rom_tiles(base_addr, 800)
+    rom_tiles = load_rom_tiles(base_addr, 800, palette)
 
     # 計算變體 tiles (加上 Group 偏移量)
     # 變體公式相對於 Group A，需加上偏移量轉換到當前 Group
@@ -226,14 +233,15 @@ def generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx=0, scal
 
 
 def main():
-    if len(sys.argv) < 5:
+    argv, palette = pop_palette_option(sys.argv)
+    if len(argv) < 5:
         print(__doc__)
         sys.exit(1)
 
-    group = sys.argv[1].upper()
-    eye_idx = int(sys.argv[2])
-    face_idx = int(sys.argv[3])
-    mouth_idx = int(sys.argv[4])
+    group = argv[1].upper()
+    eye_idx = int(argv[2])
+    face_idx = int(argv[3])
+    mouth_idx = int(argv[4])
 
     # 解析選項
     framework_idx = 0
@@ -241,15 +249,15 @@ def main():
     scale = 8
 
     i = 5
-    while i < len(sys.argv):
-        if sys.argv[i] == '--framework' and i + 1 < len(sys.argv):
-            framework_idx = int(sys.argv[i + 1])
+    while i < len(argv):
+        if argv[i] == '--framework' and i + 1 < len(argv):
+            framework_idx = int(argv[i + 1])
             i += 2
-        elif sys.argv[i] == '--output' and i + 1 < len(sys.argv):
-            output_path = sys.argv[i + 1]
+        elif argv[i] == '--output' and i + 1 < len(argv):
+            output_path = argv[i + 1]
             i += 2
-        elif sys.argv[i] == '--scale' and i + 1 < len(sys.argv):
-            scale = int(sys.argv[i + 1])
+        elif argv[i] == '--scale' and i + 1 < len(argv):
+            scale = int(argv[i + 1])
             i += 2
         else:
             i += 1
@@ -264,7 +272,8 @@ def main():
     print(f"Framework: {framework_idx} ({GROUP_FRAMEWORKS[group][framework_idx]})")
     print()
 
-    portrait, layout = generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx, scale)
+    portrait, layout = generate_portrait(group, eye_idx, face_idx, mouth_idx, framework_idx, scale,
+                                         palette)
 
     print("Layout:")
     for row in layout:
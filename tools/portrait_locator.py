@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Portrait Locator - 從完整模擬器畫面自動定位 48×48 頭像並裁切
+
+使用方法:
+    python portrait_locator.py <screenshot.png|目錄> ... [--output DIR] [--scale N]
+
+參數:
+    screenshot.png  - 完整模擬器畫面 (256×240 / 256×224, 可為非整數倍縮放)
+    目錄           - 目錄下所有 .png 都會處理
+    --output DIR    - 裁切結果輸出目錄 (預設 located/)
+    --scale N       - 輸出放大倍率 (預設 4)
+
+方法:
+    1. 由畫面尺寸推算縮放比例 (寬 / 256, 高 / 240 或 224)，取樣回 NES 原生解析度
+    2. 以 FFT 計算畫面與頭像庫 (255 個渲染頭像) 的互相關
+    3. 以積分影像 (integral image) 計算每個 48×48 視窗的區域變異數，
+       正規化為 NCC (normalized cross-correlation)
+    4. NCC 最高的位置與縮放比例即為頭像視窗
+
+範例:
+    python portrait_locator.py captures/ --output captures_cropped
+"""
+
+import sys
+import os
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portrait_bank import PALETTE, load_portrait_bank  # noqa: E402
+
+ROM_PATH = os.path.join(os.path.dirname(__file__), '..', 'Sangokushi (Japan).nes')
+
+# NES 畫面原生解析度 (224 = 裁掉上下 overscan 的 NTSC 畫面)
+NES_WIDTH = 256
+NES_HEIGHTS = (240, 224)
+PORTRAIT_SIZE = 48
+
+# 長寬差距在此比例內視為已裁切的頭像 (不需定位)
+CROPPED_ASPECT_TOLERANCE = 0.03
+
+# 一次送進 FFT 的模板數 (控制記憶體用量)
+FFT_CHUNK = 32
+
+LUMA = np.array([0.299, 0.587, 0.114])
+
+PortraitLocation = namedtuple(
+    'PortraitLocation', ['x', 'y', 'scale_x', 'scale_y', 'portrait_index', 'score'])
+
+
+def is_cropped_portrait(width, height):
+    """判斷圖片是否已是裁切好的頭像 (近似正方形)"""
+    return abs(width - height) <= CROPPED_ASPECT_TOLERANCE * max(width, height)
+
+
+def candidate_scales(width, height):
+    """由畫面尺寸推算可能的 (scale_x, scale_y)"""
+    scales = []
+    for nes_h in NES_HEIGHTS:
+        pair = (width / NES_WIDTH, height / nes_h)
+        if pair not in scales:
+            scales.append(pair)
+    return scales
+
+
+def resample(rgb, scale_x, scale_y, out_w, out_h, x0=0.0, y0=0.0):
+    """以最近鄰取樣 (取像素中心) 將縮放後畫面還原為原生解析度"""
+    h, w = rgb.shape[:2]
+    ys = np.clip(((np.arange(out_h) + 0.5) * scale_y + y0).astype(int), 0, h - 1)
+    xs = np.clip(((np.arange(out_w) + 0.5) * scale_x + x0).astype(int), 0, w - 1)
+    return rgb[ys[:, None], xs[None, :]]
+
+
+def window_sums(img, size):
+    """以積分影像計算所有 size×size 視窗的總和，回傳 shape (H-size+1, W-size+1)"""
+    ii = np.zeros((img.shape[0] + 1, img.shape[1] + 1))
+    ii[1:, 1:] = img.cumsum(0).cumsum(1)
+    return ii[size:, size:] - ii[:-size, size:] - ii[size:, :-size] + ii[:-size, :-size]
+
+
+class PortraitLocator:
+    """以頭像庫為模板，在畫面中尋找頭像視窗"""
+
+    def __init__(self, bank, palette=None):
+        if palette is None:
+            palette = PALETTE
+        lut = np.asarray(palette, dtype=np.float64) @ LUMA
+        templates = lut[bank]
+        templates -= templates.mean(axis=(1, 2), keepdims=True)
+        self.templates = templates
+        self.template_norms = np.sqrt((templates ** 2).sum(axis=(1, 2)))
+        self._fft_cache = {}
+
+    def _template_ffts(self, shape):
+        """模板補零至畫面大小後的 FFT (依畫面尺寸快取)"""
+        if shape not in self._fft_cache:
+            self._fft_cache[shape] = np.conj(
+                np.fft.rfft2(self.templates, s=shape)).astype(np.complex64)
+        return self._fft_cache[shape]
+
+    def match_native(self, lum):
+        """
+        在原生解析度亮度圖上找出最佳頭像位置
+
+        回傳: (x, y, portrait_index, ncc)
+        """
+        h, w = lum.shape
+        n = PORTRAIT_SIZE * PORTRAIT_SIZE
+        s1 = window_sums(lum, PORTRAIT_SIZE)
+        s2 = window_sums(lum * lum, PORTRAIT_SIZE)
+        local_energy = np.sqrt(np.maximum(s2 - s1 * s1 / n, 0))
+        valid_h, valid_w = s1.shape
+
+        frame_fft = np.fft.rfft2(lum)
+        template_ffts = self._template_ffts(lum.shape)
+        best = (0, 0, -1, -np.inf)
+        for start in range(0, len(template_ffts), FFT_CHUNK):
+            chunk = template_ffts[start:start + FFT_CHUNK]
+            corr = np.fft.irfft2(frame_fft[None] * chunk, s=(h, w))[:, :valid_h, :valid_w]
+            norms = self.template_norms[start:start + FFT_CHUNK, None, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ncc = np.where(local_energy > 0, corr / (local_energy * norms), 0)
+            flat = int(ncc.argmax())
+            t, y, x = np.unravel_index(flat, ncc.shape)
+            if ncc[t, y, x] > best[3]:
+                best = (int(x), int(y), start + int(t), float(ncc[t, y, x]))
+        return best
+
+    def locate(self, rgb):
+        """
+        在完整畫面中定位頭像
+
+        參數:
+            rgb: np.ndarray (H, W, 3)
+
+        回傳: PortraitLocation (x, y 為原圖像素座標)
+        """
+        height, width = rgb.shape[:2]
+        best = None
+        for scale_x, scale_y in candidate_scales(width, height):
+            out_w = int(round(width / scale_x))
+            out_h = int(round(height / scale_y))
+            native = resample(rgb[..., :3], scale_x, scale_y, out_w, out_h)
+            x, y, index, score = self.match_native(native.astype(np.float64) @ LUMA)
+            if best is None or score > best.score:
+                best = PortraitLocation(x * scale_x, y * scale_y, scale_x, scale_y, index, score)
+        return best
+
+    def crop(self, rgb, location=None):
+        """
+        裁切頭像並還原為 48×48 原生解析度 RGB 陣列
+
+        已裁切的頭像 (近似正方形) 直接縮放為 48×48
+        """
+        height, width = rgb.shape[:2]
+        if location is None:
+            if is_cropped_portrait(width, height):
+                return resample(rgb[..., :3], width / PORTRAIT_SIZE, height / PORTRAIT_SIZE,
+                                PORTRAIT_SIZE, PORTRAIT_SIZE)
+            location = self.locate(rgb)
+        return resample(rgb[..., :3], location.scale_x, location.scale_y,
+                        PORTRAIT_SIZE, PORTRAIT_SIZE, location.x, location.y)
+
+
+_default_locators = {}
+
+
+def get_default_locator(rom_path=ROM_PATH, palette=None):
+    """以預設 ROM 建立 (並依調色盤快取) PortraitLocator"""
+    key = tuple(palette) if palette is not None else None
+    if key not in _default_locators:
+        with open(rom_path, 'rb') as f:
+            rom = f.read()
+        _default_locators[key] = PortraitLocator(load_portrait_bank(rom), palette)
+    return _default_locators[key]
+
+
+def format_location(location):
+    """PortraitLocation → 一行說明文字"""
+    return (f"({location.x:.0f}, {location.y:.0f}), "
+            f"縮放 {location.scale_x:.3f}×{location.scale_y:.3f}, "
+            f"P{location.portrait_index:03d} (NCC {location.score:.3f})")
+
+
+def crop_portrait_if_frame(img, palette=None):
+    """
+    若 PIL 圖片是完整畫面，自動定位並裁切為 48×48 頭像；否則原樣回傳
+
+    供 portrait_matcher / match_portraits 在讀入截圖時呼叫
+    (palette: 調色盤設定檔的 4 色，預設 PALETTE)
+
+    回傳: (PIL Image, PortraitLocation 或 None (已是裁切好的頭像))
+    """
+    width, height = img.size
+    if is_cropped_portrait(width, height):
+        return img, None
+    locator = get_default_locator(palette=palette)
+    rgb = np.array(img.convert('RGB'))
+    location = locator.locate(rgb)
+    return Image.fromarray(locator.crop(rgb, location)), location
+
+
+def iter_png_paths(paths):
+    """展開檔案/目錄參數為 .png 路徑列表"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.png') and not name.startswith('.'):
+                    result.append(os.path.join(path, name))
+        else:
+            result.append(path)
+    return result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    inputs = []
+    output_dir = 'located'
+    scale = 4
+
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == '--output' and i + 1 < len(sys.argv):
+            output_dir = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == '--scale' and i + 1 < len(sys.argv):
+            scale = int(sys.argv[i + 1])
+            i += 2
+        else:
+            inputs.append(sys.argv[i])
+            i += 1
+
+    if not os.path.exists(ROM_PATH):
+        print(f"錯誤: 找不到 ROM 檔案 '{ROM_PATH}'")
+        sys.exit(1)
+
+    locator = get_default_locator()
+    os.makedirs(output_dir, exist_ok=True)
+
+    for path in iter_png_paths(inputs):
+        rgb = np.array(Image.open(path).convert('RGB'))
+        location = locator.locate(rgb)
+        crop = Image.fromarray(locator.crop(rgb, location))
+        if scale > 1:
+            crop = crop.resize((48 * scale, 48 * scale), Image.NEAREST)
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        crop.save(os.path.join(output_dir, f"{name}.png"))
+        print(f"{name}: ({location.x:.1f}, {location.y:.1f}) "
+              f"縮放 {location.scale_x:.3f}×{location.scale_y:.3f} "
+              f"→ P{location.portrait_index:03d} (NCC {location.score:.3f})")
+
+    print(f"已輸出至: {output_dir}/")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,14 @@ Portrait Matcher - 從遊戲截圖自動識別頭像 layout
     python portrait_matcher.py <screenshot.png> <group> [--portrait-id P0XX]
 
 參數:
-    screenshot.png  - 遊戲中的頭像截圖 (48×48 或放大版本)
+    screenshot.png  - 遊戲中的頭像截圖 (48×48 或放大版本)，
+                     或完整模擬器畫面 (自動定位頭像，見 portrait_locator.py)
     group          - 使用的 Group: A, B, 或 C
                      A = base 0x1D694
                      B = base 0x1C194
                      C = base 0x1C914
     --portrait-id  - 可選，標註頭像 ID
+    --palette FILE - 可選，調色盤設定檔 (見 palette_calibrate.py)
 
 範例:
     python portrait_matcher.py zhou_tai_screenshot.png A --portrait-id P081
@@ -20,8 +22,16 @@ Portrait Matcher - 從遊戲截圖自動識別頭像 layout
 
 import sys
 import os
+import numpy as np
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nes_tiles import decode_2bpp  # noqa: E402
+from palette_quant import quantize_indices  # noqa: E402
+from portrait_locator import crop_portrait_if_frame, format_location  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+
 # 調色盤
 PALETTE = [
     (0, 0, 0),          # 0: 黑
@@ -46,41 +56,21 @@ ROM_PATH = os.path.join(os.path.dirname(__file__), '..', 'Sangokushi (Japan).nes
 
 
 def load_rom_tiles(base_addr, num_tiles=800):
-    """從 ROM 載入 tiles"""
-    tiles = []
+    """從 ROM 載入 tiles，回傳 (N, 8, 8) 調色盤索引陣列"""
     with open(ROM_PATH, 'rb') as f:
         f.seek(base_addr)
         rom_data = f.read(num_tiles * 16)
 
-    for tile_num in range(num_tiles):
-        offset = tile_num * 16
-        data = rom_data[offset:offset+16]
-        if len(data) < 16:
-            break
-
-        bp0 = data[0:8]
-        bp1 = data[8:16]
-
-        # 轉換為 8×8 像素陣列
-        pixels = []
-        for row in range(8):
-            row_pixels = []
-            for col in range(8):
-                bit = 7 - col
-                b0 = (bp0[row] >> bit) & 1
-                b1 = (bp1[row] >> bit) & 1
-                color_idx = b1 * 2 + b0
-                row_pixels.append(PALETTE[color_idx])
-            pixels.append(row_pixels)
-
-        tiles.append(pixels)
+    return decode_2bpp(rom_data)
 
-    return tiles
 
-
-def extract_tiles_from_screenshot(img_path):
-    """從截圖提取 36 個 tiles"""
+def extract_tiles_from_screenshot(img_path, palette=None):
+    """從截圖提取 36 個 tiles，回傳 (6, 6, 8, 8) 調色盤索引陣列"""
     img = Image.open(img_path).convert('RGB')
+    # 完整模擬器畫面: 先自動定位並裁切頭像
+    img, location = crop_portrait_if_frame(img, palette)
+    if location is not None:
+        print(f"定位頭像: {format_location(location)}")
     width, height = img.size
 
     # 計算縮放比例 (原始應為 48×48)
@@ -94,80 +84,27 @@ def extract_tiles_from_screenshot(img_path):
     # 縮放到標準大小 (48×48)
     if width != 48:
         img = img.resize((48, 48), Image.NEAREST)
-        tile_size = 8
-
-    # 提取 36 個 tiles
-    tiles = []
-    for row in range(6):
-        row_tiles = []
-        for col in range(6):
-            y = row * tile_size
-            x = col * tile_size
 
-            # 提取 8×8 tile
-            tile_pixels = []
-            for py in range(8):
-                row_pixels = []
-                for px in range(8):
-                    pixel = img.getpixel((x + px, y + py))
-                    row_pixels.append(pixel[:3])  # RGB only
-                tile_pixels.append(row_pixels)
+    # 量化為 4 色索引 (不假設截圖使用相同的 RGB 調色盤)
+    indices = quantize_indices(np.array(img), palette or PALETTE)
 
-            row_tiles.append(tile_pixels)
-        tiles.append(row_tiles)
-
-    return tiles
-
-
-def find_closest_palette_color(pixel):
-    """找到最接近的調色盤顏色"""
-    min_dist = float('inf')
-    best_color = PALETTE[0]
-    for pal_color in PALETTE:
-        dist = sum((pixel[i] - pal_color[i])**2 for i in range(3))
-        if dist < min_dist:
-            min_dist = dist
-            best_color = pal_color
-    return best_color
+    # 切成 6×6 個 8×8 tiles
+    return indices.reshape(6, 8, 6, 8).transpose(0, 2, 1, 3)
 
 
 def compare_tiles(tile1, tile2):
     """比較兩個 tiles，返回相似度 (0-1, 1=完全相同)"""
-    total_diff = 0
-
-    for row in range(8):
-        for col in range(8):
-            # 量化截圖像素到調色盤
-            pixel1 = find_closest_palette_color(tile1[row][col])
-            pixel2 = tile2[row][col]
-
-            # 計算差異
-            diff = sum(abs(pixel1[i] - pixel2[i]) for i in range(3))
-            total_diff += diff
-
-    max_diff = 8 * 8 * 3 * 255
-    return 1.0 - (total_diff / max_diff)
+    return float((tile1 == tile2).mean())
 
 
 def find_best_match(screenshot_tile, rom_tiles, threshold=0.95):
-    """找到最匹配的 ROM tile"""
-    best_match = -1
-    best_score = 0
-
-    for tile_num, rom_tile in enumerate(rom_tiles):
-        score = compare_tiles(screenshot_tile, rom_tile)
-        if score > best_score:
-            best_score = score
-            best_match = tile_num
-
-        # 完美匹配就提早結束
-        if score >= 0.999:
-            break
-
-    return best_match, best_score
+    """找到最匹配的 ROM tile (相同分數取編號最小者)"""
+    scores = (rom_tiles == screenshot_tile[None]).mean(axis=(1, 2))
+    best_match = int(scores.argmax())
+    return best_match, float(scores[best_match])
 
 
-def match_portrait(screenshot_path, group, portrait_id=None):
+def match_portrait(screenshot_path, group, portrait_id=None, palette=None):
     """主函數: 匹配頭像並輸出 layout"""
     print(f"=== Portrait Matcher ===")
     print(f"截圖: {screenshot_path}")
@@ -185,7 +122,7 @@ def match_portrait(screenshot_path, group, portrait_id=None):
 
     # 從截圖提取 tiles
     print("分析截圖...")
-    screenshot_tiles = extract_tiles_from_screenshot(screenshot_path)
+    screenshot_tiles = extract_tiles_from_screenshot(screenshot_path, palette)
     print()
 
     # 匹配每個 tile
@@ -288,28 +225,29 @@ def match_portrait(screenshot_path, group, portrait_id=None):
 
 
 def main():
-    if len(sys.argv) < 3:
+    argv, palette = pop_palette_option(sys.argv)
+    if len(argv) < 3:
         print(__doc__)
         sys.exit(1)
 
-    screenshot_path = sys.argv[1]
-    group = sys.argv[2].upper()
+    screenshot_path = argv[1]
+    group = argv[2].upper()
 
     if group not in GROUP_BASES:
         print(f"錯誤: Group 必須是 A 或 B, 不是 '{group}'")
         sys.exit(1)
 
     portrait_id = None
-    if '--portrait-id' in sys.argv:
-        idx = sys.argv.index('--portrait-id')
-        if idx + 1 < len(sys.argv):
-            portrait_id = sys.argv[idx + 1]
+    if '--portrait-id' in argv:
+        idx = argv.index('--portrait-id')
+        if idx + 1 < len(argv):
+            portrait_id = argv[idx + 1]
 
     if not os.path.exists(screenshot_path):
         print(f"錯誤: 找不到檔案 '{screenshot_path}'")
         sys.exit(1)
 
-    match_portrait(screenshot_path, group, portrait_id)
+    match_portrait(screenshot_path, group, portrait_id, palette)
 
 
 if __name__ == '__main__':
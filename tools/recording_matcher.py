@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Recording Matcher - 串流比對模擬器錄影，輸出頭像出現時間軸
+
+使用方法:
+    python recording_matcher.py <frames_dir|stream.rgb|-> [options]
+
+參數:
+    frames_dir      - PNG 逐格輸出目錄 (依檔名排序)
+    stream.rgb      - 原始 RGB24 串流檔 ('-' = stdin)，需搭配 --size
+
+選項:
+    --size WxH      - 原始串流的畫面尺寸 (例: 256x240)
+    --output FILE   - 時間軸 CSV (預設輸出到 stdout)
+    --threshold T   - 判定為頭像的最低相符比例 (預設 0.95)
+    --palette FILE  - 調色盤設定檔 (見 palette_calibrate.py)，作為定位與量化的參考調色盤
+    --relocate N    - 沒有頭像時，每隔至少 N 格才重新整格定位 (預設 15)
+    --rom FILE      - ROM 路徑 (預設 ../Sangokushi (Japan).nes)
+
+流程:
+    1. 逐格讀取 (generator)，任何時刻只保留目前這一格
+    2. 以上次定位的頭像視窗裁切，計算區域 hash；與上一格相同則直接跳過
+       (畫面上沒有頭像時仍沿用同一視窗，不 hash 整格)
+    3. 區域改變時才辨識: 先查識別表 (portrait_ids, 索引陣列 hash → 頭像/武將)，
+       未命中再比對頭像庫；比對失敗時，只有在頭像剛消失或距上次定位已超過
+       --relocate N 格時才對整格重新定位 (頭像視窗可能移動)
+    4. 每段連續相同頭像輸出一列: start_frame, end_frame, portrait, characters
+
+範例:
+    python recording_matcher.py dump/ --output timeline.csv
+    ffmpeg -i play.mkv -f rawvideo -pix_fmt rgb24 - | python recording_matcher.py - --size 256x240
+"""
+
+import sys
+import os
+import csv
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from palette_quant import quantize_indices  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+from portrait_ids import load_identification_table  # noqa: E402
+from portrait_locator import ROM_PATH, PortraitLocator  # noqa: E402
+from batch_matcher import score_portrait  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_RELOCATE_INTERVAL = 15
+TIMELINE_FIELDS = ['start_frame', 'end_frame', 'portrait', 'score', 'characters']
+
+
+def iter_png_frames(frames_dir):
+    """依檔名順序逐格讀取 PNG"""
+    names = sorted(n for n in os.listdir(frames_dir)
+                   if n.lower().endswith('.png') and not n.startswith('.'))
+    for frame_no, name in enumerate(names):
+        with Image.open(os.path.join(frames_dir, name)) as img:
+            yield frame_no, np.array(img.convert('RGB'))
+
+
+def iter_raw_frames(stream, width, height):
+    """從原始 RGB24 串流逐格讀取"""
+    frame_size = width * height * 3
+    frame_no = 0
+    while True:
+        data = stream.read(frame_size)
+        if len(data) < frame_size:
+            return
+        yield frame_no, np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+        frame_no += 1
+
+
+def region_hash(crop):
+    return hashlib.blake2b(crop.tobytes(), digest_size=16).digest()
+
+
+class RecordingMatcher:
+    """逐格比對，僅在頭像區域改變時重新辨識"""
+
+    def __init__(self, table, threshold=DEFAULT_THRESHOLD,
+                 relocate_interval=DEFAULT_RELOCATE_INTERVAL, palette=None):
+        self.table = table
+        self.bank = table.bank
+        self.palette = palette
+        self.locator = PortraitLocator(table.bank, palette)
+        self.threshold = threshold
+        self.relocate_interval = relocate_interval
+
+    def identify(self, crop):
+        """48×48 RGB 裁切 → (portrait_index 或 None, score)"""
+        indices = quantize_indices(crop, self.palette)
+        hit = self.table.identify(indices)
+        if hit is not None:
+            return hit[0][0], 1.0
+        scores = score_portrait(indices, self.bank)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None, float(scores[best])
+        return best, float(scores[best])
+
+    def timeline(self, frames):
+        """
+        處理逐格 (frame_no, rgb) 序列，產生時間軸段落 dict
+
+        只有頭像改變時才會產生新段落；無頭像的段落不輸出
+        """
+        location = None
+        last_hash = None
+        last_locate = None
+        current = None  # (start_frame, portrait, score)
+        last_frame = -1
+
+        for frame_no, rgb in frames:
+            last_frame = frame_no
+            if location is None:
+                location = self.locator.locate(rgb)
+                last_locate = frame_no
+            # 只 hash 頭像視窗 (未找到頭像時沿用上次的視窗)
+            crop = self.locator.crop(rgb, location)
+            h = region_hash(crop)
+            if h == last_hash:
+                continue
+
+            portrait, score = self.identify(crop)
+            had_portrait = current is not None and current[1] is not None
+            if (portrait is None and last_locate != frame_no
+                    and (had_portrait or frame_no - last_locate >= self.relocate_interval)):
+                # 頭像剛消失或已隔一段時間: 對整格重新定位 (頭像視窗可能移動)
+                new_location = self.locator.locate(rgb)
+                last_locate = frame_no
+                new_crop = self.locator.crop(rgb, new_location)
+                portrait, score = self.identify(new_crop)
+                if portrait is not None:
+                    location = new_location
+                    h = region_hash(new_crop)
+            last_hash = h
+
+            if current is not None and current[1] == portrait:
+                continue
+            if current is not None and current[1] is not None:
+                yield self._segment(current, frame_no - 1)
+            current = (frame_no, portrait, score)
+
+        if current is not None and current[1] is not None:
+            yield self._segment(current, last_frame)
+
+    def _segment(self, current, end_frame):
+        start_frame, portrait, score = current
+        return {
+            'start_frame': start_frame,
+            'end_frame': end_frame,
+            'portrait': portrait,
+            'score': round(score, 4),
+            'characters': self.table.characters([portrait]),
+        }
+
+
+def main():
+    argv, palette = pop_palette_option(sys.argv)
+    if len(argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    source = argv[1]
+    size = None
+    output_path = None
+    threshold = DEFAULT_THRESHOLD
+    relocate_interval = DEFAULT_RELOCATE_INTERVAL
+    rom_path = ROM_PATH
+
+    i = 2
+    while i < len(argv):
+        if argv[i] == '--size' and i + 1 < len(argv):
+            size = tuple(int(v) for v in argv[i + 1].lower().split('x'))
+            i += 2
+        elif argv[i] == '--output' and i + 1 < len(argv):
+            output_path = argv[i + 1]
+            i += 2
+        elif argv[i] == '--threshold' and i + 1 < len(argv):
+            threshold = float(argv[i + 1])
+            i += 2
+        elif argv[i] == '--relocate' and i + 1 < len(argv):
+            relocate_interval = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--rom' and i + 1 < len(argv):
+            rom_path = argv[i + 1]
+            i += 2
+        else:
+            i += 1
+
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    stream = None
+    if os.path.isdir(source):
+        frames = iter_png_frames(source)
+    elif size is None:
+        print("錯誤: 原始 RGB 串流需指定 --size WxH")
+        sys.exit(1)
+    elif source == '-':
+        frames = iter_raw_frames(sys.stdin.buffer, *size)
+    else:
+        stream = open(source, 'rb')
+        frames = iter_raw_frames(stream, *size)
+
+    matcher = RecordingMatcher(load_identification_table(rom_path), threshold,
+                               relocate_interval, palette)
+
+    out = open(output_path, 'w', newline='', encoding='utf-8-sig') if output_path else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=TIMELINE_FIELDS)
+        writer.writeheader()
+        for segment in matcher.timeline(frames):
+            segment['portrait'] = f"P{segment['portrait']:03d}"
+            segment['characters'] = ' '.join(str(c) for c in segment['characters'])
+            writer.writerow(segment)
+            out.flush()
+    finally:
+        if stream is not None:
+            stream.close()
+        if output_path:
+            out.close()
+            print(f"已輸出: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tile Scanner - 以統計特徵掃描 PRG ROM，找出疑似 tile 圖形的區域
+
+使用方法:
+    python tile_scanner.py <rom_file.nes> [options]
+
+選項:
+    --output FILE     - 熱度圖 (預設 tile_heatmap.png)
+    --csv FILE        - 候選區域 CSV，含各特徵的區域平均 (預設只輸出到 stdout)
+    --top N           - 列出前 N 個候選區域 (預設 20)
+    --threshold X     - 區域門檻分數 0-1 (預設 0.4)
+    --min-tiles N     - 區域最少 (非空白) tile 數 (預設 8)
+    --smooth N        - 平滑的 tile 數 (預設 4)
+    --width N         - 熱度圖每列 tile 數 (預設 64 = 1 KB)
+    --scale N         - 熱度圖放大倍率 (預設 4)
+
+特徵 (每個 16-byte 視窗，視為一個 2bpp tile；每個 byte 起點都計算):
+    plane_corr   - Plane 0 / Plane 1 相同 bit 的比例 (圖形的兩個 plane 高度相關)
+    entropy      - 16 bytes 的 byte 熵 (bits，0-4；程式碼與文字偏高)
+    run_length   - 每列 8 像素的平均連續相同像素長度 (1-8；圖形偏長)
+    zero_rows    - 兩個 plane 皆為 0 的列比例
+
+tile 分數 = (plane_corr + (1 - entropy/4) + (run_length - 1)/7) / 3，
+全空白 (0x00 / 0xFF) 視窗為 NaN。對每個 byte 相位 (0-15) 分別取連續 --smooth
+個 tile 的平均分數，找出高於門檻的區域 (空白 tile 不中斷區域，但頭尾的空白
+會去掉)，重疊者保留較佳的一個，依 (平均分數 × 區域長度) 排序。
+隨機資料/程式碼約 0.2，一般 2bpp 圖形約 0.4-0.8。
+相鄰相位的分數通常相近，列出的相位只是參考，請以 tile_viewer.py --sweep 確認。
+
+熱度圖以 ROM 原本的 tile 對齊 (檔案偏移 0x10 起算) 繪製，空白 tile 為黑色，
+每 16 列 (16 KB / 每列 1 KB) 為一個 bank，以白線分隔。
+
+範例:
+    python tile_scanner.py "Sangokushi (Japan).nes" --csv regions.csv --top 30
+"""
+
+import sys
+import os
+import csv
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+TILE_BYTES = 16
+INES_HEADER = 0x10
+PRG_BANK_SIZE = 0x4000
+PRG_BANKS = 16
+CHUNK_WINDOWS = 1 << 16
+
+DEFAULT_THRESHOLD = 0.4
+DEFAULT_MIN_TILES = 8
+DEFAULT_SMOOTH = 4
+DEFAULT_TOP = 20
+
+FEATURE_FIELDS = ["plane_corr", "entropy", "run_length", "zero_rows"]
+STAT_FIELDS = FEATURE_FIELDS + ["score"]
+
+Region = namedtuple("Region", ["start", "end", "bank", "phase", "tiles", "score"] + FEATURE_FIELDS)
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def window_stats(data):
+    """
+    每個 byte 起點的 16-byte 視窗特徵
+
+    回傳: dict of 陣列 (長度 len(data) - 15)，欄位見 STAT_FIELDS
+    """
+    buf = np.frombuffer(bytes(data), dtype=np.uint8)
+    if len(buf) < TILE_BYTES:
+        return {name: np.zeros(0, dtype=np.float32) for name in STAT_FIELDS}
+    windows = np.lib.stride_tricks.sliding_window_view(buf, TILE_BYTES)
+    parts = [_chunk_stats(windows[i:i + CHUNK_WINDOWS])
+             for i in range(0, len(windows), CHUNK_WINDOWS)]
+    return {name: np.concatenate([p[name] for p in parts]) for name in STAT_FIELDS}
+
+
+def _chunk_stats(windows):
+    p0 = windows[:, :8]
+    p1 = windows[:, 8:]
+
+    plane_corr = 1.0 - _POPCOUNT[p0 ^ p1].sum(axis=1) / 64.0
+
+    # byte 熵: 每個 byte 在視窗內出現 c 次 → H = -Σ (1/16) log2(c/16)
+    counts = (windows[:, :, None] == windows[:, None, :]).sum(axis=2)
+    entropy = -np.log2(counts / TILE_BYTES).mean(axis=1)
+
+    # 每列相鄰像素變化 (任一 plane 的 bit 改變)
+    changes = ((p0 ^ (p0 >> 1)) | (p1 ^ (p1 >> 1))) & 0x7F
+    run_length = (8.0 / (1 + _POPCOUNT[changes])).mean(axis=1)
+
+    zero_rows = ((p0 == 0) & (p1 == 0)).mean(axis=1)
+
+    score = (plane_corr + (1 - entropy / 4) + (run_length - 1) / 7) / 3
+    blank = (windows == 0).all(axis=1) | (windows == 0xFF).all(axis=1)
+    score[blank] = np.nan
+    return {
+        "plane_corr": plane_corr.astype(np.float32),
+        "entropy": entropy.astype(np.float32),
+        "run_length": run_length.astype(np.float32),
+        "zero_rows": zero_rows.astype(np.float32),
+        "score": score.astype(np.float32),
+    }
+
+
+def _runs(mask):
+    """bool 陣列中連續 True 的 (起點, 終點) 列表 (終點不含)"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def smooth_scores(tiles, size=DEFAULT_SMOOTH):
+    """連續 size 個 tile 的平均分數 (略過 NaN；全為空白者仍為 NaN)"""
+    valid = ~np.isnan(tiles)
+    kernel = np.ones(size)
+    total = np.convolve(np.where(valid, tiles, 0), kernel, mode="same")
+    count = np.convolve(valid.astype(np.float64), kernel, mode="same")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def find_regions(stats, base=INES_HEADER, threshold=DEFAULT_THRESHOLD,
+                 min_tiles=DEFAULT_MIN_TILES, smooth=DEFAULT_SMOOTH):
+    """
+    各 byte 相位分別找出平滑分數 ≥ threshold 的 tile 區域，重疊者保留較佳者
+
+    參數:
+        stats: window_stats(...) 的結果，stats[...][i] 為檔案偏移 base + i 的視窗
+
+    回傳: Region 列表，依 score × 區域長度遞減
+          (tiles 不含空白 tile；各特徵為區域內非空白 tile 的平均)
+    """
+    score = stats["score"]
+    candidates = []
+    for phase in range(TILE_BYTES):
+        tiles = score[phase::TILE_BYTES]
+        smoothed = smooth_scores(tiles, smooth)
+        blank = np.isnan(tiles)
+        for begin, end in _runs((smoothed >= threshold) | blank):
+            filled = np.flatnonzero(~blank[begin:end])
+            if len(filled) < min_tiles:
+                continue
+            begin, end = begin + filled[0], begin + filled[-1] + 1
+            start = base + phase + begin * TILE_BYTES
+            inside = ~blank[begin:end]
+            features = {name: float(stats[name][phase::TILE_BYTES][begin:end][inside].mean())
+                        for name in FEATURE_FIELDS}
+            candidates.append(Region(
+                start=start,
+                end=base + phase + end * TILE_BYTES,
+                bank=(start - INES_HEADER) // PRG_BANK_SIZE,
+                phase=(start - INES_HEADER) % TILE_BYTES,
+                tiles=len(filled),
+                score=float(np.nanmean(tiles[begin:end])),
+                **features,
+            ))
+
+    candidates.sort(key=lambda r: -r.score * (r.end - r.start))
+    kept = []
+    for region in candidates:
+        if all(region.end <= k.start or region.start >= k.end for k in kept):
+            kept.append(region)
+    return kept
+
+
+def heatmap(score, width=64):
+    """tile 對齊 (相位 0) 的分數 → RGB 熱度圖 (每 tile 一像素)，bank 之間以白線分隔"""
+    tiles = score[::TILE_BYTES]
+    rows = -(-len(tiles) // width)
+    grid = np.full(rows * width, np.nan, dtype=np.float32)
+    grid[:len(tiles)] = tiles
+    grid = grid.reshape(rows, width)
+
+    # 藍 (0) → 黃 → 紅 (1)，空白為黑
+    v = np.clip(np.nan_to_num(grid), 0, 1)
+    rgb = np.stack([
+        np.clip(2 * v, 0, 1),
+        np.clip(2 - 2 * v, 0, 1) * np.clip(2 * v, 0, 1),
+        np.clip(1 - 2 * v, 0, 1),
+    ], axis=-1)
+    rgb[np.isnan(grid)] = 0
+    rgb = (rgb * 255).astype(np.uint8)
+
+    rows_per_bank = PRG_BANK_SIZE // (width * TILE_BYTES)
+    if rows_per_bank >= 1:
+        lines = np.arange(rows_per_bank, rows, rows_per_bank)
+        rgb = np.insert(rgb, lines, 255, axis=0)
+    return rgb
+
+
+def write_regions_csv(regions, output_path):
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["start", "end", "bank", "phase", "tiles", "score"] + FEATURE_FIELDS)
+        for r in regions:
+            writer.writerow([f"0x{r.start:05X}", f"0x{r.end:05X}", r.bank, r.phase, r.tiles,
+                             round(r.score, 3)]
+                            + [round(getattr(r, name), 3) for name in FEATURE_FIELDS])
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = sys.argv[1]
+    output_path = "tile_heatmap.png"
+    csv_path = None
+    top = DEFAULT_TOP
+    threshold = DEFAULT_THRESHOLD
+    min_tiles = DEFAULT_MIN_TILES
+    smooth = DEFAULT_SMOOTH
+    width = 64
+    scale = 4
+
+    i = 2
+    while i < len(sys.argv):
+        if sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--csv" and i + 1 < len(sys.argv):
+            csv_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--top" and i + 1 < len(sys.argv):
+            top = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--threshold" and i + 1 < len(sys.argv):
+            threshold = float(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--min-tiles" and i + 1 < len(sys.argv):
+            min_tiles = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--smooth" and i + 1 < len(sys.argv):
+            smooth = max(1, int(sys.argv[i + 1]))
+            i += 2
+        elif sys.argv[i] == "--width" and i + 1 < len(sys.argv):
+            width = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--scale" and i + 1 < len(sys.argv):
+            scale = int(sys.argv[i + 1])
+            i += 2
+        else:
+            i += 1
+
+    if width < 1 or scale < 1:
+        print("錯誤: --width 與 --scale 必須 >= 1")
+        sys.exit(1)
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    prg = rom[INES_HEADER:INES_HEADER + PRG_BANKS * PRG_BANK_SIZE]
+
+    stats = window_stats(prg)
+    regions = find_regions(stats, INES_HEADER, threshold, min_tiles, smooth)
+
+    img = Image.fromarray(heatmap(stats["score"], width), "RGB")
+    img.resize((img.width * scale, img.height * scale), Image.NEAREST).save(output_path)
+    print(f"已輸出熱度圖: {output_path}")
+
+    print(f"候選區域 {len(regions)} 個 (門檻 {threshold}，至少 {min_tiles} tiles):")
+    print(f"{'起點':>8} {'終點':>8} {'bank':>4} {'相位':>4} {'tiles':>6} {'分數':>6} "
+          f"{'相關':>5} {'熵':>5} {'連續':>5} {'空列':>5}")
+    for r in regions[:top]:
+        print(f"0x{r.start:05X}  0x{r.end:05X} {r.bank:4d} {r.phase:4d} {r.tiles:6d} {r.score:6.3f} "
+              f"{r.plane_corr:5.2f} {r.entropy:5.2f} {r.run_length:5.2f} {r.zero_rows:5.2f}")
+    if csv_path:
+        write_regions_csv(regions, csv_path)
+        print(f"已輸出: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
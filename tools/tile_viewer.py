@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Tile Viewer - 將任意 ROM 範圍 (或全部 16 個 bank) 輸出為 tile 表
+
+使用方法:
+    python tile_viewer.py <rom_file.nes> [options]
+
+範圍 (預設: 全部 PRG，16 banks):
+    --bank N          - 只輸出 bank N (0-15)
+    --start ADDR      - 起始檔案偏移 (可為任意 byte，不需對齊 tile；支援 0x 前綴)
+    --length N        - 長度 (bytes；預設到 PRG 結尾或該 bank 結尾)
+    --split           - 依 bank 邊界切開，每個 bank 各輸出一張 (<output>_bankNN.png；
+                        可與 --bank / --start 併用)
+
+編碼:
+    --mode 2bpp|1bpp  - 2bpp planar (16 bytes/tile，預設)
+                        1bpp (8 bytes/tile，Plane 1 = Plane 0，漢字字型格式)
+    --block WxH       - 每 W×H 個連續 tile 組成一塊 (列優先)，例: 漢字 --block 2x2
+    --sweep           - 同一範圍以起點 +0 … +(tile 大小 - 1) byte 各輸出一欄並排，
+                        找出未對齊的圖形
+
+輸出:
+    --width N         - 每列的塊數 (預設 16)
+    --scale N         - 放大倍率 (預設 2)
+    --palette FILE    - 調色盤設定檔 (見 palette_calibrate.py，預設灰階)
+    --output FILE     - 輸出檔 (預設 tiles.png)
+
+範例:
+    # 全 ROM 2bpp
+    python tile_viewer.py "Sangokushi (Japan).nes" --split --output sheets/rom
+    # 漢字 Page 0 (1bpp, 2×2 tiles)
+    python tile_viewer.py "Sangokushi (Japan).nes" --start 0x20014 --length 0x2000 --mode 1bpp --block 2x2
+    # 0x102A4 附近的韓玄 tiles，檢查各種 byte 對齊
+    python tile_viewer.py "Sangokushi (Japan).nes" --start 0x102A4 --length 0x200 --sweep
+"""
+
+import sys
+import os
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nes_tiles import TILE_BYTES_1BPP, TILE_BYTES_2BPP, decode_1bpp, decode_2bpp  # noqa: E402
+from palette_profile import pop_palette_option  # noqa: E402
+
+INES_HEADER = 0x10
+PRG_BANK_SIZE = 0x4000
+PRG_BANKS = 16
+
+MODES = {
+    "2bpp": (decode_2bpp, TILE_BYTES_2BPP),
+    "1bpp": (decode_1bpp, TILE_BYTES_1BPP),
+}
+
+GRAY_PALETTE = [
+    (0, 0, 0),
+    (85, 85, 85),
+    (170, 170, 170),
+    (255, 255, 255),
+]
+SWEEP_GAP = 4   # sweep 各欄間距 (pixels)
+
+
+def bank_range(bank):
+    """bank 編號 → (檔案偏移, 長度)"""
+    return INES_HEADER + bank * PRG_BANK_SIZE, PRG_BANK_SIZE
+
+
+def split_by_bank(start, length):
+    """(檔案偏移, 長度) 依 bank 邊界切開 → [(檔案偏移, 長度), ...]"""
+    ranges = []
+    end = start + length
+    while start < end:
+        bank_end = INES_HEADER + ((start - INES_HEADER) // PRG_BANK_SIZE + 1) * PRG_BANK_SIZE
+        ranges.append((start, min(end, bank_end) - start))
+        start = min(end, bank_end)
+    return ranges
+
+
+def decode_range(rom, start, length, mode="2bpp"):
+    """ROM 範圍 → (N, 8, 8) tile 陣列 (不足一個 tile 的尾端捨去)"""
+    decode, tile_bytes = MODES[mode]
+    data = rom[start:start + length]
+    return decode(data, len(data) // tile_bytes)
+
+
+def tile_sheet(tiles, width=16, block=(1, 1)):
+    """
+    (N, 8, 8) → 調色盤索引圖 (H, W)
+
+    每 block = (W, H) 個 tile 組成一塊 (列優先)，每列 width 塊；不足處補 0。
+    """
+    bw, bh = block
+    per_block = bw * bh
+    per_row = width * per_block
+    rows = max(1, -(-len(tiles) // per_row))
+    padded = np.zeros((rows * per_row, 8, 8), dtype=np.uint8)
+    padded[:len(tiles)] = tiles
+    # (列, 塊, 塊內列, 塊內欄, y, x) → (列, 塊內列, y, 塊, 塊內欄, x)
+    grid = padded.reshape(rows, width, bh, bw, 8, 8).transpose(0, 2, 4, 1, 3, 5)
+    return grid.reshape(rows * bh * 8, width * bw * 8)
+
+
+def sweep_sheet(rom, start, length, mode="2bpp", width=16, block=(1, 1)):
+    """起點 +0 … +(tile 大小 - 1) 各輸出一欄，以 SWEEP_GAP 間隔並排"""
+    _, tile_bytes = MODES[mode]
+    sheets = [tile_sheet(decode_range(rom, start + shift, length, mode), width, block)
+              for shift in range(tile_bytes)]
+    height = max(s.shape[0] for s in sheets)
+    gap = np.zeros((height, SWEEP_GAP), dtype=np.uint8)
+    columns = []
+    for sheet in sheets:
+        pad = np.zeros((height - sheet.shape[0], sheet.shape[1]), dtype=np.uint8)
+        columns += [np.vstack([sheet, pad]), gap]
+    return np.hstack(columns[:-1])
+
+
+def to_image(indices, palette=None, scale=1):
+    rgb = np.asarray(palette or GRAY_PALETTE, dtype=np.uint8)[indices]
+    img = Image.fromarray(rgb, "RGB")
+    if scale > 1:
+        img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+    return img
+
+
+def parse_int(text):
+    return int(text, 0)
+
+
+def main():
+    args, palette = pop_palette_option(sys.argv)
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rom_path = args[1]
+    bank = None
+    start = None
+    length = None
+    split = False
+    mode = "2bpp"
+    block = (1, 1)
+    sweep = False
+    width = 16
+    scale = 2
+    output_path = "tiles.png"
+
+    i = 2
+    while i < len(args):
+        if args[i] == "--bank" and i + 1 < len(args):
+            bank = parse_int(args[i + 1])
+            i += 2
+        elif args[i] == "--start" and i + 1 < len(args):
+            start = parse_int(args[i + 1])
+            i += 2
+        elif args[i] == "--length" and i + 1 < len(args):
+            length = parse_int(args[i + 1])
+            i += 2
+        elif args[i] == "--mode" and i + 1 < len(args):
+            mode = args[i + 1]
+            i += 2
+        elif args[i] == "--block" and i + 1 < len(args):
+            block = tuple(int(v) for v in args[i + 1].lower().split("x"))
+            i += 2
+        elif args[i] == "--width" and i + 1 < len(args):
+            width = int(args[i + 1])
+            i += 2
+        elif args[i] == "--scale" and i + 1 < len(args):
+            scale = int(args[i + 1])
+            i += 2
+        elif args[i] == "--output" and i + 1 < len(args):
+            output_path = args[i + 1]
+            i += 2
+        elif args[i] == "--split":
+            split = True
+            i += 1
+        elif args[i] == "--sweep":
+            sweep = True
+            i += 1
+        else:
+            i += 1
+
+    if mode not in MODES:
+        print(f"錯誤: --mode 必須是 {' 或 '.join(MODES)}")
+        sys.exit(1)
+    if len(block) != 2 or min(block) < 1:
+        print("錯誤: --block 格式為 WxH，例: 2x2")
+        sys.exit(1)
+    if bank is not None and not 0 <= bank < PRG_BANKS:
+        print(f"錯誤: --bank 必須在 0-{PRG_BANKS - 1}")
+        sys.exit(1)
+    if width < 1 or scale < 1:
+        print("錯誤: --width 與 --scale 必須 >= 1")
+        sys.exit(1)
+    if not os.path.exists(rom_path):
+        print(f"錯誤: 找不到 ROM 檔案 '{rom_path}'")
+        sys.exit(1)
+
+    with open(rom_path, "rb") as f:
+        rom = f.read()
+    prg_end = min(len(rom), INES_HEADER + PRG_BANKS * PRG_BANK_SIZE)
+
+    if start is not None:
+        end = min(sum(bank_range(bank)), prg_end) if bank is not None else prg_end
+        if not INES_HEADER <= start < prg_end:
+            print(f"錯誤: --start 必須在 PRG 範圍內 (0x{INES_HEADER:05X}-0x{prg_end - 1:05X})")
+            sys.exit(1)
+        length = end - start if length is None else length
+        ranges = [(start, max(0, min(length, prg_end - start)))]
+    elif bank is not None:
+        ranges = [bank_range(bank)]
+    else:
+        ranges = [(INES_HEADER, prg_end - INES_HEADER)]
+    if split:
+        ranges = [r for begin, size in ranges for r in split_by_bank(begin, size)]
+
+    base, ext = os.path.splitext(output_path)
+    ext = ext or ".png"
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    for begin, size in ranges:
+        if sweep:
+            sheet = sweep_sheet(rom, begin, size, mode, width, block)
+        else:
+            sheet = tile_sheet(decode_range(rom, begin, size, mode), width, block)
+        path = base + ext
+        if split:
+            path = f"{base}_bank{(begin - INES_HEADER) // PRG_BANK_SIZE:02d}{ext}"
+        to_image(sheet, palette, scale).save(path)
+        _, tile_bytes = MODES[mode]
+        print(f"已輸出: {path} (0x{begin:05X}-0x{begin + size - 1:05X}, "
+              f"每列 0x{width * block[0] * block[1] * tile_bytes:X} bytes)")
+
+
+if __name__ == "__main__":
+    main()